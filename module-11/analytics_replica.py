@@ -0,0 +1,483 @@
+#   Title: analytics_replica.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Local DuckDB copy of the winery tables for running the reports off the primary.
+#   Source: DuckDB Python API - https://duckdb.org/docs/api/python/overview
+#   Source: Arrow import - https://duckdb.org/docs/guides/python/import_arrow
+
+# The fact tables (sales, supply, supply_details, work_hours) are synced
+# incrementally: each sync copies the rows past the table's high-water mark id,
+# re-reading the last SYNC_OVERLAP ids so rows whose ids were handed out before
+# the last sync but committed after it aren't missed. When a table's
+# table_versions counter moved by more than the rows appended, rows below the mark
+# were updated or deleted and that table is copied again in full. The dimension
+# tables are small and copied whole whenever their counter moves.
+
+# Every sync reads MySQL from one consistent snapshot, so sales never point at a
+# wine the replica doesn't have. The trigger-maintained summaries are views over
+# the replicated facts here; DuckDB's columnar scans aggregate them quickly.
+
+# DuckDB allows one writing process per file: run the sync while no report session
+# has the replica open. Set REPORT_SOURCE=replica in the .env file to point the
+# report functions in queries.py at the replica.
+
+# duckdb (pip install duckdb) is an optional dependency like matplotlib and pyarrow:
+# queries.py only imports this module when REPORT_SOURCE=replica.
+
+# Usage: python analytics_replica.py [--full] [--path winery_analytics.duckdb] [--parquet DIR]
+
+
+# Import Statements
+import argparse
+import os
+import threading
+import time
+
+import duckdb
+import pyarrow as pa
+
+import mysql.connector  # to connect
+from db_config import pooled_connection, close_pools, secrets  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+from bulk_loader import DEFAULT_CHUNK_SIZE  # Import shared bulk loader
+from schema import TABLES  # Import current table definitions
+
+REPLICA_PATH = secrets.get("ANALYTICS_REPLICA") or "winery_analytics.duckdb"  # DuckDB file
+SYNC_OVERLAP = 1000  # Ids re-read behind each high-water mark
+READ_BATCH_SIZE = 1000  # Rows fetched per batch from the replica
+
+# Fact table -> id column used as its high-water mark
+INCREMENTAL_TABLES = {
+    "sales": "sale_id",
+    "supply": "supply_id",
+    "supply_details": "supply_id",
+    "work_hours": "work_id",
+}
+
+# Replica views standing in for the trigger-maintained summary tables
+SUMMARY_VIEWS = {
+    "sales_monthly_rollup": """
+        CREATE OR REPLACE VIEW sales_monthly_rollup AS
+        SELECT
+            CAST(date_trunc('month', s.sale_date) AS DATE) AS sale_month,
+            s.distributor_id,
+            w.wine_type_id,
+            SUM(s.quantity) AS total_quantity,
+            COUNT(*) AS sale_count
+        FROM sales s
+        JOIN wines w ON s.wine_id = w.wine_id
+        GROUP BY sale_month, s.distributor_id, w.wine_type_id
+    """,
+    "work_hours_quarterly": """
+        CREATE OR REPLACE VIEW work_hours_quarterly AS
+        SELECT
+            employee_id,
+            year(work_date) AS work_year,
+            quarter(work_date) AS work_quarter,
+            SUM(hours_worked) AS total_hours,
+            COUNT(*) AS entry_count
+        FROM work_hours
+        GROUP BY employee_id, work_year, work_quarter
+    """,
+}
+
+# Everything else in the schema except the cache bookkeeping
+DIMENSION_TABLES = [table for table in TABLES
+                    if table not in INCREMENTAL_TABLES and table not in SUMMARY_VIEWS
+                    and table != "table_versions"]
+
+# Sync bookkeeping kept inside the replica
+SYNC_STATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS replica_sync (
+        table_name VARCHAR NOT NULL,
+        high_water BIGINT NOT NULL,
+        source_version BIGINT,
+        synced_at TIMESTAMP NOT NULL
+    )
+"""
+
+# MySQL DATA_TYPE -> DuckDB column type (anything else is stored as VARCHAR)
+DUCKDB_TYPES = {
+    "tinyint": "TINYINT",
+    "smallint": "SMALLINT",
+    "mediumint": "INTEGER",
+    "int": "INTEGER",
+    "bigint": "BIGINT",
+    "float": "FLOAT",
+    "double": "DOUBLE",
+    "date": "DATE",
+    "datetime": "TIMESTAMP",
+    "timestamp": "TIMESTAMP",
+    "time": "TIME",
+}
+
+
+# Report SQL in DuckDB's dialect, by the same names as report_sql.PREPARED_REPORTS.
+# DuckDB has no DATE_FORMAT/DATEDIFF and wants every selected column grouped.
+_SUPPLIER_DELIVERY = """
+SELECT
+    strftime(s.order_date, '%m-%d-%Y') AS order_day,
+    sup.supplier_name,
+    ANY_VALUE(strftime(s.expected_date, '%m-%d-%Y')) AS expected_date,
+    ANY_VALUE(strftime(s.delivery_date, '%m-%d-%Y')) AS delivery_date,
+    SUM(date_diff('day', s.expected_date, s.delivery_date)) AS total_delay_days
+FROM supply s
+JOIN supplier sup ON s.supplier_id = sup.supplier_id
+{where}
+GROUP BY s.order_date, sup.supplier_id, sup.supplier_name
+ORDER BY MIN(s.order_month) ASC, total_delay_days DESC
+"""
+
+_WINE_PERFORMANCE = """
+SELECT
+    strftime(s.sale_date, '%m-%d-%Y') AS sale_date,
+    s.sale_id,
+    s.quantity,
+    wt.wine_type_name,
+    d.distributor_name
+FROM sales s
+JOIN wines w ON s.wine_id = w.wine_id
+JOIN wine_type wt ON w.wine_type_id = wt.wine_type_id
+JOIN distributor d ON s.distributor_id = d.distributor_id
+{where}
+ORDER BY s.sale_date ASC, s.sale_id ASC, d.distributor_name ASC
+"""
+
+_WINE_MONTHLY_TOTALS = """
+SELECT
+    strftime(r.sale_month, '%m-%Y') AS sale_month,
+    d.distributor_name,
+    wt.wine_type_name,
+    r.sale_count,
+    r.total_quantity
+FROM sales_monthly_rollup r
+JOIN wine_type wt ON r.wine_type_id = wt.wine_type_id
+JOIN distributor d ON r.distributor_id = d.distributor_id
+{where}
+ORDER BY r.sale_month ASC, d.distributor_name ASC, wt.wine_type_name ASC
+"""
+
+_EMPLOYEE_PERFORMANCE = """
+SELECT
+    e.first_name,
+    e.last_name,
+    SUM(CASE WHEN quarter(wh.work_date) = 1 THEN wh.hours_worked ELSE 0 END) AS Q1_total,
+    SUM(CASE WHEN quarter(wh.work_date) = 2 THEN wh.hours_worked ELSE 0 END) AS Q2_total,
+    SUM(CASE WHEN quarter(wh.work_date) = 3 THEN wh.hours_worked ELSE 0 END) AS Q3_total,
+    SUM(CASE WHEN quarter(wh.work_date) = 4 THEN wh.hours_worked ELSE 0 END) AS Q4_total
+FROM employee e
+JOIN work_hours wh ON e.employee_id = wh.employee_id
+{where}
+GROUP BY e.employee_id, e.first_name, e.last_name
+ORDER BY e.employee_id ASC
+"""
+
+REPLICA_QUERIES = {
+    "supplier_delivery": _SUPPLIER_DELIVERY.format(where=""),
+    "supplier_delivery_between": _SUPPLIER_DELIVERY.format(
+        where="WHERE s.order_date >= ? AND s.order_date < ?"),
+    "supplier_delivery_for_supplier": _SUPPLIER_DELIVERY.format(
+        where="WHERE s.supplier_id = ? AND s.order_date >= ? AND s.order_date < ?"),
+    "supplier_trends": """
+        SELECT
+            strftime(s.order_month, '%Y-%m') AS order_month,
+            sup.supplier_name,
+            SUM(date_diff('day', s.expected_date, s.delivery_date)) AS total_delay_days
+        FROM supply s
+        JOIN supplier sup ON s.supplier_id = sup.supplier_id
+        GROUP BY s.order_month, sup.supplier_id, sup.supplier_name
+        ORDER BY s.order_month ASC
+    """,
+    "wine_performance": _WINE_PERFORMANCE.format(where=""),
+    "wine_performance_between": _WINE_PERFORMANCE.format(
+        where="WHERE s.sale_date >= ? AND s.sale_date < ?"),
+    "wine_performance_for_distributor": _WINE_PERFORMANCE.format(
+        where="WHERE s.distributor_id = ? AND s.sale_date >= ? AND s.sale_date < ?"),
+    "wine_monthly_totals": _WINE_MONTHLY_TOTALS.format(where=""),
+    "wine_monthly_totals_between": _WINE_MONTHLY_TOTALS.format(
+        where="WHERE r.sale_month >= ? AND r.sale_month < ?"),
+    "wine_monthly_totals_for_distributor": _WINE_MONTHLY_TOTALS.format(
+        where="WHERE r.distributor_id = ? AND r.sale_month >= ? AND r.sale_month < ?"),
+    "sales_trends": """
+        SELECT
+            strftime(r.sale_month, '%m-%Y') AS sale_month,
+            d.distributor_name,
+            wt.wine_type_name,
+            r.total_quantity
+        FROM sales_monthly_rollup r
+        JOIN wine_type wt ON r.wine_type_id = wt.wine_type_id
+        JOIN distributor d ON r.distributor_id = d.distributor_id
+        ORDER BY r.sale_month ASC, d.distributor_name ASC, wt.wine_type_name ASC
+    """,
+    "employee_performance": _EMPLOYEE_PERFORMANCE.format(
+        where="WHERE NOT (year(wh.work_date) = year(current_date)"
+              " AND quarter(wh.work_date) = quarter(current_date))"),
+    "employee_performance_between": _EMPLOYEE_PERFORMANCE.format(
+        where="WHERE wh.work_date >= ? AND wh.work_date < ?"),
+    "employee_quarterly_hours": """
+        SELECT
+            e.employee_id,
+            e.first_name,
+            e.last_name,
+            q.work_quarter,
+            q.total_hours,
+            q.entry_count
+        FROM work_hours_quarterly q
+        JOIN employee e ON q.employee_id = e.employee_id
+        WHERE q.work_year = ?
+        ORDER BY e.employee_id ASC, q.work_quarter ASC
+    """,
+}
+
+
+def duckdb_type(data_type, column_type, precision, scale):
+    if data_type == "decimal":
+        return f"DECIMAL({precision}, {scale})"
+    if "unsigned" in column_type and data_type in ("tinyint", "smallint", "mediumint", "int"):
+        return "BIGINT"  # Unsigned values can overflow the signed type of the same width
+    return DUCKDB_TYPES.get(data_type, "VARCHAR")
+
+
+# Table -> [(column, DuckDB type)] for the replicated tables, generated columns included
+def source_columns(cursor):
+    tables = DIMENSION_TABLES + list(INCREMENTAL_TABLES)
+    placeholders = ", ".join(["%s"] * len(tables))
+    cursor.execute(f"""
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, NUMERIC_PRECISION, NUMERIC_SCALE
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """, tables)
+    columns = {}
+    for table, column, data_type, column_type, precision, scale in cursor.fetchall():
+        columns.setdefault(table, []).append((column, duckdb_type(data_type, column_type,
+                                                                  precision, scale)))
+    return columns
+
+
+# Table -> change counter from the report cache's table_versions (empty if not migrated)
+def source_versions(cursor):
+    cursor.execute("SELECT COUNT(*) FROM information_schema.TABLES "
+                   "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'table_versions'")
+    if not cursor.fetchone()[0]:
+        return {}
+    cursor.execute("SELECT table_name, version FROM table_versions")
+    return dict(cursor.fetchall())
+
+
+# Table -> (high-water mark, source version) as of the last sync
+def sync_state(duck):
+    duck.execute(SYNC_STATE_TABLE)
+    rows = duck.execute("SELECT table_name, high_water, source_version FROM replica_sync").fetchall()
+    return {table: (high_water, version) for table, high_water, version in rows}
+
+
+def save_state(duck, table, high_water, version):
+    duck.execute("DELETE FROM replica_sync WHERE table_name = ?", [table])
+    duck.execute("INSERT INTO replica_sync VALUES (?, ?, ?, current_timestamp)",
+                 [table, high_water, version])
+
+
+# Create (or recreate, when the source columns changed) the replica copy of a table.
+# Returns True when the table starts out empty.
+def ensure_table(duck, table, columns):
+    existing = [row[0] for row in duck.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = 'main' AND table_name = ? ORDER BY ordinal_position",
+        [table]).fetchall()]
+    if existing == [column for column, _ in columns]:
+        return False
+
+    duck.execute(f'DROP TABLE IF EXISTS "{table}"')
+    duck.execute(f'CREATE TABLE "{table}" ('
+                 + ", ".join(f'"{column}" {column_type}' for column, column_type in columns) + ")")
+    duck.execute("DELETE FROM replica_sync WHERE table_name = ?", [table])
+    return True
+
+
+# Stream rows from MySQL into the replica table in Arrow batches; returns the row count
+def copy_rows(conn, duck, table, columns, where="", params=(), batch_size=DEFAULT_CHUNK_SIZE):
+    names = [column for column, _ in columns]
+    cursor = conn.cursor(buffered=False)  # Unbuffered: rows stream in batches
+    copied = 0
+    try:
+        cursor.execute(f"SELECT {', '.join(f'`{name}`' for name in names)} FROM `{table}` {where}",
+                       params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            # Column-wise Arrow batch; DuckDB casts it to the table's types on insert
+            batch = pa.table({name: list(values) for name, values in zip(names, zip(*rows))})
+            duck.register("incoming_rows", batch)
+            duck.execute(f'INSERT INTO "{table}" SELECT * FROM incoming_rows')
+            duck.unregister("incoming_rows")
+            copied += len(rows)
+    finally:
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+    return copied
+
+
+# Copy a dimension table whole when it changed since the last sync
+def sync_dimension(conn, duck, table, columns, state, versions, full):
+    version = versions.get(table)
+    reset = ensure_table(duck, table, columns)
+    last = state.get(table)
+    if not (full or reset or last is None or version is None or version != last[1]):
+        return 0
+
+    duck.execute("BEGIN TRANSACTION")
+    try:
+        duck.execute(f'DELETE FROM "{table}"')
+        copied = copy_rows(conn, duck, table, columns)
+        save_state(duck, table, 0, version)
+        duck.execute("COMMIT")
+    except BaseException:
+        duck.execute("ROLLBACK")
+        raise
+    return copied
+
+
+# Append a fact table's new rows past its high-water mark, or copy it again when
+# rows below the mark changed
+def sync_incremental(conn, duck, table, columns, state, versions, full):
+    id_column = INCREMENTAL_TABLES[table]
+    version = versions.get(table)
+    reset = ensure_table(duck, table, columns) or full
+    high_water, last_version = state.get(table, (0, None))
+
+    if not reset and version is not None and last_version is not None:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM `{table}` WHERE `{id_column}` > %s", (high_water,))
+        appended = cursor.fetchone()[0]
+        cursor.close()
+        if version - last_version > appended:
+            logger.warning(f"Replica: rows below the high-water mark of '{table}' changed; "
+                           f"copying it again in full.")
+            reset = True
+
+    start = 0 if reset else max(high_water - SYNC_OVERLAP, 0)
+    duck.execute("BEGIN TRANSACTION")
+    try:
+        if reset:
+            duck.execute(f'DELETE FROM "{table}"')
+        else:
+            duck.execute(f'DELETE FROM "{table}" WHERE "{id_column}" > ?', [start])
+        copied = copy_rows(conn, duck, table, columns, f"WHERE `{id_column}` > %s", (start,))
+        high_water = duck.execute(f'SELECT MAX("{id_column}") FROM "{table}"').fetchone()[0] or 0
+        save_state(duck, table, high_water, version)
+        duck.execute("COMMIT")
+    except BaseException:
+        duck.execute("ROLLBACK")
+        raise
+    return copied
+
+
+# Sync every table from one MySQL snapshot on conn into the open replica duck;
+# returns rows copied per table
+def sync_tables(conn, duck, full=False):
+    state = sync_state(duck)
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+    columns = source_columns(cursor)
+    versions = source_versions(cursor)
+    cursor.close()
+
+    # Dimensions first, so new facts always find their parents
+    copied = {}
+    for table in DIMENSION_TABLES:
+        copied[table] = sync_dimension(conn, duck, table, columns[table], state, versions, full)
+    for table in INCREMENTAL_TABLES:
+        copied[table] = sync_incremental(conn, duck, table, columns[table], state, versions, full)
+    conn.rollback()  # End the read-only snapshot
+
+    for query in SUMMARY_VIEWS.values():
+        duck.execute(query)
+    return copied
+
+
+# Bring the replica up to date with the database; returns rows copied per table
+def sync_replica(path=REPLICA_PATH, database="winery", full=False):
+    duck = duckdb.connect(path)
+    try:
+        with pooled_connection(database, read_only=True) as conn:  # A replica when one is healthy
+            return sync_tables(conn, duck, full)
+    finally:
+        duck.close()
+
+
+# Write every replicated table to <out_dir>/<table>.parquet
+def export_parquet(out_dir, path=REPLICA_PATH):
+    os.makedirs(out_dir, exist_ok=True)
+    duck = duckdb.connect(path, read_only=True)
+    try:
+        for table in DIMENSION_TABLES + list(INCREMENTAL_TABLES):
+            target = os.path.join(out_dir, f"{table}.parquet").replace("'", "''")
+            duck.execute(f"COPY \"{table}\" TO '{target}' (FORMAT parquet)")
+    finally:
+        duck.close()
+
+
+# Shared read-only connection for the reports; each report gets its own cursor
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def replica_connection(path=REPLICA_PATH):
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = duckdb.connect(path, read_only=True)
+        return _reader
+
+
+# Yield the rows of a named report from the replica, bound to params
+def replica_rows(name, params=(), batch_size=READ_BATCH_SIZE):
+    cursor = replica_connection().cursor()  # Own cursor, so report threads don't share results
+    try:
+        cursor.execute(REPLICA_QUERIES[name], list(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def close_replica():
+    global _reader
+    with _reader_lock:
+        if _reader is not None:
+            _reader.close()
+            _reader = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the local DuckDB analytics replica.")
+    parser.add_argument("--path", default=REPLICA_PATH, help="DuckDB replica file")
+    parser.add_argument("--database", default="winery")
+    parser.add_argument("--full", action="store_true", help="Copy every table again in full")
+    parser.add_argument("--parquet", metavar="DIR", default=None,
+                        help="Also export the replicated tables to Parquet files in DIR")
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        copied = sync_replica(args.path, args.database, args.full)
+        for table, rows in copied.items():
+            if rows:
+                print(f"Table '{table}': {rows:,} rows copied.")
+        print(f"\nReplica '{args.path}' synced: {sum(copied.values()):,} rows "
+              f"in {time.perf_counter() - start:.2f}s.")
+        if args.parquet:
+            export_parquet(args.parquet, args.path)
+            print(f"Parquet files written to '{args.parquet}'.")
+    except (mysql.connector.Error, duckdb.Error) as err:
+        print(f"Replica sync failed: {err}")
+        logger.error(f"Replica sync failed: {err}")
+    finally:
+        close_pools()
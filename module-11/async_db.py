@@ -0,0 +1,183 @@
+#   Title: async_db.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: asyncio database connection shared file, parallel to db_config.
+#   Source: Connector/Python asyncio - https://dev.mysql.com/doc/connector-python/en/connector-python-asyncio.html
+
+
+# Import Statements
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import mysql.connector  # to connect
+import mysql.connector.aio  # asyncio flavour of the same driver
+from db_config import (secrets, POOL_SIZE, POOL_IDLE_TIMEOUT, POOL_ACQUIRE_TIMEOUT,
+                       CONNECTION_LOST_ERRORS, server_address, replicas)  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+import queries  # for REPORT_DATABASE
+
+QUERY_TIMEOUT = float(secrets.get("QUERY_TIMEOUT") or 30)  # Seconds before a report query is cancelled
+
+
+# Async database config object (host=None connects to the primary)
+async def connect_db_async(database=None, host=None):
+    host, port = server_address(host)
+    return await mysql.connector.aio.connect(
+        user=secrets["USER"],
+        password=secrets["PASSWORD"],
+        host=host,
+        port=port,
+        database=database if database else None
+    )
+
+
+# Bounded pool of warm async connections to one database on one server
+class AsyncConnectionPool:
+    def __init__(self, database=None, max_size=POOL_SIZE,
+                 idle_timeout=POOL_IDLE_TIMEOUT, acquire_timeout=POOL_ACQUIRE_TIMEOUT, host=None):
+        self.database = database
+        self.host = host  # None for the primary
+        self.in_use = 0  # Connections currently checked out
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = []  # (connection, last used time) pairs ready for checkout
+        self._slots = asyncio.Semaphore(max_size)  # One slot per open connection
+
+    async def _close(self, conn):
+        try:
+            await conn.close()
+        except mysql.connector.Error:
+            pass
+
+    # Check out a connection, waiting for a free slot if the pool is full
+    async def acquire(self):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise mysql.connector.errors.PoolError(
+                f"No free connection to '{self.database}' on {self.host or 'the primary'} "
+                f"after {self.acquire_timeout}s "
+                f"(pool size {self.max_size})") from None
+
+        try:
+            now = time.monotonic()
+            while self._idle:
+                conn, last_used = self._idle.pop()  # Most recently used is the warmest
+                if now - last_used > self.idle_timeout:
+                    await self._close(conn)
+                    continue
+                try:
+                    await conn.ping(reconnect=True, attempts=1, delay=0)
+                    break
+                except mysql.connector.Error:
+                    await self._close(conn)
+            else:
+                conn = await connect_db_async(database=self.database, host=self.host)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.in_use += 1
+        return conn
+
+    # Return a connection to the pool, or close it if it is broken
+    async def release(self, conn, discard=False):
+        try:
+            if not discard and conn.in_transaction:
+                await conn.rollback()  # Never hand out someone else's open transaction
+        except mysql.connector.Error:
+            discard = True
+
+        if discard:
+            await self._close(conn)
+        else:
+            self._idle.append((conn, time.monotonic()))
+        self.in_use -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        discard = False
+        try:
+            yield conn
+        except mysql.connector.Error as err:
+            discard = err.errno in CONNECTION_LOST_ERRORS
+            raise
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            discard = True  # The connection may be part way through a result
+            raise
+        finally:
+            await self.release(conn, discard=discard)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await self._close(conn)
+
+
+# One pool per database name and server (pools belong to the event loop that created them)
+_pools = {}
+
+
+def get_async_pool(database=None, host=None):
+    if (database, host) not in _pools:
+        _pools[(database, host)] = AsyncConnectionPool(database=database, host=host)
+    return _pools[(database, host)]
+
+
+def pooled_connection_async(database=None, host=None):
+    return get_async_pool(database, host).connection()
+
+
+# Replica host for a read-only session (None for the primary), balanced on the async pools.
+# The lag check may hit the network, so it runs off the event loop.
+async def choose_replica_async(database=None):
+    return await asyncio.to_thread(replicas.choose, database,
+                                   lambda host: get_async_pool(database, host).in_use)
+
+
+async def close_async_pools():
+    for pool in list(_pools.values()):
+        await pool.close()
+    _pools.clear()
+
+
+# Stop a running statement on the server from a separate connection
+async def kill_query(connection_id, database=None, host=None):
+    conn = await connect_db_async(database=database, host=host)
+    try:
+        cursor = await conn.cursor()
+        await cursor.execute(f"KILL QUERY {int(connection_id)}")
+        await cursor.close()
+    except mysql.connector.Error as err:
+        logger.error(f"Could not cancel query on connection {connection_id}: {err}")
+    finally:
+        await conn.close()
+
+
+# Run one query on a pooled connection and return its rows. On timeout or task
+# cancellation the statement is killed on the server and the connection discarded.
+# read_only=True lets a healthy replica serve the query. database defaults to the
+# same REPORT_DATABASE the sync reports read.
+async def fetch_all_async(query, params=None, database=None, timeout=QUERY_TIMEOUT,
+                          read_only=False):
+    database = database or queries.REPORT_DATABASE
+    host = await choose_replica_async(database) if read_only else None
+    async with pooled_connection_async(database, host) as conn:
+        connection_id = conn.connection_id
+
+        async def run():
+            cursor = await conn.cursor()
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+            await cursor.close()  # Skipped on cancel; the connection is discarded instead
+            return rows
+
+        try:
+            return await asyncio.wait_for(run(), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            await asyncio.shield(kill_query(connection_id, database, host))
+            raise
@@ -0,0 +1,78 @@
+#   Title: async_reports.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: asyncio versions of the winery reports for dashboards serving many users.
+#   Source: asyncio tasks - https://docs.python.org/3/library/asyncio-task.html
+
+# The reports run the same SQL as queries.py (from report_sql) and return
+# (headers, rows) so a web handler can render them however it likes.
+
+
+# Import Statements
+import asyncio
+
+from async_db import fetch_all_async, close_async_pools, QUERY_TIMEOUT  # Import shared async db file
+from report_sql import (SUPPLIER_DELIVERY_SQL, SUPPLIER_TRENDS_SQL, WINE_PERFORMANCE_SQL,
+                        WINE_MONTHLY_TOTALS_SQL, SALES_TRENDS_SQL,
+                        EMPLOYEE_PERFORMANCE_SQL)  # Import shared report SQL
+from queries import (SUPPLIER_DELIVERY_HEADERS, WINE_PERFORMANCE_HEADERS,
+                     WINE_MONTHLY_TOTALS_HEADERS,
+                     EMPLOYEE_PERFORMANCE_HEADERS)  # Import shared report layout
+
+# Report name -> (headers, SQL)
+ASYNC_REPORTS = {
+    "supplier_delivery": (SUPPLIER_DELIVERY_HEADERS, SUPPLIER_DELIVERY_SQL),
+    "supplier_trends": (["Month", "Supplier Name", "Total Delay Days"], SUPPLIER_TRENDS_SQL),
+    "wine_performance": (WINE_PERFORMANCE_HEADERS, WINE_PERFORMANCE_SQL),
+    "wine_monthly_totals": (WINE_MONTHLY_TOTALS_HEADERS, WINE_MONTHLY_TOTALS_SQL),
+    "sales_trends": (["Month", "Distributor Name", "Wine Type", "Total Quantity"], SALES_TRENDS_SQL),
+    "employee_performance": (EMPLOYEE_PERFORMANCE_HEADERS, EMPLOYEE_PERFORMANCE_SQL),
+}
+
+
+# Run one report by name; raises TimeoutError if it runs longer than timeout seconds
+async def fetch_report(name, params=None, timeout=QUERY_TIMEOUT):
+    headers, query = ASYNC_REPORTS[name]
+    rows = await fetch_all_async(query, params, timeout=timeout, read_only=True)
+    return headers, rows
+
+
+# Supplier Reports
+async def get_supplier_delivery_performance(timeout=QUERY_TIMEOUT):
+    return await fetch_report("supplier_delivery", timeout=timeout)
+
+
+# Wine Reports
+async def get_wine_performance(timeout=QUERY_TIMEOUT):
+    return await fetch_report("wine_performance", timeout=timeout)
+
+
+# Employee Reports
+async def get_employee_performance(timeout=QUERY_TIMEOUT):
+    return await fetch_report("employee_performance", timeout=timeout)
+
+
+# Run several reports concurrently; failed reports come back as their exception
+async def fetch_reports(names=None, timeout=QUERY_TIMEOUT):
+    names = list(names or ASYNC_REPORTS)
+    results = await asyncio.gather(*(fetch_report(name, timeout=timeout) for name in names),
+                                   return_exceptions=True)
+    return dict(zip(names, results))
+
+
+async def main():
+    try:
+        results = await fetch_reports()
+    finally:
+        await close_async_pools()
+
+    for name, result in results.items():
+        if isinstance(result, BaseException):
+            print(f"[ERROR] {name}: {result!r}")
+        else:
+            headers, rows = result
+            print(f"{name}: {len(rows)} rows ({', '.join(headers)})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,253 @@
+#   Title: benchmark.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Benchmarks the winery reports at several data scales and compares runs.
+#   Source: Statement summary tables - https://dev.mysql.com/doc/refman/8.0/en/performance-schema-statement-summary-tables.html
+#   Source: resource - https://docs.python.org/3/library/resource.html
+
+# Each (report, scale) pair runs in its own Python process so peak RSS belongs to
+# that report alone. Server time and rows sent are the difference in
+# performance_schema's per-digest counters for the scale's database across the
+# run. The report cache is off so every run really hits the server.
+
+# Usage: python benchmark.py --scales 1 10 --out benchmarks/new.json --compare benchmarks/base.json
+
+
+# Import Statements
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import mysql.connector  # to connect
+from mysql.connector import errorcode
+from db_config import pooled_connection, close_pools, replicas  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+
+REGRESSION_THRESHOLD = 0.20  # Slower than the baseline by more than this fails the comparison
+
+# Benchmark name -> (report function name in queries.py, writes a chart file)
+BENCHMARKS = {
+    "supplier_delivery": ("get_supplier_delivery_performance", False),
+    "supplier_trends_chart": ("plot_supplier_delivery_trends", True),
+    "wine_performance": ("get_wine_performance", False),
+    "sales_trends_chart": ("plot_sales_trends", True),
+    "employee_performance": ("get_employee_performance", False),
+}
+
+
+def scale_database(scale):
+    return f"winery_sf{scale:g}".replace(".", "_")
+
+
+# Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS).
+# resource is Unix-only; on Windows psutil's peak working set is used if it's installed,
+# otherwise the peak is reported as None.
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        return getattr(memory, "peak_wset", memory.rss) / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Summed statement counters for one database, or None without performance_schema access
+def server_counters(database):
+    try:
+        with pooled_connection() as conn:  # No default schema, so these reads aren't counted
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COALESCE(SUM(COUNT_STAR), 0), COALESCE(SUM(SUM_TIMER_WAIT), 0),
+                       COALESCE(SUM(SUM_ROWS_SENT), 0)
+                FROM performance_schema.events_statements_summary_by_digest
+                WHERE SCHEMA_NAME = %s
+            """, (database,))
+            statements, timer_wait, rows_sent = cursor.fetchone()
+            cursor.close()
+    except mysql.connector.Error as err:
+        if err.errno not in (errorcode.ER_TABLEACCESS_DENIED_ERROR, errorcode.ER_NO_SUCH_TABLE):
+            raise
+        return None
+    return int(statements), int(timer_wait), int(rows_sent)
+
+
+# Make sure the scale's database exists and holds the generated data
+def ensure_scale(scale, seed):
+    from data_generator import Scale, load_synthetic
+    database = scale_database(scale)
+    try:
+        with pooled_connection(database) as conn:  # Borrow a warm connection from the pool
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM sales")
+            loaded = cursor.fetchone()[0] == Scale(scale).sales
+            cursor.close()
+    except mysql.connector.Error as err:
+        if err.errno not in (errorcode.ER_BAD_DB_ERROR, errorcode.ER_NO_SUCH_TABLE):
+            raise
+        loaded = False
+
+    if not loaded:
+        print(f"Loading scale factor {scale:g} into '{database}'...")
+        load_synthetic(database, scale, seed)
+    return database
+
+
+# Child process: run one report repeatedly and print its timings as JSON
+def run_child(name, database, repeat, warmup):
+    import matplotlib
+    matplotlib.use("Agg")  # No display needed; must be set before pyplot is imported
+
+    import queries
+    queries.REPORT_DATABASE = database
+    replicas.hosts = []  # Run on the primary, where server_counters reads the digests
+    queries.report_cache.enabled = False  # Measure the query, not the cache
+
+    function_name, writes_chart = BENCHMARKS[name]
+    report = getattr(queries, function_name)
+    output = os.path.join(tempfile.mkdtemp(), f"{name}.png") if writes_chart else None
+
+    timings = []
+    for run in range(warmup + repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Text reports print every row
+            report(output) if writes_chart else report()
+        if run >= warmup:
+            timings.append(time.perf_counter() - started)
+
+    close_pools()
+    print(json.dumps({"timings": timings, "peak_rss_mb": peak_rss_mb()}))
+
+
+# Run one report at one scale in a fresh process and collect its numbers
+def benchmark(name, scale, database, repeat, warmup):
+    before = server_counters(database)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", name, database,
+         "--repeat", str(repeat), "--warmup", str(warmup)],
+        capture_output=True, text=True, check=True)
+    after = server_counters(database)
+
+    child = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings = child["timings"]
+    wall = statistics.median(timings)
+    result = {
+        "report": name,
+        "scale": scale,
+        "wall_seconds": {"median": wall, "min": min(timings), "max": max(timings), "runs": timings},
+        "peak_rss_mb": round(child["peak_rss_mb"], 1) if child["peak_rss_mb"] is not None else None,
+        "rows": None,
+        "rows_per_sec": None,
+        "server_seconds": None,
+        "statements": None,
+    }
+
+    if before is not None and after is not None:
+        runs = warmup + repeat
+        statements, timer_wait, rows_sent = (b - a for a, b in zip(before, after))
+        result["statements"] = statements // runs
+        result["server_seconds"] = timer_wait / 1e12 / runs  # Timers are in picoseconds
+        result["rows"] = rows_sent // runs
+        result["rows_per_sec"] = result["rows"] / wall if wall else None
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def server_version():
+    with pooled_connection() as conn:  # Borrow a warm connection from the pool
+        return conn.get_server_info()
+
+
+# Median wall time changes against a previous results file; returns the regressions
+def compare(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    with open(baseline_path) as f:
+        baseline = {(r["report"], r["scale"]): r for r in json.load(f)["results"]}
+
+    print(f"\n{'Report':<24} {'Scale':>6} {'Base (s)':>10} {'New (s)':>10} {'Change':>8}")
+    regressions = []
+    for result in results:
+        old = baseline.get((result["report"], result["scale"]))
+        if old is None:
+            continue
+        old_wall = old["wall_seconds"]["median"]
+        new_wall = result["wall_seconds"]["median"]
+        change = (new_wall - old_wall) / old_wall if old_wall else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{result['report']:<24} {result['scale']:>6g} {old_wall:>10.3f} "
+              f"{new_wall:>10.3f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append((result["report"], result["scale"], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the winery reports.")
+    parser.add_argument("--scales", nargs="+", type=float, default=[1, 10])
+    parser.add_argument("--reports", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per report")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs first")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for generated data")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare with")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--child", nargs=2, metavar=("REPORT", "DATABASE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.repeat, args.warmup)
+        return 0
+
+    results = []
+    try:
+        for scale in args.scales:
+            database = ensure_scale(scale, args.seed)
+            for name in args.reports:
+                result = benchmark(name, scale, database, args.repeat, args.warmup)
+                results.append(result)
+                rate = f"{result['rows_per_sec']:,.0f} rows/s" if result["rows_per_sec"] else "n/a"
+                rss = f"{result['peak_rss_mb']} MB" if result["peak_rss_mb"] is not None else "n/a"
+                print(f"{name} @ SF{scale:g}: {result['wall_seconds']['median']:.3f}s, {rate}, "
+                      f"peak RSS {rss}")
+        version = server_version()
+    except (mysql.connector.Error, subprocess.CalledProcessError) as err:
+        print(f"Benchmark failed: {err}")
+        if getattr(err, "stderr", None):
+            print(err.stderr)  # The child's traceback
+        logger.error(f"Benchmark failed: {err}")
+        return 1
+    finally:
+        close_pools()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump({"commit": git_commit(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "python": platform.python_version(), "mysql": version,
+                   "results": results}, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#   Title: bulk_loader.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Chunked bulk loading of generated rows into the winery database.
+#   Source: executemany - https://dev.mysql.com/doc/connector-python/en/connector-python-api-mysqlcursor-executemany.html
+#   Source: LOAD DATA - https://dev.mysql.com/doc/refman/8.0/en/load-data.html
+
+
+# Import Statements
+import os
+import tempfile
+import time  # for rows/sec reporting
+from itertools import islice
+
+import mysql.connector  # to connect
+from mysql.connector.constants import ClientFlag
+from log_config import logger  # Import shared logging configuration
+
+DEFAULT_CHUNK_SIZE = 5000  # Rows per transaction
+
+
+# Split any iterable of rows into lists of at most chunk_size rows
+def chunked(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Check whether the server and this connection both allow LOAD DATA LOCAL INFILE
+def local_infile_enabled(conn):
+    # Opened without allow_local_infile (LOCAL_INFILE=1 in .env): the client refuses the file
+    if not conn.isset_client_flag(ClientFlag.LOCAL_FILES):
+        return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SHOW GLOBAL VARIABLES LIKE 'local_infile'")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return row is not None and str(row[1]).upper() in ("ON", "1")
+
+
+# One LOAD DATA field: NULL bare, everything else quoted with embedded quotes doubled.
+# The statement uses ESCAPED BY '', so backslashes in values are loaded as written.
+def _infile_field(value):
+    if value is None:
+        return "NULL"
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+# Insert one chunk with a parameterized multi-row INSERT
+def _insert_chunk(cursor, table, columns, chunk):
+    placeholders = ", ".join(["%s"] * len(columns))
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    cursor.executemany(query, chunk)
+
+
+# Insert one chunk by writing it to a temp CSV and letting the server parse it
+def _load_chunk(cursor, table, columns, chunk):
+    handle, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(handle, "w", newline="", encoding="utf-8") as csv_file:
+            csv_file.writelines(",".join(_infile_field(field) for field in row) + "\r\n"
+                                for row in chunk)
+        query = (f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                 "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                 "LINES TERMINATED BY '\\r\\n' "
+                 f"({', '.join(columns)})")
+        cursor.execute(query, (path.replace("\\", "/"),))
+    finally:
+        os.remove(path)
+
+
+# Stream rows into a table, one transaction per chunk, and report throughput
+def bulk_insert(conn, table, columns, rows, chunk_size=DEFAULT_CHUNK_SIZE,
+                use_load_data=False, verbose=True):
+    if use_load_data and not local_infile_enabled(conn):
+        logger.warning(
+            f"LOAD DATA LOCAL INFILE is disabled on the server or this connection; "
+            f"using executemany for '{table}'.")
+        use_load_data = False
+    load = _load_chunk if use_load_data else _insert_chunk
+
+    cursor = conn.cursor()
+    total = 0
+    start = time.perf_counter()
+
+    try:
+        for chunk in chunked(rows, chunk_size):
+            try:
+                load(cursor, table, columns, chunk)
+                conn.commit()  # Commit each chunk so memory and undo log stay bounded
+            except mysql.connector.Error:
+                conn.rollback()
+                raise
+            total += len(chunk)
+
+            if verbose:
+                elapsed = time.perf_counter() - start
+                rate = total / elapsed if elapsed else 0
+                print(f"  {table}: {total:,} rows loaded ({rate:,.0f} rows/sec)")
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    return total, elapsed
@@ -0,0 +1,72 @@
+#   Title: business_calendar.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Business day and work hour calendar for whole ranges of months.
+#   Source: NumPy business days - https://numpy.org/doc/stable/reference/generated/numpy.busday_count.html
+
+
+# Import Statements
+import numpy as np
+
+HOURS_PER_DAY = 8  # Standard shift length
+
+# Workweeks as NumPy weekmasks (Monday first, 1 = working day)
+WORKWEEKS = {
+    "standard": "1111100",  # Monday-Friday
+    "six_day": "1111110",  # Monday-Saturday, e.g. during harvest
+    "tasting_room": "0011111",  # Wednesday-Sunday
+}
+
+
+# Reusable calendar for one site: a workweek plus its holidays
+class BusinessCalendar:
+    def __init__(self, weekmask=WORKWEEKS["standard"], holidays=(), hours_per_day=HOURS_PER_DAY):
+        self.hours_per_day = hours_per_day
+        self._calendar = np.busdaycalendar(
+            weekmask=WORKWEEKS.get(weekmask, weekmask),
+            holidays=np.asarray(holidays, dtype="datetime64[D]"))
+
+    # Business days in each month, computed in one vectorized pass
+    def business_days(self, months):
+        months = to_months(months)
+        return np.busday_count(months.astype("datetime64[D]"),
+                               (months + 1).astype("datetime64[D]"),
+                               busdaycal=self._calendar)
+
+    # Scheduled work hours in each month
+    def business_hours(self, months):
+        return self.business_days(months) * self.hours_per_day
+
+    # Business days between two dates, end exclusive
+    def business_days_between(self, start, end):
+        return np.busday_count(np.asarray(start, dtype="datetime64[D]"),
+                               np.asarray(end, dtype="datetime64[D]"),
+                               busdaycal=self._calendar)
+
+
+# Turn dates, 'YYYY-MM' / 'YYYY-MM-DD' strings or datetime64 values into month values
+def to_months(values):
+    values = np.asarray(values)
+    if values.dtype.kind in ("U", "S", "O"):
+        values = values.astype("datetime64[D]")  # Parses both month and day strings
+    return values.astype("datetime64[M]")
+
+
+# Every month from start to end, inclusive
+def month_range(start, end):
+    start, end = to_months([start, end])
+    return np.arange(start, end + 1, dtype="datetime64[M]")
+
+
+# Last calendar day of each month, as 'YYYY-MM-DD' strings
+def month_end_dates(months):
+    months = to_months(months)
+    return np.datetime_as_string((months + 1).astype("datetime64[D]") - 1)
+
+
+# Default calendar shared by the seed and load-test generators
+default_calendar = BusinessCalendar()
+
+
+def business_hours(months, calendar=None):
+    return (calendar or default_calendar).business_hours(months)
@@ -0,0 +1,55 @@
+#   Title: chart_data.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Columnar NumPy preparation of report rows for the charts.
+#   Source: numpy.fromiter - https://numpy.org/doc/stable/reference/generated/numpy.fromiter.html
+#   Source: numpy.add.at - https://numpy.org/doc/stable/reference/generated/numpy.ufunc.at.html
+
+
+# Import Statements
+import numpy as np
+
+
+# Read rows straight into one typed NumPy array per column
+def fetch_columns(rows, names, dtypes):
+    record_type = np.dtype(list(zip(names, dtypes)))
+    records = np.fromiter((tuple(row) for row in rows), dtype=record_type)
+    return {name: records[name] for name in names}
+
+
+# Unique values in order of first appearance, plus each row's position in them
+def _codes(values):
+    uniques, first_seen, inverse = np.unique(values, return_index=True, return_inverse=True)
+    order = np.argsort(first_seen, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return uniques[order], rank[inverse.ravel()]
+
+
+# Pivot (label, series..., value) rows into a labels x series matrix.
+# Rows keep the query's label order; missing label/series combinations are zero.
+def pivot(rows, series_columns=1, label_dtype="U32", series_dtype="U100", value_dtype="f8"):
+    names = ["label"] + [f"series_{i}" for i in range(series_columns)] + ["value"]
+    dtypes = [label_dtype] + [series_dtype] * series_columns + [value_dtype]
+    columns = fetch_columns(rows, names, dtypes)
+
+    # Multi-column series such as (distributor, wine type) become one "A - B" name
+    series_values = columns["series_0"]
+    for i in range(1, series_columns):
+        series_values = np.char.add(np.char.add(series_values, " - "), columns[f"series_{i}"])
+
+    labels, label_codes = _codes(columns["label"])
+    series, series_codes = _codes(series_values)
+
+    matrix = np.zeros((len(labels), len(series)), dtype=value_dtype)
+    np.add.at(matrix, (label_codes, series_codes), columns["value"])
+    return labels, series, matrix
+
+
+# Left edge of each series' bars and the tick position centered under each group
+def bar_offsets(label_count, series_count, group_width=0.8):
+    bar_width = group_width / max(series_count, 1)
+    x_indexes = np.arange(label_count)
+    offsets = x_indexes[:, None] + np.arange(series_count)[None, :] * bar_width
+    ticks = x_indexes + bar_width * (series_count - 1) / 2
+    return offsets, ticks, bar_width
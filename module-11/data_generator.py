@@ -0,0 +1,290 @@
+#   Title: data_generator.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Seeded synthetic winery data at configurable scale factors for load testing.
+#   Source: NumPy random Generator - https://numpy.org/doc/stable/reference/random/generator.html
+
+# Scale factor 1 is 10K sales (SF100 = 1M); the other tables grow alongside it.
+# Every table draws from its own random stream derived from the seed, so the same
+# seed gives the same rows however the tables are scheduled.
+
+# Usage: python data_generator.py --scale 10 --seed 42 --database winery_sf10
+
+
+# Import Statements
+import argparse
+import math
+import zlib  # for stable per-table seeds
+
+import numpy as np
+
+import mysql.connector  # to connect
+from db_config import pooled_connection, close_pools  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+from bulk_loader import bulk_insert, DEFAULT_CHUNK_SIZE  # Import shared bulk loader
+from business_calendar import month_range, month_end_dates, business_hours  # Import shared calendar
+from migrations import migrate  # Import schema migrations
+from schema import table_dependencies  # Import current table definitions
+from parallel_setup import run_in_levels, validate_foreign_keys  # Import dependency-ordered setup
+
+SALES_PER_SCALE = 10000  # Sales rows at scale factor 1
+SUPPLY_ORDERS_PER_SCALE = 500  # Supply orders at scale factor 1
+EMPLOYEES_PER_SCALE = 27  # Same headcount as the seed data at scale factor 1
+
+# Share of the year's sales in each month (January first); the holidays sell the most
+SEASONAL_WEIGHTS = np.array([0.06, 0.05, 0.06, 0.07, 0.08, 0.08,
+                             0.07, 0.07, 0.08, 0.10, 0.13, 0.15])
+
+# Lookup tables copied from the seed data
+WINE_TYPES = ["Merlot", "Cabernet", "Chablis", "Chardonnay"]
+GRAPE_VARIETIES = ["Cabernet Franc", "Sauvignon Blanc", "Chardonnay", "Pinot Noir"]
+SUPPLY_TYPES = ["Bottles", "Corks", "Labels", "Boxes", "Vats", "Tubing"]
+ORDER_STATUSES = ["Ordered", "Delivered", "Canceled"]
+ORDER_STATUS_WEIGHTS = [0.07, 0.90, 0.03]
+JOB_POSITIONS = [("Owner", "80000.00", "250000.00"), ("Manager", "50000.00", "100000.00"),
+                 ("Assistant", "35000.00", "55000.00"),
+                 ("Production Line Worker", "30000.00", "45000.00")]
+DEPARTMENTS = ["Operations", "Finance", "Marketing", "Production", "Distribution"]
+DEPARTMENT_WEIGHTS = [0.03, 0.05, 0.07, 0.80, 0.05]
+
+
+# Row counts for each table at a scale factor
+class Scale:
+    def __init__(self, scale_factor, start="2023-01", months=24):
+        self.scale_factor = scale_factor
+        self.months = month_range(start, np.datetime64(start, "M") + months - 1)
+        self.sales = int(SALES_PER_SCALE * scale_factor)
+        self.supply_orders = max(9, int(SUPPLY_ORDERS_PER_SCALE * scale_factor))
+        self.employees = max(len(DEPARTMENTS), int(EMPLOYEES_PER_SCALE * scale_factor))
+        growth = max(1, round(math.sqrt(scale_factor)))  # Dimensions grow slower than facts
+        self.suppliers = 3 * growth
+        self.distributors = 4 * growth
+        self.wines = len(WINE_TYPES) * growth
+
+
+# Generates every table's rows for one scale factor and seed
+class WineryDataGenerator:
+    def __init__(self, scale_factor=1, seed=42, start="2023-01", months=24,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        self.scale = Scale(scale_factor, start, months)
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    # Independent random stream per table
+    def _rng(self, table):
+        return np.random.default_rng([self.seed, zlib.crc32(table.encode())])
+
+    # Random dates within the given months, as 'YYYY-MM-DD' strings
+    def _dates_in_months(self, rng, months):
+        first = months.astype("datetime64[D]")
+        days = ((months + 1).astype("datetime64[D]") - first).astype(int)
+        return first + (rng.random(len(months)) * days).astype(int)
+
+    def winery(self):
+        yield (1, "Bacchus Winery", "555-867-5309", "bacchuswinery@gmail.com")
+
+    def supplier(self):
+        for i in range(1, self.scale.suppliers + 1):
+            yield (i, f"Supplier {i}", f"555-{100 + i % 900:03d}-{i % 10000:04d}", f"supplier{i}@example.com")
+
+    def distributor(self):
+        for i in range(1, self.scale.distributors + 1):
+            yield (i, f"Distributor {i}", f"555-{200 + i % 800:03d}-{i % 10000:04d}", f"distributor{i}@example.com")
+
+    def job_position(self):
+        for i, (name, salary_min, salary_max) in enumerate(JOB_POSITIONS, start=1):
+            yield (i, name, salary_min, salary_max)
+
+    # Department id of every employee, in employee id order (the first draw from rng)
+    def _employee_departments(self, rng):
+        return rng.choice(np.arange(1, len(DEPARTMENTS) + 1), size=self.scale.employees,
+                          p=DEPARTMENT_WEIGHTS)
+
+    def employee(self):
+        rng = self._rng("employee")
+        count = self.scale.employees
+        departments = self._employee_departments(rng)
+        positions = np.where(departments == 4, 4, rng.choice([2, 3], size=count, p=[0.3, 0.7]))
+        positions[:2] = 1  # The owners
+        for i in range(count):
+            yield (i + 1, f"First{i + 1}", f"Last{i + 1}", int(departments[i]), 1, int(positions[i]))
+
+    def department(self):
+        # Each department is managed by one of its employees (employee rows are 1-based)
+        rng = self._rng("department")
+        departments = self._employee_departments(self._rng("employee"))  # Same draw as employee()
+        employee_ids = np.arange(1, self.scale.employees + 1)
+        for i, name in enumerate(DEPARTMENTS, start=1):
+            staff = employee_ids[departments == i]
+            if not len(staff):
+                staff = employee_ids[:1]  # Nobody was drawn into it, so an owner manages it
+            yield (i, name, int(rng.choice(staff)))
+
+    def wine_type(self):
+        for i, name in enumerate(WINE_TYPES, start=1):
+            yield (i, name)
+
+    def grape_variety(self):
+        for i, name in enumerate(GRAPE_VARIETIES, start=1):
+            yield (i, name)
+
+    def wine_grape_variety(self):
+        for i in range(1, len(WINE_TYPES) + 1):
+            yield (i, i)
+
+    def wines(self):
+        rng = self._rng("wines")
+        for i in range(1, self.scale.wines + 1):
+            yield (i, int(rng.integers(2000, 5000)), f"{rng.uniform(15, 40):.2f}",
+                   int(rng.integers(2018, 2026)), 1, (i - 1) % len(WINE_TYPES) + 1)
+
+    def supply_type(self):
+        for i, name in enumerate(SUPPLY_TYPES, start=1):
+            yield (i, name)
+
+    def order_status(self):
+        for i, name in enumerate(ORDER_STATUSES, start=1):
+            yield (i, name)
+
+    def supply(self):
+        rng = self._rng("supply")
+        count = self.scale.supply_orders
+        suppliers = rng.integers(1, self.scale.suppliers + 1, size=count)
+
+        # Supplier reliability is skewed: most are usually on time, a few are often late
+        on_time_rate = rng.beta(5, 1.5, size=self.scale.suppliers + 1)
+        late = rng.random(count) > on_time_rate[suppliers]
+        delays = np.where(late, np.ceil(rng.lognormal(1.2, 0.8, size=count)), 0).astype(int)
+
+        order_dates = self._dates_in_months(rng, rng.choice(self.scale.months, size=count))
+        expected = order_dates + 4
+        delivered = expected + delays
+        for i in range(count):
+            yield (i + 1, str(order_dates[i]), str(expected[i]), str(delivered[i]), int(suppliers[i]), 1)
+
+    def supply_details(self):
+        rng = self._rng("supply_details")
+        # Each supplier ships a pair of supply types, as in the seed data
+        suppliers = self._rng("supply").integers(1, self.scale.suppliers + 1,
+                                                 size=self.scale.supply_orders)
+        for i, supplier_id in enumerate(suppliers, start=1):
+            first_type = 2 * ((int(supplier_id) - 1) % 3) + 1
+            quantities = rng.integers(1, 21, size=2) * 50
+            yield (i, first_type, int(quantities[0]))
+            yield (i, first_type + 1, int(quantities[1]))
+
+    def sales(self):
+        rng = self._rng("sales")
+        months = self.scale.months
+        weights = SEASONAL_WEIGHTS[months.astype(int) % 12]
+        weights = weights / weights.sum()
+
+        # A few large distributors take most of the volume
+        distributor_weights = 1 / np.arange(1, self.scale.distributors + 1) ** 1.1
+        distributor_weights /= distributor_weights.sum()
+
+        sale_id = 1
+        remaining = self.scale.sales
+        while remaining:
+            count = min(self.chunk_size, remaining)
+            dates = np.sort(self._dates_in_months(rng, rng.choice(months, size=count, p=weights)))
+            quantities = np.maximum(50, np.round(rng.lognormal(6.3, 0.5, size=count) / 50) * 50).astype(int)
+            wines = rng.integers(1, self.scale.wines + 1, size=count)
+            distributors = rng.choice(np.arange(1, self.scale.distributors + 1), size=count,
+                                      p=distributor_weights)
+            statuses = rng.choice([1, 2, 3], size=count, p=ORDER_STATUS_WEIGHTS)
+            for row in zip(range(sale_id, sale_id + count), quantities.tolist(),
+                           np.datetime_as_string(dates).tolist(), wines.tolist(),
+                           distributors.tolist(), statuses.tolist()):
+                yield row
+            sale_id += count
+            remaining -= count
+
+    def work_hours(self):
+        rng = self._rng("work_hours")
+        months = self.scale.months
+        default_hours = business_hours(months)
+        month_ends = month_end_dates(months)
+        employee_ids = np.arange(1, self.scale.employees + 1)
+
+        for month_end, hours in zip(month_ends.tolist(), default_hours.tolist()):
+            # Overtime and short months, like employee_exceptions in the seed data
+            exception = rng.random(len(employee_ids))
+            change = np.where(exception < 0.15, rng.integers(1, 5, size=len(employee_ids)) * 8,
+                              np.where(exception > 0.95, -rng.integers(1, 4, size=len(employee_ids)) * 8, 0))
+            for employee_id, worked in zip(employee_ids.tolist(), (hours + change).tolist()):
+                yield (employee_id, month_end, worked)
+
+    # Table name -> (columns, row generator)
+    def tables(self):
+        return {
+            "winery": (["winery_id", "winery_name", "winery_phone", "winery_email"], self.winery),
+            "supplier": (["supplier_id", "supplier_name", "supplier_phone", "supplier_email"], self.supplier),
+            "distributor": (["distributor_id", "distributor_name", "distributor_phone",
+                             "distributor_email"], self.distributor),
+            "job_position": (["position_id", "position_name", "salary_min", "salary_max"], self.job_position),
+            "employee": (["employee_id", "first_name", "last_name", "department_id",
+                          "winery_id", "position_id"], self.employee),
+            "department": (["department_id", "department_name", "manager_id"], self.department),
+            "wine_type": (["wine_type_id", "wine_type_name"], self.wine_type),
+            "grape_variety": (["grape_variety_id", "grape_variety_name"], self.grape_variety),
+            "wine_grape_variety": (["wine_type_id", "grape_variety_id"], self.wine_grape_variety),
+            "wines": (["wine_id", "inventory_quantity", "price_per_bottle", "vintage_year",
+                       "winery_id", "wine_type_id"], self.wines),
+            "supply_type": (["supply_type_id", "type_name"], self.supply_type),
+            "supply": (["supply_id", "order_date", "expected_date", "delivery_date",
+                        "supplier_id", "winery_id"], self.supply),
+            "supply_details": (["supply_id", "supply_type_id", "quantity"], self.supply_details),
+            "order_status": (["order_status_id", "status_name"], self.order_status),
+            "sales": (["sale_id", "quantity", "sale_date", "wine_id", "distributor_id",
+                       "order_status_id"], self.sales),
+            "work_hours": (["employee_id", "work_date", "hours_worked"], self.work_hours),
+        }
+
+
+# Create the schema in the target database and stream every table into it
+def load_synthetic(database, scale_factor=1, seed=42, start="2023-01", months=24,
+                   chunk_size=DEFAULT_CHUNK_SIZE, use_load_data=False):
+    generator = WineryDataGenerator(scale_factor, seed, start, months, chunk_size)
+
+    with pooled_connection() as conn:  # Borrow a warm connection from the pool
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+        cursor.close()
+    with pooled_connection(database) as conn:  # Borrow a warm connection from the pool
+        migrate(conn)
+
+    tables = generator.tables()
+
+    def load(conn, table_name):
+        columns, rows = tables[table_name]
+        total, elapsed = bulk_insert(conn, table_name, columns, rows(), chunk_size=chunk_size,
+                                     use_load_data=use_load_data, verbose=False)
+        print(f"Data inserted into '{table_name}': {total:,} rows in {elapsed:.1f}s.")
+
+    run_in_levels({name: load for name in tables}, table_dependencies(),
+                  database=database, defer_fk_checks=True)
+    validate_foreign_keys(database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load synthetic winery data for load testing.")
+    parser.add_argument("--scale", type=float, default=1, help="Scale factor (1 = 10K sales)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", default=None, help="Target database (default: winery_sf<scale>)")
+    parser.add_argument("--start", default="2023-01", help="First month of history")
+    parser.add_argument("--months", type=int, default=24, help="Months of history")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--load-data", action="store_true", help="Use LOAD DATA LOCAL INFILE")
+    args = parser.parse_args()
+
+    database = args.database or f"winery_sf{args.scale:g}".replace(".", "_")
+    try:
+        load_synthetic(database, args.scale, args.seed, args.start, args.months,
+                       args.chunk_size, args.load_data)
+        print(f"\nSynthetic data loaded into '{database}'.")
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+        logger.error(f"Synthetic data load failed: {err}")
+    finally:
+        close_pools()
@@ -2,40 +2,56 @@
 #   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
 #   Date: 02/23/2025
 #   Description: Bacchus Winery database initialization script.
-#   Source: Find Business Days - https://stackoverflow.com/questions/2224742/most-recent-previous-business-day-in-python
 #   Source: Print formatted table: https://stackoverflow.com/questions/48138015/printing-table-in-format-without-using-a-library-sqlite-3-python
 
 
 # Import Statements
 import mysql.connector  # to connect
 from mysql.connector import errorcode
-from db_config import connect_db  # Import shared db_config file
+from db_config import connect_db, pooled_connection, close_pools, query_stats  # Import shared db_config file
 from log_config import logger  # Import shared logging configuration
+from bulk_loader import bulk_insert, DEFAULT_CHUNK_SIZE  # Import shared bulk loader
+from business_calendar import business_hours  # Import shared business day calendar
+from migrations import migrate  # Import schema migrations
+from schema import table_dependencies  # Import current table definitions
+from parallel_setup import run_in_levels, validate_foreign_keys  # Import dependency-ordered setup
+import sys
 import traceback  # for detailed error diagnostics
 import dotenv  # to use .env file
 from dotenv import dotenv_values
-from datetime import datetime, date, timedelta  # Import date for date formatting
-from decimal import Decimal  # Import for decimal formatting
+from itertools import chain
+from table_renderer import render_table, readable_cell  # Import shared table output
+from table_dump import dump_tables  # Import parallel table dump
 
 
-# Drop and recreate the database
-def setup_database():
-    conn = connect_db()
-    cursor = conn.cursor()
+# Create the database if needed (reset=True drops it first and reloads everything)
+def setup_database(reset=False):
+    with pooled_connection() as conn:  # Borrow a warm connection from the pool
+        cursor = conn.cursor()
+
+        if reset:
+            cursor.execute("DROP DATABASE IF EXISTS winery")
+        cursor.execute("CREATE DATABASE IF NOT EXISTS winery")
+
+        conn.commit()  # Commit changes to the database
+        print("Database 'winery' is ready.")
 
-    cursor.execute("DROP DATABASE IF EXISTS winery")
-    cursor.execute("CREATE DATABASE winery")
 
-    conn.commit()  # Commit changes to the database
-    conn.close()  # Close the connection
-    print("Database 'winery' has been created.")
+# True once the seed data has been loaded
+def is_seeded():
+    with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM winery")
+        seeded = cursor.fetchone()[0] > 0
+        cursor.close()
+    return seeded
 
 
 try:
     # Try/catch block for handling potential MySQL database errors
 
-    # Connect to the winery database
-    db = connect_db(database="winery")  # Connect to database
+    # Connect to the MySQL server (the winery database may not exist yet)
+    db = connect_db()  # Connect to server
 
     # Output the connection status
     print("\n Successfully connected to the Winery MySQL database.")
@@ -43,198 +59,13 @@ try:
     # Open a new cursor for executing database queries.
     cursor = db.cursor()
 
-    # Create the tables
+    # Create the tables, or bring an existing database up to the current schema
     def create_tables():
-        conn = connect_db(database="winery")  # Connect to database
-        cursor = conn.cursor()
-
-        tables = {
-            # Stores winery information
-            "winery": """
-                CREATE TABLE winery (
-                    winery_id INT AUTO_INCREMENT PRIMARY KEY,
-                    winery_name VARCHAR(75) NOT NULL,
-                    winery_phone VARCHAR(20) NOT NULL,
-                    winery_email VARCHAR(100) NOT NULL UNIQUE
-                )
-            """,
-            # Stores supplier details
-            "supplier": """
-                CREATE TABLE supplier (
-                    supplier_id INT AUTO_INCREMENT PRIMARY KEY,
-                    supplier_name VARCHAR(75) NOT NULL,
-                    supplier_phone VARCHAR(20) NOT NULL,
-                    supplier_email VARCHAR(100) NOT NULL UNIQUE
-                )
-            """,
-            # Stores distributor details
-            "distributor": """
-                CREATE TABLE distributor (
-                    distributor_id INT AUTO_INCREMENT PRIMARY KEY,
-                    distributor_name VARCHAR(75) NOT NULL,
-                    distributor_phone VARCHAR(20) NOT NULL,
-                    distributor_email VARCHAR(100) NOT NULL UNIQUE
-                )
-            """,
-            # Stores job positions
-            "job_position": """
-                CREATE TABLE job_position (
-                    position_id INT AUTO_INCREMENT PRIMARY KEY,
-                    position_name VARCHAR(75) UNIQUE NOT NULL,
-                    salary_min DECIMAL(10,2) NOT NULL,
-                    salary_max DECIMAL(10,2) NOT NULL
-                )
-            """,
-            # Stores employees first so department can reference it
-            "employee": """
-                CREATE TABLE employee (
-                    employee_id INT AUTO_INCREMENT PRIMARY KEY,
-                    first_name VARCHAR(75) NOT NULL,
-                    last_name VARCHAR(75) NOT NULL,
-                    department_id INT NULL,
-                    winery_id INT NOT NULL,
-                    position_id INT NOT NULL,
-                    CONSTRAINT fk_employee_winery FOREIGN KEY (winery_id) 
-                        REFERENCES winery(winery_id),
-                    CONSTRAINT fk_employee_job_position FOREIGN KEY (position_id) 
-                        REFERENCES job_position(position_id)
-                )
-            """,
-            # Stores department details and allows manager id to be null initially
-            "department": """
-                CREATE TABLE department (
-                    department_id INT AUTO_INCREMENT PRIMARY KEY,
-                    department_name VARCHAR(75) UNIQUE NOT NULL,
-                    manager_id INT NULL,
-                    CONSTRAINT fk_department_employee FOREIGN KEY (manager_id) 
-                        REFERENCES employee(employee_id) ON DELETE SET NULL
-                )
-            """,
-            # Stores different types of wine
-            "wine_type": """
-                CREATE TABLE wine_type (
-                    wine_type_id INT AUTO_INCREMENT PRIMARY KEY,
-                    wine_type_name VARCHAR(75) UNIQUE NOT NULL
-                )
-            """,
-            # Stores different grape varieties
-            "grape_variety": """
-                CREATE TABLE grape_variety (
-                    grape_variety_id INT AUTO_INCREMENT PRIMARY KEY,
-                    grape_variety_name VARCHAR(75) UNIQUE NOT NULL
-                )
-            """,
-            # Links wine types to grape varieties
-            "wine_grape_variety": """
-                CREATE TABLE wine_grape_variety (
-                    wine_type_id INT NOT NULL,
-                    grape_variety_id INT NOT NULL,
-                    PRIMARY KEY (wine_type_id, grape_variety_id),
-                    CONSTRAINT fk_wine_grape_variety_wine_type FOREIGN KEY (wine_type_id) 
-                        REFERENCES wine_type(wine_type_id),
-                    CONSTRAINT fk_wine_grape_variety_grape_variety FOREIGN KEY (grape_variety_id) 
-                        REFERENCES grape_variety(grape_variety_id)
-                )
-            """,
-            # Stores information about different wines
-            "wines": """
-                CREATE TABLE wines (
-                    wine_id INT AUTO_INCREMENT PRIMARY KEY,
-                    inventory_quantity INT NOT NULL,
-                    price_per_bottle DECIMAL(10,2) NOT NULL,
-                    vintage_year YEAR NOT NULL,
-                    winery_id INT NOT NULL,
-                    wine_type_id INT NOT NULL,
-                    CONSTRAINT fk_wines_winery FOREIGN KEY(winery_id) 
-                        REFERENCES winery(winery_id),
-                    CONSTRAINT fk_wines_wine_type FOREIGN KEY(wine_type_id) 
-                        REFERENCES wine_type(wine_type_id)
-                )
-            """,
-            # Stores supply orders
-            "supply_type": """
-                CREATE TABLE supply_type (
-                supply_type_id INT AUTO_INCREMENT PRIMARY KEY,
-                type_name VARCHAR(75) NOT NULL UNIQUE
-                )
-            """,
-            # Stores supply orders
-            "supply": """
-                CREATE TABLE supply (
-                    supply_id INT AUTO_INCREMENT PRIMARY KEY,
-                    order_date DATE NOT NULL,
-                    expected_date DATE NOT NULL,
-                    delivery_date DATE NOT NULL,
-                    supplier_id INT NOT NULL,
-                    winery_id INT NOT NULL,
-                    CONSTRAINT fk_supply_winery FOREIGN KEY(winery_id) 
-                        REFERENCES winery(winery_id),
-                    CONSTRAINT fk_supply_supplier FOREIGN KEY(supplier_id) 
-                        REFERENCES supplier(supplier_id)
-                )
-            """,
-            # Stores details of each supply order
-            "supply_details": """
-                CREATE TABLE supply_details (
-                    supply_id INT NOT NULL,
-                    supply_type_id INT NOT NULL,
-                    quantity INT NOT NULL,
-                    PRIMARY KEY (supply_id, supply_type_id),
-                    CONSTRAINT fk_supply_details_supply FOREIGN KEY (supply_id) 
-                        REFERENCES supply(supply_id),
-                    CONSTRAINT fk_supply_details_supply_type FOREIGN KEY (supply_type_id) 
-                        REFERENCES supply_type(supply_type_id)
-                )
-            """,
-            # Stores different order statuses (Ordered, Delivered, Canceled)
-            "order_status": """
-                CREATE TABLE order_status (
-                order_status_id INT AUTO_INCREMENT PRIMARY KEY,
-                status_name VARCHAR(50) UNIQUE NOT NULL
-                )
-            """,
-            # Stores sales transactions
-            "sales": """
-                CREATE TABLE sales (
-                    sale_id INT AUTO_INCREMENT PRIMARY KEY,
-                    quantity INT NOT NULL,
-                    sale_date DATE NOT NULL,
-                    wine_id INT NOT NULL,
-                    distributor_id INT NOT NULL,
-                    order_status_id INT NOT NULL,
-                    CONSTRAINT fk_sales_wines FOREIGN KEY(wine_id) 
-                        REFERENCES wines(wine_id),
-                    CONSTRAINT fk_sales_distributor FOREIGN KEY(distributor_id) 
-                        REFERENCES distributor(distributor_id),
-                    CONSTRAINT fk_sales_order_status FOREIGN KEY(order_status_id) 
-                        REFERENCES order_status(order_status_id)
-                )
-            """,
-            # Stores employee work hours
-            "work_hours": """
-                CREATE TABLE work_hours (
-                    work_id INT AUTO_INCREMENT PRIMARY KEY,
-                    work_date DATE NOT NULL,
-                    hours_worked INT NOT NULL,
-                    employee_id INT NOT NULL,
-                    CONSTRAINT fk_work_hours_employee FOREIGN KEY(employee_id) 
-                        REFERENCES employee(employee_id)
-                )
-            """
-        }
-
-        # Iterate through the table and execute each query
-        for table_name, query in tables.items():
-            cursor.execute(query)
-            print(f"Table '{table_name}' created.")
-
-        conn.commit()  # Commit changes to the database
-        conn.close()  # Close the connection
-
-    def insert_data():
-        conn = connect_db(database="winery")  # Connect to database
-        cursor = conn.cursor()
+        with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+            # Apply any schema migrations this database is missing
+            migrate(conn)
 
+    def insert_data(chunk_size=DEFAULT_CHUNK_SIZE, use_load_data=False, defer_fk_checks=True):
         # Define total employees
         employee_ids = list(range(1, 28))  # Employee IDs from 1 to 27
 
@@ -281,29 +112,17 @@ try:
             }
         }
 
-        # Function to count business days for each month
-        def count_business_days(year, month):
-            first_day = date(year, month, 1)
-            last_day = date(year, month, 28)  # Start with 28th
-            while last_day.month == month:  # Find the last day of the month
-                last_day += timedelta(days=1)
-            last_day -= timedelta(days=1)  # Adjust to last valid date
-
-            business_days = sum(1 for day in range((last_day - first_day).days + 1)
-                                if (first_day + timedelta(days=day)).weekday() < 5)  # Monday-Friday only
-            return business_days * 8  # Convert to work hours
-
-        # Generate SQL statements
-        sql_statements = []
-        for date_str in employee_exceptions:
-            year, month, _ = map(int, date_str.split('-'))
-            default_hours = count_business_days(
-                year, month)  # Business days * 8 hours
-
-            for emp_id in employee_ids:
-                hours = employee_exceptions[date_str].get(
-                    emp_id, default_hours)  # Use exceptions or default hours
-                sql_statements.append(f"({emp_id}, '{date_str}', {hours})")
+        # Business days * 8 hours for every month, computed in one pass
+        default_hours = dict(zip(employee_exceptions, business_hours(
+            list(employee_exceptions)).tolist()))
+
+        # Generate work hour rows lazily so they can be streamed in chunks
+        def generate_work_hours():
+            for date_str in employee_exceptions:
+                for emp_id in employee_ids:
+                    hours = employee_exceptions[date_str].get(
+                        emp_id, default_hours[date_str])  # Use exceptions or default hours
+                    yield (emp_id, date_str, hours)
 
         data = {
             # Insert winery
@@ -456,78 +275,94 @@ try:
                 ('1000', '2025-01-20', 2, 1, 1),
                 ('1200', '2025-01-20', 2, 2, 2),
                 ('800', '2025-01-20', 2, 3, 3),
-                ('1200', '2025-01-20', 2, 4, 4)""",
-            # Insert Work Hours
-            "work_hours": "INSERT INTO work_hours (employee_id, work_date, hours_worked) VALUES " + ",\n".join(sql_statements) + ";"
+                ('1200', '2025-01-20', 2, 4, 4)"""
         }
 
-        for table_name, query in data.items():
-            cursor.execute(query)
+        # Run one insert statement on a worker's pooled connection
+        def load_statement(conn, table_name):
+            cursor = conn.cursor()
+            cursor.execute(data[table_name])
+            cursor.close()
             print(f"Data inserted into '{table_name}'.")
 
-        conn.commit()  # Commit changes to the database
-        conn.close()  # Close the connection
-
-    def display_data():
-        conn = connect_db(database="winery")  # Connect to database
-        cursor = conn.cursor()
+        # Insert Work Hours in parameterized chunks
+        def load_work_hours(conn, table_name):
+            bulk_insert(conn, "work_hours", ["employee_id", "work_date", "hours_worked"],
+                        generate_work_hours(), chunk_size=chunk_size,
+                        use_load_data=use_load_data)
+            print("Data inserted into 'work_hours'.")
+
+        tasks = {table_name: load_statement for table_name in data}
+        tasks["work_hours"] = load_work_hours
+
+        # Load order comes from the foreign keys; independent tables load in parallel
+        dependencies = table_dependencies()
+        dependencies["update_department_managers"] = {"department", "employee"}
+        run_in_levels(tasks, dependencies, defer_fk_checks=defer_fk_checks)
+
+        # Re-check every foreign key skipped while loading
+        if defer_fk_checks:
+            validate_foreign_keys()
+
+    def display_data(fmt="text", batch_size=DEFAULT_CHUNK_SIZE):
+        with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+            tables = ["winery", "department", "job_position", "work_hours", "employee", "supplier", "supply_type", "supply_details", "supply",
+                      "wine_type", "wine_grape_variety", "grape_variety", "wines", "order_status", "distributor", "sales",
+                      "sales_monthly_rollup", "work_hours_quarterly"]
+
+            for table in tables:
+                # Table header
+                print(f"\n-- DISPLAYING {table.upper()} RECORDS --")
+
+                cursor = conn.cursor(buffered=False)  # Unbuffered: rows stream in batches
+                try:
+                    query = f"SELECT * FROM {table}"
+                    cursor.execute(query)  # Execute the select query
+                    column_names = [desc[0] for desc in cursor.description]
+
+                    def table_rows():
+                        while True:
+                            batch = cursor.fetchmany(batch_size)
+                            if not batch:
+                                break
+                            yield from batch
+
+                    rows = table_rows()
+                    first = next(rows, None)
+                    if first is not None:
+                        # Shared renderer formats each cell once (NULL, dates, decimals)
+                        render_table(column_names, chain([first], rows), fmt=fmt,
+                                     format_cell=readable_cell, border=True)
+                        print()
+                    else:
+                        print(f"Table '{table}' is empty.")
+
+                except mysql.connector.Error as err:
+                    print(f"[ERROR] Failed to retrieve data from '{table}': {err}")
+                finally:
+                    if conn.unread_result:
+                        conn.consume_results()
+                    cursor.close()
 
-        tables = ["winery", "department", "job_position", "work_hours", "employee", "supplier", "supply_type", "supply_details", "supply",
-                  "wine_type", "wine_grape_variety", "grape_variety", "wines", "order_status", "distributor", "sales"]
-
-        for table in tables:
-            # Table header
-            print(f"\n-- DISPLAYING {table.upper()} RECORDS --")
-
-            try:
-                query = f"SELECT * FROM {table}"
-                cursor.execute(query)  # Execute the insert query
-                rows = cursor.fetchall()
-                column_names = [desc[0] for desc in cursor.description]
-
-                if rows:
-                    # Determine column widths
-                    col_widths = [max(len(str(col)), max(
-                        len(str(row[i])) for row in rows)) for i, col in enumerate(column_names)]
-
-                    # Print table header
-                    header = " | ".join(
-                        f"{col_name:<{col_widths[i]}}" for i, col_name in enumerate(column_names))
-                    print("-" * len(header))
-                    print(header)
-                    print("-" * len(header))
-
-                    for row in rows:
-                        # Convert date fields to a readable format
-                        formatted_row = [
-                            f"{field.strftime('%Y-%m-%d')}" if isinstance(field, date) else
-                            f"{field.strftime('%Y-%m-%d %H:%M:%S')}" if isinstance(field, datetime) else
-                            f"{field:,.2f}" if isinstance(field, Decimal) else
-                            "NULL" if field is None else str(field)
-                            for field in row
-                        ]
-
-                        print(" | ".join(
-                            f"{field:<{col_widths[i]}}" for i, field in enumerate(formatted_row)))
-                    print()
-                else:
-                    print(f"Table '{table}' is empty.")
-
-            except mysql.connector.Error as err:
-                print(f"[ERROR] Failed to retrieve data from '{table}': {err}")
-
-        conn.close()  # Close the connection
 
     # Run database setup
     if __name__ == "__main__":
-        setup_database()
+        reset = "--reset" in sys.argv  # Old behavior: drop everything and reload
+        setup_database(reset=reset)
         create_tables()
-        insert_data()
+        if reset or not is_seeded():
+            insert_data()
 
         print("\nThe Winery database setup is now complete!")
 
-        # Call display_data()
-        display_data()
+        if "--dump" in sys.argv:
+            # Parallel, snapshot-consistent dump to compressed files instead of printing
+            dump_args = sys.argv[sys.argv.index("--dump") + 1:]
+            out_dir = dump_args[0] if dump_args and not dump_args[0].startswith("--") else "winery_dump"
+            dump_tables(out_dir)
+        else:
+            # Call display_data()
+            display_data()
 
   # Close the cursor.
     cursor.close()
@@ -546,12 +381,14 @@ except mysql.connector.Error as err:
         error_message = f"General MySQL Error: {err}"
 
     print(error_message)  # Prints the error for immediate feedback.
-    logging.error(error_message)  # Logs the error message.
+    logger.error(error_message)  # Logs the error message.
     # Logs the full traceback for debugging.
-    logging.error(traceback.format_exc())
+    logger.error(traceback.format_exc())
 
 finally:
     # Close the connection to MySQL
     if 'db' in locals() and db.is_connected():
         db.close()
         print("Connection closed safely.")
+    close_pools()  # Close the warm connections left in the pool
+    query_stats.log_summary()  # Busiest setup statements to query_log.txt
@@ -2,19 +2,295 @@
 #    Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
 #    Date: 02/23/2025
 #    Description: Database connection shared file.
+#    Source: Connection pooling - https://dev.mysql.com/doc/connector-python/en/connector-python-connection-pooling.html
+
+import threading  # to guard the pool between report workers
+import time  # for idle timeouts
+from contextlib import contextmanager
 
 import mysql.connector
+from mysql.connector import errorcode
 from dotenv import dotenv_values
+from query_metrics import QueryStats, InstrumentedConnection  # Per-statement timing
+from log_config import logger  # Import shared logging configuration
 
 # Load secrets
 secrets = dotenv_values("C:\\csd\\csd-310\\module-10\\.env")
 
+# Pool settings (can be overridden in the .env file)
+POOL_SIZE = int(secrets.get("POOL_SIZE") or 5)  # Max open connections per database
+POOL_IDLE_TIMEOUT = float(secrets.get("POOL_IDLE_TIMEOUT") or 300)  # Seconds before an idle connection is closed
+POOL_ACQUIRE_TIMEOUT = float(secrets.get("POOL_ACQUIRE_TIMEOUT") or 30)  # Seconds to wait for a free connection
+
+# Statement metrics (QUERY_METRICS=0 in the .env file turns the cursor wrapper off)
+QUERY_METRICS = secrets.get("QUERY_METRICS") != "0"
+SLOW_QUERY_SECONDS = float(secrets.get("SLOW_QUERY_SECONDS") or 1.0)  # Statements this slow are logged
+query_stats = QueryStats(slow_threshold=SLOW_QUERY_SECONDS)
+
+# Read replicas (REPLICA_HOSTS=replica1,replica2:3307 in the .env file). HOST is the
+# primary: writes and anything not asking for a read-only connection go there.
+REPLICA_HOSTS = [host.strip() for host in (secrets.get("REPLICA_HOSTS") or "").split(",") if host.strip()]
+REPLICA_SELECTION = secrets.get("REPLICA_SELECTION") or "least_loaded"  # or round_robin
+REPLICA_MAX_LAG = float(secrets.get("REPLICA_MAX_LAG") or 10)  # Seconds_Behind_Source past this skips a replica
+REPLICA_CHECK_INTERVAL = float(secrets.get("REPLICA_CHECK_INTERVAL") or 5)  # Seconds a lag reading is trusted
+
+# Errors that mean the server dropped the connection, so it can't go back in the pool
+CONNECTION_LOST_ERRORS = (errorcode.CR_SERVER_GONE_ERROR,
+                          errorcode.CR_SERVER_LOST)
+
+
+# (host, port) for "host" or "host:port"; None means the primary
+def server_address(host=None):
+    name, _, port = (host or secrets["HOST"]).partition(":")
+    return name, int(port) if port else 3306
 
-# Database config object
-def connect_db(database=None):
-    return mysql.connector.connect(
+
+# Database config object (host=None connects to the primary)
+def connect_db(database=None, host=None):
+    host, port = server_address(host)
+    conn = mysql.connector.connect(
         user=secrets["USER"],
         password=secrets["PASSWORD"],
-        host=secrets["HOST"],
-        database=database if database else None
+        host=host,
+        port=port,
+        database=database if database else None,
+        allow_local_infile=secrets.get("LOCAL_INFILE") == "1"  # Opt-in for bulk_loader's LOAD DATA path
     )
+    return InstrumentedConnection(conn, query_stats) if QUERY_METRICS else conn
+
+
+# Bounded pool of warm connections to one database on one server
+class ConnectionPool:
+    def __init__(self, database=None, max_size=POOL_SIZE,
+                 idle_timeout=POOL_IDLE_TIMEOUT, acquire_timeout=POOL_ACQUIRE_TIMEOUT, host=None):
+        self.database = database
+        self.host = host  # None for the primary
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = []  # (connection, last used time) pairs ready for checkout
+        self._open = 0  # Connections currently open, idle or checked out
+        self._cond = threading.Condition()
+
+    # Close a connection without letting a dead socket raise
+    def _close(self, conn):
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+    # Make sure a connection still talks to the server, reconnecting if it went away
+    def _check(self, conn):
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    # Close idle connections past the idle timeout (call with the lock held)
+    def _prune(self):
+        now = time.monotonic()
+        stale = [conn for conn, last_used in self._idle
+                 if now - last_used > self.idle_timeout]
+        self._idle = [(conn, last_used) for conn, last_used in self._idle
+                      if now - last_used <= self.idle_timeout]
+        self._open -= len(stale)
+        return stale
+
+    # Check out a connection, opening a new one if the pool has room
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+
+        with self._cond:
+            while True:
+                stale = self._prune()
+                if self._idle:
+                    conn, _ = self._idle.pop()  # Most recently used is the warmest
+                    break
+                if self._open < self.max_size:
+                    conn = None  # Reserve a slot and connect outside the lock
+                    self._open += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise mysql.connector.errors.PoolError(
+                        f"No free connection to '{self.database}' on {self.host or 'the primary'} "
+                        f"after {self.acquire_timeout}s "
+                        f"(pool size {self.max_size})")
+                self._cond.wait(remaining)
+
+        for old in stale:
+            self._close(old)
+
+        try:
+            if conn is not None and self._check(conn):
+                return conn
+            if conn is not None:
+                self._close(conn)
+            return connect_db(database=self.database, host=self.host)
+        except BaseException:
+            self._forget()
+            raise
+
+    # Connections currently checked out
+    @property
+    def in_use(self):
+        with self._cond:
+            return self._open - len(self._idle)
+
+    # Give up a reserved slot, e.g. after a failed connect
+    def _forget(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    # Return a connection to the pool, or close it if it is broken
+    def release(self, conn, discard=False):
+        if not discard:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()  # Never hand out someone else's open transaction
+            except mysql.connector.Error:
+                discard = True
+
+        if discard:
+            self._close(conn)
+            self._forget()
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    # Context manager that checks a connection out and always puts it back
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except mysql.connector.Error as err:
+            discard = err.errno in CONNECTION_LOST_ERRORS
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    # Close every idle connection (checked out ones are closed on release)
+    def close(self):
+        with self._cond:
+            idle = self._idle
+            self._idle = []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+
+
+# One pool per database name and server
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database=None, host=None):
+    with _pools_lock:
+        if (database, host) not in _pools:
+            _pools[(database, host)] = ConnectionPool(database=database, host=host)
+        return _pools[(database, host)]
+
+
+# Picks the replica for each read-only session, skipping replicas that are
+# down or further behind the primary than max_lag
+class ReplicaRouter:
+    def __init__(self, hosts, selection=REPLICA_SELECTION, max_lag=REPLICA_MAX_LAG,
+                 check_interval=REPLICA_CHECK_INTERVAL):
+        if selection not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Unknown replica selection '{selection}' (expected least_loaded or round_robin)")
+        self.hosts = list(hosts)
+        self.selection = selection
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self._lag = {}  # host -> (checked at, seconds behind or None when unusable)
+        self._turn = 0  # Round-robin position
+        self._lock = threading.Lock()
+
+    # Seconds the replica is behind its source, or None if replication isn't running
+    def read_lag(self, host):
+        with get_pool(None, host).connection() as conn:  # Borrow a warm connection from the pool
+            cursor = conn.cursor(dictionary=True)
+            try:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                    column = "Seconds_Behind_Source"
+                except mysql.connector.Error as err:
+                    if err.errno != errorcode.ER_PARSE_ERROR:
+                        raise
+                    cursor.execute("SHOW SLAVE STATUS")  # Servers older than 8.0.22
+                    column = "Seconds_Behind_Master"
+                status = cursor.fetchall()
+            finally:
+                cursor.close()
+        return status[0][column] if status else None
+
+    # Lag per host, re-read once a reading is older than check_interval
+    def lag(self, host):
+        now = time.monotonic()
+        with self._lock:
+            checked = self._lag.get(host)
+        if checked and now - checked[0] < self.check_interval:
+            return checked[1]
+
+        try:
+            seconds = self.read_lag(host)
+            if seconds is None:
+                logger.warning(f"Replica {host} is not replicating; reads go elsewhere.")
+        except mysql.connector.Error as err:
+            logger.warning(f"Replica {host} is unavailable ({err}); reads go elsewhere.")
+            seconds = None
+        with self._lock:
+            self._lag[host] = (now, seconds)
+        return seconds
+
+    def healthy(self):
+        healthy = []
+        for host in self.hosts:
+            seconds = self.lag(host)
+            if seconds is not None and seconds <= self.max_lag:
+                healthy.append(host)
+        return healthy
+
+    # Replica host for the next read-only session, or None for the primary.
+    # load(host) gives a host's busy connections (the sync pools' by default).
+    def choose(self, database=None, load=None):
+        if not self.hosts:
+            return None
+        hosts = self.healthy()
+        if not hosts:
+            return None  # No replica is close enough; the primary serves the reads
+
+        with self._lock:
+            start = self._turn % len(hosts)
+            self._turn += 1
+        ordered = hosts[start:] + hosts[:start]  # Rotate so ties spread over the replicas
+        if self.selection == "round_robin":
+            return ordered[0]
+        load = load or (lambda host: get_pool(database, host).in_use)
+        return min(ordered, key=load)
+
+
+replicas = ReplicaRouter(REPLICA_HOSTS)
+
+
+# Shortcut for "with pooled_connection('winery') as conn:". read_only=True sessions
+# go to a replica when one is healthy; everything else goes to the primary.
+def pooled_connection(database=None, read_only=False):
+    host = replicas.choose(database) if read_only else None
+    return get_pool(database, host).connection()
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
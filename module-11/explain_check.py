@@ -0,0 +1,147 @@
+#   Title: explain_check.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Fails if any report query falls back to a full table or index scan.
+#   Source: EXPLAIN output - https://dev.mysql.com/doc/refman/8.0/en/explain-output.html
+
+# Run against a database seeded at a realistic scale: on the 24-row seed data the
+# optimizer may prefer a table scan simply because the tables are tiny.
+
+
+# With --pruning it instead checks that the date-range report variants only read
+# the partitions for the period they ask for (after partitions.py enable).
+
+# Usage: python explain_check.py [--pruning]
+
+
+# Import Statements
+import re
+import sys
+from datetime import date
+
+import mysql.connector  # to connect
+from db_config import pooled_connection, close_pools  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+from report_sql import REPORT_QUERIES, PREPARED_REPORTS  # Import shared report SQL
+
+# Large tables that must always be read through an index
+FACT_TABLES = {"sales", "work_hours", "supply"}
+
+# Access types that read every row: a table scan, or a scan of a whole (covering) index
+FULL_SCAN_TYPES = {"ALL", "index"}
+
+# Reports that list the whole history on purpose (no WHERE clause), so reading every
+# row is expected; their date-range variants are checked by --pruning instead
+FULL_HISTORY_REPORTS = {"supplier_delivery", "supplier_trends", "wine_performance"}
+
+# "FROM supply s" / "JOIN supplier AS sup": the table and its optional alias
+TABLE_ALIAS_PATTERN = re.compile(
+    r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?`?(?!(?:ON|USING|WHERE|GROUP|ORDER|HAVING|LIMIT"
+    r"|JOIN|INNER|LEFT|RIGHT|CROSS|NATURAL|STRAIGHT_JOIN|UNION|WINDOW|PARTITION|USE|FORCE|IGNORE)\b)(\w+)`?)?",
+    re.IGNORECASE)
+
+
+# EXPLAIN names each step by its alias (s, wh, sup); map aliases back to base tables
+def table_aliases(query):
+    aliases = {}
+    for table, alias in TABLE_ALIAS_PATTERN.findall(query):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+# Return (report, table, access type, key, estimated rows) for every full scan of a fact table
+def find_full_scans(conn, queries=REPORT_QUERIES, allowed=FULL_HISTORY_REPORTS):
+    cursor = conn.cursor(dictionary=True)
+    full_scans = []
+
+    for report_name, query in queries.items():
+        if report_name in allowed:
+            continue
+        aliases = table_aliases(query)
+        cursor.execute("EXPLAIN " + query.strip().rstrip(";"))
+        for step in cursor.fetchall():
+            table = aliases.get(step["table"], step["table"])
+            if table in FACT_TABLES and step["type"] in FULL_SCAN_TYPES:
+                full_scans.append((report_name, table, step["type"], step["key"], step["rows"]))
+
+    cursor.close()
+    return full_scans
+
+
+# Partitioned fact table -> partitions one query reads
+def partitions_read(conn, query, params=()):
+    aliases = table_aliases(query)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + query.strip().rstrip(";"), params)
+    read = {aliases.get(step["table"], step["table"]): (step["partitions"] or "").split(",")
+            for step in cursor.fetchall()
+            if aliases.get(step["table"], step["table"]) in FACT_TABLES and step.get("partitions")}
+    cursor.close()
+    return read
+
+
+# Return (report, table, partitions) for each range variant that reads more than the
+# partitions of the last full quarter
+def find_unpruned(conn, statements=PREPARED_REPORTS):
+    today = date.today()
+    quarter_start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    start = date(quarter_start.year - (quarter_start.month == 1), (quarter_start.month - 4) % 12 + 1, 1)
+    unpruned = []
+
+    for report_name, query in statements.items():
+        if report_name.endswith("_between"):
+            params = (start, quarter_start)
+        elif "_for_" in report_name:
+            params = (1, start, quarter_start)
+        else:
+            continue
+        for table, partitions in partitions_read(conn, query, params).items():
+            if len(partitions) > 3:
+                unpruned.append((report_name, table, partitions))
+    return unpruned
+
+
+def check_pruning():
+    try:
+        with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+            unpruned = find_unpruned(conn)
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+        logger.error(f"Partition pruning check failed: {err}")
+        sys.exit(2)
+    finally:
+        close_pools()
+
+    for report_name, table, partitions in unpruned:
+        print(f"[FAIL] {report_name}: reads {len(partitions)} partitions of '{table}' "
+              f"({', '.join(partitions[:5])}{', ...' if len(partitions) > 5 else ''})")
+    if unpruned:
+        sys.exit(1)
+    print("Every date-range report reads only the partitions for its period.")
+
+
+if __name__ == "__main__" and "--pruning" in sys.argv:
+    check_pruning()
+
+elif __name__ == "__main__":
+    try:
+        with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+            full_scans = find_full_scans(conn)
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+        logger.error(f"EXPLAIN check failed: {err}")
+        sys.exit(2)
+    finally:
+        close_pools()
+
+    for report_name, table, access_type, key, rows in full_scans:
+        print(f"[FAIL] {report_name}: full scan of '{table}' "
+              f"(type={access_type}, key={key}, rows~{rows})")
+
+    if full_scans:
+        sys.exit(1)
+    print(f"All {len(REPORT_QUERIES) - len(FULL_HISTORY_REPORTS)} filtered report queries read the "
+          f"fact tables through bounded index lookups ({', '.join(sorted(FULL_HISTORY_REPORTS))} "
+          f"list the full history and are not checked).")
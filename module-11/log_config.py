@@ -2,16 +2,151 @@
 #    Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
 #    Date: 02/23/2025
 #    Description: Logging connection shared file.
+#    Source: QueueHandler - https://docs.python.org/3/library/logging.handlers.html#queuehandler
 
+# Callers only put records on a queue; a background listener thread formats them
+# and does the file I/O. Settings come from the .env file db_config reads:
+#   LOG_LEVEL (ERROR), LOG_FORMAT (text or json), LOG_MAX_BYTES (5 MB),
+#   LOG_BACKUP_COUNT (5), LOG_ROTATE_WHEN (e.g. "midnight", size rotation if unset),
+#   LOG_SAMPLE_WINDOW (60 s) and LOG_SAMPLE_BURST (5 identical messages per window).
+
+import atexit  # to flush the queue on exit
+import json
 import logging  # for logging errors
+import logging.handlers
+import queue
+import threading
+import time
+
+from dotenv import dotenv_values
+
+# Load settings (same .env file as db_config, which imports this module)
+secrets = dotenv_values("C:\\csd\\csd-310\\module-10\\.env")
 
 # Configure Logging
 LOG_FILE = "error_log.txt"
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.ERROR,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+QUERY_LOG_FILE = "query_log.txt"  # Slow queries and metric dumps
+LOG_LEVEL = (secrets.get("LOG_LEVEL") or "ERROR").upper()
+LOG_FORMAT = (secrets.get("LOG_FORMAT") or "text").lower()
+LOG_MAX_BYTES = int(secrets.get("LOG_MAX_BYTES") or 5 * 1024 * 1024)
+LOG_BACKUP_COUNT = int(secrets.get("LOG_BACKUP_COUNT") or 5)
+LOG_ROTATE_WHEN = secrets.get("LOG_ROTATE_WHEN")
+LOG_SAMPLE_WINDOW = float(secrets.get("LOG_SAMPLE_WINDOW") or 60)
+LOG_SAMPLE_BURST = int(secrets.get("LOG_SAMPLE_BURST") or 5)
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+# One JSON object per line
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+# Let the first few identical messages in a window through, drop the rest and
+# report how many were dropped on the next one that passes
+class RepeatSampler(logging.Filter):
+    def __init__(self, window=LOG_SAMPLE_WINDOW, burst=LOG_SAMPLE_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self._seen = {}  # (logger, level, message) -> [window start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is None or now - seen[0] > self.window:
+                suppressed = seen[2] if seen else 0
+                self._seen[key] = [now, 1, 0]
+                if len(self._seen) > 10000:
+                    self._prune(now)
+                if suppressed:
+                    record.suppressed = suppressed
+                    record.msg = f"{record.getMessage()} ({suppressed} identical messages suppressed)"
+                    record.args = None
+                return True
+            seen[1] += 1
+            if seen[1] <= self.burst:
+                return True
+            seen[2] += 1
+            return False
+
+    # Forget windows that have ended (call with the lock held)
+    def _prune(self, now):
+        for key in [key for key, seen in self._seen.items() if now - seen[0] > self.window]:
+            del self._seen[key]
+
+
+# Queue handler that leaves formatting to the listener thread: it only resolves
+# the message arguments, so the caller pays for a queue put and nothing else
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _file_handler(path):
+    if LOG_ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, delay=True)
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True)
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+# File handlers run on the listener thread; query metrics get their own file
+_error_handler = _file_handler(LOG_FILE)
+_error_handler.addFilter(lambda record: not record.name.startswith("query_metrics"))
+_query_handler = _file_handler(QUERY_LOG_FILE)
+_query_handler.addFilter(logging.Filter("query_metrics"))
+
+_log_queue = queue.SimpleQueue()  # Unbounded, so put() never blocks the caller
+_queue_handler = DeferredQueueHandler(_log_queue)
+_queue_handler.addFilter(RepeatSampler())
+
+root = logging.getLogger()
+root.setLevel(LOG_LEVEL)
+root.addHandler(_queue_handler)
+
+listener = logging.handlers.QueueListener(_log_queue, _error_handler, _query_handler,
+                                          respect_handler_level=True)
+listener.start()
+
+
+# Write out everything still queued and stop the listener thread
+def stop_logging():
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
+        _error_handler.close()
+        _query_handler.close()
+
+
+atexit.register(stop_logging)
 
 # Create a logger instance
 logger = logging.getLogger(__name__)
+
+# Slow queries and metric dumps are kept at WARNING level whatever LOG_LEVEL says
+query_logger = logging.getLogger("query_metrics")
+query_logger.setLevel(logging.WARNING)
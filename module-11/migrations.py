@@ -0,0 +1,212 @@
+#   Title: migrations.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Versioned, idempotent schema migrations for the winery database.
+#   Source: Online DDL - https://dev.mysql.com/doc/refman/8.0/en/innodb-online-ddl-operations.html
+
+# Every step checks information_schema before changing anything, so a migration can
+# be re-run safely, and a fresh database (created from schema.TABLES in step 1)
+# simply skips the later steps that older databases still need.
+
+# Usage: python migrations.py [--target N]
+
+
+# Import Statements
+import argparse
+
+import mysql.connector  # to connect
+from mysql.connector import errorcode
+from db_config import pooled_connection, get_pool, close_pools  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+from schema import TABLES, table_dependencies, dependency_levels  # Import current table definitions
+from parallel_setup import run_in_levels  # Import dependency-ordered setup
+from rollups import (create_sales_rollup_triggers, refresh_sales_rollup,
+                     create_work_hours_quarterly_triggers,
+                     refresh_work_hours_quarterly)  # Import shared rollup tables
+from report_cache import VERSIONED_TABLES, create_table_version_triggers  # Import report cache tables
+
+# Applied migrations, one row per version
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Errors MySQL raises when an ALTER can't use the requested algorithm
+ALGORITHM_NOT_SUPPORTED = (errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED,
+                           errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED_REASON)
+
+
+# information_schema lookups for the current database
+def table_exists(cursor, table):
+    cursor.execute("""SELECT COUNT(*) FROM information_schema.TABLES
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s""", (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""SELECT COUNT(*) FROM information_schema.COLUMNS
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                      AND COLUMN_NAME = %s""", (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, index):
+    cursor.execute("""SELECT COUNT(*) FROM information_schema.STATISTICS
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                      AND INDEX_NAME = %s""", (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def trigger_exists(cursor, trigger):
+    cursor.execute("""SELECT COUNT(*) FROM information_schema.TRIGGERS
+                      WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = %s""", (trigger,))
+    return cursor.fetchone()[0] > 0
+
+
+# Run an ALTER with the cheapest algorithm the server accepts for it
+def online_alter(cursor, statement, algorithms=("INSTANT", "INPLACE")):
+    for algorithm in algorithms:
+        lock = "" if algorithm == "INSTANT" else ", LOCK=NONE"
+        try:
+            cursor.execute(f"{statement}, ALGORITHM={algorithm}{lock}")
+            return algorithm
+        except mysql.connector.Error as err:
+            if err.errno not in ALGORITHM_NOT_SUPPORTED:
+                raise
+    cursor.execute(statement)  # Table copy as the last resort
+    return "COPY"
+
+
+def add_column(cursor, table, column, definition):
+    if not column_exists(cursor, table, column):
+        algorithm = online_alter(cursor, f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        print(f"Column '{table}.{column}' added ({algorithm}).")
+
+
+def add_index(cursor, table, index, columns):
+    if not index_exists(cursor, table, index):
+        algorithm = online_alter(cursor, f"ALTER TABLE {table} ADD INDEX {index} ({columns})",
+                                 algorithms=("INPLACE",))
+        print(f"Index '{table}.{index}' added ({algorithm}).")
+
+
+# 1: every table in schema.TABLES that doesn't exist yet, independent tables in parallel
+def create_missing_tables(conn, cursor):
+    missing = [name for name in TABLES if not table_exists(cursor, name)]
+
+    def create(worker_conn, table_name):
+        worker_cursor = worker_conn.cursor()
+        worker_cursor.execute(TABLES[table_name])
+        worker_cursor.close()
+        print(f"Table '{table_name}' created.")
+
+    # The caller usually holds one connection from this pool already, so leave it a slot
+    workers = get_pool(conn.database).max_size - 1
+    if workers < 1:
+        # No spare connection: create the tables one level at a time on this one
+        dependencies = table_dependencies()
+        for level in dependency_levels({name: dependencies.get(name, set()) for name in missing}):
+            for table_name in level:
+                create(conn, table_name)
+        return
+
+    run_in_levels({name: create for name in missing}, table_dependencies(),
+                  database=conn.database, max_workers=workers)
+
+
+# 2: indexes and generated columns used by the report queries
+def add_report_indexes(conn, cursor):
+    add_column(cursor, "supply", "order_month",
+               "DATE GENERATED ALWAYS AS (order_date - INTERVAL (DAYOFMONTH(order_date) - 1) DAY) VIRTUAL")
+    add_index(cursor, "supply", "idx_supply_supplier_order",
+              "supplier_id, order_date, expected_date, delivery_date")
+    add_index(cursor, "supply", "idx_supply_month_supplier",
+              "order_month, supplier_id, expected_date, delivery_date")
+    add_index(cursor, "sales", "idx_sales_date", "sale_date, wine_id, distributor_id, quantity")
+    add_index(cursor, "work_hours", "idx_work_hours_employee_date",
+              "employee_id, work_date, hours_worked")
+
+
+# 3: monthly sales rollup triggers, backfilled from existing sales
+def add_sales_rollup(conn, cursor):
+    if not trigger_exists(cursor, "trg_sales_rollup_insert"):
+        create_sales_rollup_triggers(cursor)
+        refresh_sales_rollup(conn)
+
+
+# 4: change counters for the report cache
+def add_table_versions(conn, cursor):
+    if not all(trigger_exists(cursor, f"trg_{table}_version_insert") for table in VERSIONED_TABLES):
+        create_table_version_triggers(cursor)
+
+
+# 5: quarterly hours summary for the employee report, backfilled from work_hours
+def add_work_hours_quarterly(conn, cursor):
+    if not table_exists(cursor, "work_hours_quarterly"):
+        cursor.execute(TABLES["work_hours_quarterly"])
+        print("Table 'work_hours_quarterly' created.")
+    if not trigger_exists(cursor, "trg_work_hours_quarterly_insert"):
+        create_work_hours_quarterly_triggers(cursor)
+        refresh_work_hours_quarterly(conn)
+    if not trigger_exists(cursor, "trg_work_hours_quarterly_version_insert"):
+        create_table_version_triggers(cursor, ["work_hours_quarterly"])
+
+
+# Version -> (name, step), applied in order
+MIGRATIONS = {
+    1: ("baseline tables", create_missing_tables),
+    2: ("report indexes", add_report_indexes),
+    3: ("sales monthly rollup", add_sales_rollup),
+    4: ("report cache table versions", add_table_versions),
+    5: ("work hours quarterly summary", add_work_hours_quarterly),
+}
+
+
+def applied_versions(cursor):
+    cursor.execute(SCHEMA_VERSION_TABLE)
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+# Apply every migration the database is missing, up to target
+def migrate(conn, target=None):
+    cursor = conn.cursor()
+    done = applied_versions(cursor)
+    applied = []
+
+    for version in sorted(MIGRATIONS):
+        if target is not None and version > target:
+            break
+        if version in done:
+            continue
+
+        name, step = MIGRATIONS[version]
+        step(conn, cursor)
+        cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                       (version, name))
+        conn.commit()  # Commit changes to the database
+        applied.append(version)
+        print(f"Migration {version} ({name}) applied.")
+
+    if not applied:
+        print("Schema is up to date.")
+    cursor.close()
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply winery schema migrations.")
+    parser.add_argument("--target", type=int, default=None, help="Stop after this version")
+    args = parser.parse_args()
+
+    try:
+        with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+            migrate(conn, args.target)
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+        logger.error(f"Migration failed: {err}")
+    finally:
+        close_pools()
@@ -0,0 +1,82 @@
+#   Title: parallel_setup.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Runs table creation and loading level by level along the foreign key DAG.
+#   Source: foreign_key_checks - https://dev.mysql.com/doc/refman/8.0/en/server-system-variables.html#sysvar_foreign_key_checks
+
+
+# Import Statements
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector  # to connect
+from db_config import pooled_connection, POOL_SIZE  # Import shared db_config file
+from schema import TABLES, FOREIGN_KEY_PATTERN, dependency_levels  # Import current table definitions
+
+
+# Run task(conn, name) for every name, one dependency level at a time. Names in the
+# same level run concurrently, each on its own pooled connection. With
+# defer_fk_checks the sessions skip foreign key lookups while they write.
+def run_in_levels(tasks, dependencies, database="winery", defer_fk_checks=False,
+                  max_workers=POOL_SIZE):
+    def run(name):
+        with pooled_connection(database) as conn:  # Borrow a warm connection from the pool
+            if defer_fk_checks:
+                cursor = conn.cursor()
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+            try:
+                tasks[name](conn, name)
+                conn.commit()  # Commit changes to the database
+            finally:
+                if defer_fk_checks:
+                    cursor.execute("SET SESSION foreign_key_checks = 1")  # Don't leak into the pool
+                    cursor.close()
+
+    levels = dependency_levels({name: dependencies.get(name, set()) for name in tasks})
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for level in levels:
+            # list() waits for the whole level and re-raises the first failure
+            list(executor.map(run, level))
+    return levels
+
+
+# Foreign keys in the current database whose child rows point at a missing parent.
+# Partitioned tables can't declare foreign keys, so theirs come from schema.TABLES.
+def find_orphaned_rows(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+        FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+    """)
+    foreign_keys = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT DISTINCT TABLE_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND PARTITION_NAME IS NOT NULL
+    """)
+    for (table,) in cursor.fetchall():
+        foreign_keys += [(table, column, parent, parent_column) for column, parent, parent_column
+                         in FOREIGN_KEY_PATTERN.findall(TABLES.get(table, ""))]
+
+    orphans = []
+    for table, column, parent, parent_column in foreign_keys:
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM {table} c
+            LEFT JOIN {parent} p ON c.{column} = p.{parent_column}
+            WHERE c.{column} IS NOT NULL AND p.{parent_column} IS NULL
+        """)
+        count = cursor.fetchone()[0]
+        if count:
+            orphans.append((table, column, parent, count))
+    cursor.close()
+    return orphans
+
+
+# Raise if loading with deferred foreign key checks left any dangling references
+def validate_foreign_keys(database="winery"):
+    with pooled_connection(database) as conn:  # Borrow a warm connection from the pool
+        orphans = find_orphaned_rows(conn)
+    if orphans:
+        details = "; ".join(f"{count} row(s) in {table}.{column} missing from {parent}"
+                            for table, column, parent, count in orphans)
+        raise mysql.connector.errors.IntegrityError(f"Foreign key check failed: {details}")
@@ -0,0 +1,250 @@
+#   Title: partitions.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Monthly RANGE partitioning of the sales and work_hours fact tables.
+#   Source: RANGE COLUMNS partitioning - https://dev.mysql.com/doc/refman/8.0/en/partitioning-columns-range.html
+#   Source: Partition pruning - https://dev.mysql.com/doc/refman/8.0/en/partitioning-pruning.html
+
+# Each month of history is one partition (p202401 holds January 2024), with
+# p_history for anything older and p_future (MAXVALUE) at the end. Report queries
+# that filter on a half-open date range (report_sql's *_between variants) are pruned
+# to the months they ask for, and retention is a DROP PARTITION instead of a DELETE.
+
+# InnoDB can't partition a table that has foreign keys, and every unique key must
+# include the partition column. Enabling partitioning therefore drops the fact
+# tables' foreign keys and widens their primary keys to (id, date); the dropped keys
+# are still checked by parallel_setup.validate_foreign_keys, which reads them from
+# schema.TABLES. If the conversion fails, the dropped keys are added back. Converting
+# rebuilds the table, so run it in a quiet period.
+
+# Usage: python partitions.py enable | maintain [--ahead 3] [--keep-months 120] | show
+
+
+# Import Statements
+import argparse
+
+import numpy as np
+
+import mysql.connector  # to connect
+from db_config import pooled_connection, close_pools  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+from schema import TABLES, FOREIGN_KEY_PATTERN  # Import current table definitions
+
+# Table -> (id column, partition date column)
+PARTITIONED_TABLES = {
+    "sales": ("sale_id", "sale_date"),
+    "work_hours": ("work_id", "work_date"),
+}
+
+MONTHS_AHEAD = 3  # Empty partitions kept ready past the current month
+HISTORY_PARTITION = "p_history"
+FUTURE_PARTITION = "p_future"
+
+
+def partition_name(month):
+    return "p" + str(month).replace("-", "")
+
+
+def partition_clause(month):
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{month + 1}-01')"
+
+
+def current_month():
+    return np.datetime64("today", "M")
+
+
+# Foreign keys a partitioned table no longer declares: (column, parent, parent column)
+def logical_foreign_keys(table):
+    return FOREIGN_KEY_PATTERN.findall(TABLES[table])
+
+
+# Declared foreign keys of a table: (name, columns, parent, parent columns, on delete, on update)
+def foreign_key_definitions(cursor, table):
+    cursor.execute("""
+        SELECT k.CONSTRAINT_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME,
+               r.DELETE_RULE, r.UPDATE_RULE
+        FROM information_schema.KEY_COLUMN_USAGE k
+        JOIN information_schema.REFERENTIAL_CONSTRAINTS r
+          ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+         AND r.TABLE_NAME = k.TABLE_NAME
+        WHERE k.TABLE_SCHEMA = DATABASE() AND k.TABLE_NAME = %s
+        ORDER BY k.CONSTRAINT_NAME, k.ORDINAL_POSITION
+    """, (table,))
+    definitions = {}
+    for name, column, parent, parent_column, on_delete, on_update in cursor.fetchall():
+        key = definitions.setdefault(name, (name, [], parent, [], on_delete, on_update))
+        key[1].append(column)
+        key[3].append(parent_column)
+    return list(definitions.values())
+
+
+def add_foreign_key_clause(name, columns, parent, parent_columns, on_delete, on_update):
+    return (f"ADD CONSTRAINT {name} FOREIGN KEY ({', '.join(columns)}) "
+            f"REFERENCES {parent} ({', '.join(parent_columns)}) "
+            f"ON DELETE {on_delete} ON UPDATE {on_update}")
+
+
+# Partition name -> upper bound month (None for MAXVALUE), in order
+def table_partitions(cursor, table):
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    partitions = {}
+    for name, description in cursor.fetchall():
+        bound = description.strip("'")
+        partitions[name] = None if bound == "MAXVALUE" else np.datetime64(bound, "M")
+    return partitions
+
+
+def is_partitioned(cursor, table):
+    return bool(table_partitions(cursor, table))
+
+
+# Convert one fact table to monthly partitions from its oldest row's month
+def enable_partitioning(conn, table, months_ahead=MONTHS_AHEAD):
+    id_column, date_column = PARTITIONED_TABLES[table]
+    cursor = conn.cursor()
+    try:
+        if is_partitioned(cursor, table):
+            print(f"Table '{table}' is already partitioned.")
+            return False
+
+        cursor.execute(f"SELECT MIN({date_column}) FROM {table}")
+        oldest = cursor.fetchone()[0]
+        first = np.datetime64(oldest, "M") if oldest else current_month()
+        months = np.arange(first, current_month() + months_ahead + 1)
+
+        # Foreign keys have to go before the table can be partitioned
+        foreign_keys = foreign_key_definitions(cursor, table)
+        if foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} "
+                           + ", ".join(f"DROP FOREIGN KEY {name}" for name, *_ in foreign_keys))
+
+        # The partition column has to be part of every unique key
+        partitions = [f"PARTITION {HISTORY_PARTITION} VALUES LESS THAN ('{first}-01')"]
+        partitions += [partition_clause(month) for month in months]
+        partitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        try:
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                    DROP PRIMARY KEY,
+                    ADD PRIMARY KEY ({id_column}, {date_column})
+                PARTITION BY RANGE COLUMNS ({date_column}) (
+                    {", ".join(partitions)}
+                )
+            """)
+        except mysql.connector.Error:
+            # Still unpartitioned, so put the foreign keys back before giving up
+            if foreign_keys:
+                cursor.execute(f"ALTER TABLE {table} "
+                               + ", ".join(add_foreign_key_clause(*key) for key in foreign_keys))
+                logger.error(f"Partitioning '{table}' failed; its foreign keys were restored.")
+            raise
+        print(f"Table '{table}' partitioned by month: {first} to {months[-1]} "
+              f"({len(foreign_keys)} foreign key(s) now checked by validate_foreign_keys).")
+        return True
+    finally:
+        cursor.close()
+
+
+# Split p_future so there are partitions through months_ahead past this month
+def add_future_partitions(conn, table, months_ahead=MONTHS_AHEAD):
+    cursor = conn.cursor()
+    try:
+        partitions = table_partitions(cursor, table)
+        bounded = [bound for bound in partitions.values() if bound is not None]
+        last = bounded[-1] - 1  # Month held by the newest bounded partition
+        months = np.arange(last + 1, current_month() + months_ahead + 1)
+        if not len(months):
+            return []
+
+        # Cheap while p_future is empty: only its (few) rows are moved
+        clauses = [partition_clause(month) for month in months]
+        clauses.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+                       f"({', '.join(clauses)})")
+        print(f"Table '{table}': added partitions {months[0]} to {months[-1]}.")
+        return [partition_name(month) for month in months]
+    finally:
+        cursor.close()
+
+
+# Drop whole months older than keep_months. DROP PARTITION doesn't fire DELETE
+# triggers, so the summary tables keep their totals for the dropped months; the
+# report cache counter is bumped here instead.
+def drop_partitions_before(conn, table, keep_months):
+    cutoff = current_month() - keep_months
+    cursor = conn.cursor()
+    try:
+        partitions = table_partitions(cursor, table)
+        expired = [name for name, bound in partitions.items()
+                   if bound is not None and bound <= cutoff]
+        if not expired:
+            return []
+
+        cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+        cursor.execute("SELECT COUNT(*) FROM information_schema.TABLES "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'table_versions'")
+        if cursor.fetchone()[0]:
+            cursor.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = %s",
+                           (table,))
+        conn.commit()  # Commit changes to the database
+        print(f"Table '{table}': dropped {len(expired)} partition(s) before {cutoff}.")
+        return expired
+    finally:
+        cursor.close()
+
+
+# Scheduled upkeep: future partitions for every partitioned table, optional retention
+def maintain_partitions(conn, months_ahead=MONTHS_AHEAD, keep_months=None):
+    cursor = conn.cursor()
+    tables = [table for table in PARTITIONED_TABLES if is_partitioned(cursor, table)]
+    cursor.close()
+
+    for table in tables:
+        add_future_partitions(conn, table, months_ahead)
+        if keep_months is not None:
+            drop_partitions_before(conn, table, keep_months)
+    return tables
+
+
+def show_partitions(conn):
+    cursor = conn.cursor()
+    for table in PARTITIONED_TABLES:
+        cursor.execute("""
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (table,))
+        rows = cursor.fetchall()
+        print(f"\n-- {table.upper()} PARTITIONS --" if rows else f"\nTable '{table}' is not partitioned.")
+        for name, description, estimated_rows in rows:
+            print(f"{name:<12} < {description:<14} ~{estimated_rows:,} rows")
+    cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the fact tables.")
+    parser.add_argument("command", choices=["enable", "maintain", "show"])
+    parser.add_argument("--ahead", type=int, default=MONTHS_AHEAD, help="Future months to keep ready")
+    parser.add_argument("--keep-months", type=int, default=None,
+                        help="Drop partitions older than this many months (maintain only)")
+    args = parser.parse_args()
+
+    try:
+        with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+            if args.command == "enable":
+                for table in PARTITIONED_TABLES:
+                    enable_partitioning(conn, table, args.ahead)
+            elif args.command == "maintain":
+                maintain_partitions(conn, args.ahead, args.keep_months)
+            show_partitions(conn)
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+        logger.error(f"Partition {args.command} failed: {err}")
+    finally:
+        close_pools()
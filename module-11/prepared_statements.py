@@ -0,0 +1,77 @@
+#   Title: prepared_statements.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Named server-side prepared statements, kept per pooled connection.
+#   Source: Prepared statements - https://dev.mysql.com/doc/connector-python/en/connector-python-api-mysqlcursorprepared.html
+
+# Each connection gets one prepared cursor per statement name, created the first
+# time that name runs on it. The connector only re-prepares when it is handed a
+# different SQL string object, so the registry always passes the same string and
+# later calls just send COM_STMT_EXECUTE with the bound parameters.
+
+
+# Import Statements
+import threading
+import weakref
+
+import mysql.connector  # to connect
+from mysql.connector import errorcode
+from report_sql import PREPARED_REPORTS  # Import shared report SQL
+
+# Errors meaning the server no longer has the statement (e.g. after a reconnect)
+STATEMENT_LOST_ERRORS = (errorcode.ER_UNKNOWN_STMT_HANDLER,
+                         errorcode.ER_NEED_REPREPARE)
+
+
+class PreparedRegistry:
+    def __init__(self, statements):
+        # Trailing semicolons trimmed once, so each name keeps one string object
+        self.statements = {name: sql.strip().rstrip(";") for name, sql in statements.items()}
+        self._connections = weakref.WeakKeyDictionary()  # conn -> (connection id, {name: cursor})
+        self._lock = threading.Lock()
+
+    # The connection's prepared cursor for name; a reconnect starts a fresh set
+    def cursor(self, conn, name):
+        connection_id = conn.connection_id
+        with self._lock:
+            known = self._connections.get(conn)
+            if known is None or known[0] != connection_id:
+                known = self._connections[conn] = (connection_id, {})
+            cursors = known[1]
+        if name not in cursors:
+            cursors[name] = conn.cursor(prepared=True)
+        return cursors[name]
+
+    # Drop everything prepared on a connection
+    def forget(self, conn):
+        with self._lock:
+            known = self._connections.pop(conn, None)
+        for cursor in (known[1].values() if known else ()):
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                pass  # Already gone on the server
+
+    # Execute a named statement with bound parameters and return its cursor.
+    # The caller reads the rows; read them all before the connection runs anything else.
+    def execute(self, conn, name, params=()):
+        sql = self.statements[name]
+        cursor = self.cursor(conn, name)
+        try:
+            cursor.execute(sql, tuple(params))
+        except mysql.connector.Error as err:
+            if err.errno not in STATEMENT_LOST_ERRORS:
+                raise
+            self.forget(conn)  # Prepare again once on a clean cursor
+            cursor = self.cursor(conn, name)
+            cursor.execute(sql, tuple(params))
+        return cursor
+
+    def prepared_count(self, conn):
+        with self._lock:
+            known = self._connections.get(conn)
+        return len(known[1]) if known else 0
+
+
+# Shared registry of the report statements
+report_statements = PreparedRegistry(PREPARED_REPORTS)
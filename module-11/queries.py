@@ -9,326 +9,320 @@
 # Import Statements
 import mysql.connector  # to connect
 from mysql.connector import errorcode
-from db_config import connect_db  # Import shared db_config file
+from db_config import pooled_connection, get_pool, close_pools, secrets, query_stats  # Import shared db_config file
+from report_cache import ReportCache, CHECK_INTERVAL  # Import shared report cache
 from log_config import logger  # Import shared logging configuration
 import traceback  # for detailed error diagnostics
-import logging  # for logging errors
-import dotenv  # to use .env file
-from dotenv import dotenv_values
-from datetime import datetime, date  # Import date for date formatting
-from decimal import Decimal  # Import for decimal formatting
-import matplotlib.pyplot as plt  # Import for charting
-import numpy as np
-
-try:
-    # Try/catch block for handling potential MySQL database errors
-
-    # Connect to the winery database
-    db = connect_db(database="winery")  # Connect to database
-
-    # Output the connection status
-    print("\n You are connected to the Winery MySQL Database!\n")
-
-    # Open a new cursor for executing database queries.
-    cursor = db.cursor()
-
-    # Supplier Reports
-    def get_supplier_delivery_performance():
-        # SQL query to show supplier name, dates and total delay days
-        query = """
-        SELECT
-            DATE_FORMAT(s.order_date, '%m-%d-%Y') AS order_month,
-            sup.supplier_name,
-            ANY_VALUE(DATE_FORMAT(s.expected_date, '%m-%d-%Y')) as expected_date,
-            ANY_VALUE(DATE_FORMAT(s.delivery_date, '%m-%d-%Y')) as delivery_date,
-            SUM(DATEDIFF(s.delivery_date, s.expected_date)) AS total_delay_days
-        FROM supply s
-        JOIN supplier sup ON s.supplier_id = sup.supplier_id
-        GROUP BY order_month, sup.supplier_name
-        ORDER BY DATE_FORMAT(MIN(s.order_date), '%Y-%m') ASC, total_delay_days DESC;
-        """
-
-        # Execute Query
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        # Define column headers
-        headers = ["Ordered Date", "Supplier Name",
-                   "Expected Date", "Delivered Date", "Total Delay Days"]
-
-        # Determine column widths dynamically
-        col_widths = [max(len(str(row[i])) for row in results + [headers])
-                      for i in range(len(headers))]
-
-        # Print table header
-        print(" | ".join(header.ljust(col_widths[i])
-                         for i, header in enumerate(headers)))
-        # Print a separator line
-        print("-" * (sum(col_widths) + (len(headers) - 1) * 3))
-
-        # Print each row in the table
-        for row in results:
-            print(" | ".join(str(row[i]).ljust(col_widths[i])
-                             for i in range(len(row))))
-
-    # Bar Chart for Supplier Reports
-    def plot_supplier_delivery_trends():
-        # SQL Query
-        query = """
-        SELECT
-            DATE_FORMAT(s.order_date, '%Y-%m') AS order_month,
-            sup.supplier_name,
-            SUM(DATEDIFF(s.delivery_date, s.expected_date)) AS total_delay_days
-        FROM supply s
-        JOIN supplier sup ON s.supplier_id = sup.supplier_id
-        GROUP BY order_month, sup.supplier_name
-        ORDER BY order_month ASC;
-        """
-
-        # Execute Query
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        # Organize data for plotting
-        months = []
-        suppliers = {}
-
-        for row in results:
-            month, supplier, delay = row
-            if month not in months:
-                months.append(month)
-            if supplier not in suppliers:
-                suppliers[supplier] = []
-            suppliers[supplier].append(delay)
-
-        # Plot Bar Chart
-        plt.figure(figsize=(12, 6))
-
-        # Bar positions
-        bar_width = 0.2  # Width of each bar
-        x_indexes = range(len(months))
-
-        # Plot each supplier's data
-        for i, (supplier, delays) in enumerate(suppliers.items()):
-            plt.bar([x + (i * bar_width) for x in x_indexes],
-                    delays, width=bar_width, label=supplier)
-
-        # Formatting the chart
-        plt.xlabel("Month")
-        plt.ylabel("Total Delay Days")
-        plt.title("Monthly Supplier Delivery Delays")
-        plt.xticks([x + (bar_width * (len(suppliers) / 2))
-                    for x in x_indexes], months, rotation=45)
-        plt.legend(title="Suppliers")
-        plt.grid(axis="y", linestyle="--", alpha=0.7)
-
-        # Show the plot
-        plt.tight_layout()
-        plt.show()
+from table_renderer import render_table, WIDTH_SAMPLE_SIZE  # Import shared table output
+from prepared_statements import report_statements  # Import shared prepared statements
+from datetime import date  # for open-ended date ranges
+
+# matplotlib is imported inside the chart functions so the menu and the
+# text-only reports start without loading the charting stack
+
+STREAM_BATCH_SIZE = 1000  # Rows fetched per round trip in streaming reports
+CHART_SIZE = (12, 6)  # Chart size in inches
+REPORT_DATABASE = secrets.get("REPORT_DATABASE") or "winery"  # Database the reports read from
+REPORT_FORMAT = secrets.get("REPORT_FORMAT") or "text"  # text, csv, tsv, jsonl or markdown
+REPORT_SOURCE = secrets.get("REPORT_SOURCE") or "mysql"  # mysql, or replica for the local DuckDB copy
+
+# Bounds used when only one end of a date range is given (MySQL DATE limits)
+DATE_MIN = date(1000, 1, 1)
+DATE_MAX = date(9999, 12, 31)
+
+# Column headers for each text report
+SUPPLIER_DELIVERY_HEADERS = ["Ordered Date", "Supplier Name",
+                             "Expected Date", "Delivered Date", "Total Delay Days"]
+WINE_PERFORMANCE_HEADERS = ["Sale Date", "Sale ID", "Quantity",
+                            "Wine Type", "Distributor Name"]
+WINE_MONTHLY_TOTALS_HEADERS = ["Month", "Distributor Name", "Wine Type", "Sales", "Total Quantity"]
+EMPLOYEE_PERFORMANCE_HEADERS = ["First Name", "Last Name", "Q1", "Q2", "Q3", "Q4"]
+EMPLOYEE_QUARTERLY_HOURS_HEADERS = ["Employee ID", "First Name", "Last Name", "Quarter", "Hours", "Entries"]
+
+# Cache repeat report views (optionally on disk via REPORT_CACHE_FILE in .env)
+report_cache = ReportCache(
+    database=REPORT_DATABASE,
+    disk_path=secrets.get("REPORT_CACHE_FILE"),
+    check_interval=float(secrets.get("REPORT_CACHE_CHECK_INTERVAL") or CHECK_INTERVAL))
+
+
+# Yield the rows of a named prepared statement, bound to params, from host
+# (None for the primary; report_rows passes the replica the cache picked)
+def stream_prepared(name, params=(), batch_size=STREAM_BATCH_SIZE, host=None):
+    with get_pool(REPORT_DATABASE, host).connection() as conn:  # Borrow a warm connection from the pool
+        cursor = report_statements.execute(conn, name, params)  # Prepared once per connection
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            if conn.unread_result:
+                cursor.fetchall()  # Drain the rest if the caller stopped early; the cursor is reused
+
+
+# Rows of a named report from the cache when the source tables haven't changed,
+# else streamed from its prepared statement (or from the analytics replica when
+# REPORT_SOURCE=replica)
+def report_rows(name, params=()):
+    params = tuple(params)
+    if REPORT_SOURCE == "replica":
+        from analytics_replica import replica_rows  # DuckDB is only loaded for replica reports
+        return replica_rows(name, params)
+    return report_cache.rows(report_statements.statements[name],
+                             lambda query, params, host: stream_prepared(name, params, host=host),
+                             params)
+
+
+# Half-open [start, end) bounds for a year, quarter or month, e.g.
+# get_employee_performance(*period(2024, quarter=3)); on partitioned tables the
+# report then reads only that period's partitions
+def period(year, quarter=None, month=None):
+    if month is not None:
+        first, months = month, 1
+    elif quarter is not None:
+        first, months = 3 * quarter - 2, 3
+    else:
+        first, months = 1, 12
+    end_year, end_month = divmod(first - 1 + months, 12)
+    return date(year, first, 1), date(year + end_year, end_month + 1, 1)
+
+
+# Statement name and parameters for a report with optional filters: the plain
+# report when nothing is given, else its date-range (or id and date-range) variant
+def report_variant(name, start=None, end=None, id_filter=None, id_variant=None):
+    if id_filter is not None:
+        return id_variant, (id_filter, start or DATE_MIN, end or DATE_MAX)
+    if start is not None or end is not None:
+        return f"{name}_between", (start or DATE_MIN, end or DATE_MAX)
+    return name, ()
+
+
+# Print a report table from any row iterator in REPORT_FORMAT
+def print_table(headers, rows, col_widths=None, sample_size=WIDTH_SAMPLE_SIZE):
+    render_table(headers, rows, fmt=REPORT_FORMAT, col_widths=col_widths, sample_size=sample_size)
+
 
-    # Wine Reports
-    def get_wine_performance():
-        # SQL query to show sale date, quantity, wine type and distributor
-        query = """
-        SELECT 
-            DATE_FORMAT(s.sale_date, '%m-%d-%Y') AS sale_date,
-            s.sale_id,
-            s.quantity,
-            wt.wine_type_name,
-            d.distributor_name
-        FROM sales s
-        JOIN wines w ON s.wine_id = w.wine_id
-        JOIN wine_type wt ON w.wine_type_id = wt.wine_type_id
-        JOIN distributor d ON s.distributor_id = d.distributor_id
-        ORDER BY s.sale_date ASC, s.sale_id ASC, d.distributor_name ASC;
-        """
-
-        # Execute Query
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        # Define column headers
-        headers = ["Sale Date", "Sale ID", "Quantity",
-                   "Wine Type", "Distributor Name"]
-
-        # Determine column widths dynamically
-        col_widths = [max(len(str(row[i])) for row in results + [headers])
-                      for i in range(len(headers))]
-
-        # Print table header
-        print(" | ".join(header.ljust(col_widths[i])
-              for i, header in enumerate(headers)))
-        # Print a separator line
-        print("-" * (sum(col_widths) + (len(headers) - 1) * 3))
-
-        # Print each row in the table
-        for row in results:
-            print(" | ".join(str(row[i]).ljust(col_widths[i])
-                  for i in range(len(row))))
-
-    # Bar Chart for Wine Reports
-    def plot_sales_trends():
-        # SQL Query
-        query = """
-        SELECT 
-            DATE_FORMAT(s.sale_date, '%m-%Y') AS sale_month,
-            d.distributor_name,
-            wt.wine_type_name,
-            SUM(s.quantity) AS total_quantity
-        FROM sales s
-        JOIN wines w ON s.wine_id = w.wine_id
-        JOIN wine_type wt ON w.wine_type_id = wt.wine_type_id
-        JOIN distributor d ON s.distributor_id = d.distributor_id
-        GROUP BY sale_month, d.distributor_name, wt.wine_type_name
-        ORDER BY DATE_FORMAT(MIN(sale_month), '%Y-%m') ASC;
-        """
-
-        # Execute Query
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        # Organize data for plotting
-        months = []
-        distributors = {}
-
-        for row in results:
-            month, distributor, wine_type, quantity = row
-            if month not in months:
-                months.append(month)
-            if distributor not in distributors:
-                distributors[distributor] = {}
-            if wine_type not in distributors[distributor]:
-                distributors[distributor][wine_type] = []
-            distributors[distributor][wine_type].append(quantity)
-
-        # Plot Bar Chart
-        plt.figure(figsize=(12, 6))
-
-        # Bar positions
-        bar_width = 0.2  # Width of each bar
-        x_indexes = range(len(months))
-
-        # Plot the data
-        for i, (distributor, wine_data) in enumerate(distributors.items()):
-            for j, (wine_type, quantities) in enumerate(wine_data.items()):
-                plt.bar([x + ((i + j * 0.2) * bar_width) for x in x_indexes],
-                        quantities, width=bar_width, label=f"{distributor} - {wine_type}")
-
-        # Formatting the chart
-        plt.xlabel("Month")
-        plt.ylabel("Total Wines Sold")
-        plt.title("Monthly Wine Sales by Distributor and Wine Type")
-        plt.xticks([x + (bar_width * (len(distributors) / 2))
-                    for x in x_indexes], months, rotation=45)
-        plt.legend(title="Distributors - Wine Type")
-        plt.grid(axis="y", linestyle="--", alpha=0.7)
-
-        # Show the plot
-        plt.tight_layout()
+# Show a chart on screen, or save it when an output path is given
+def finish_chart(fig, output=None):
+    fig.tight_layout()
+    if output:
+        fig.savefig(output)
+    else:
+        import matplotlib.pyplot as plt  # Import for charting
         plt.show()
 
-    # Employee Reports
-    def get_employee_performance():
-        # SQL query to show sale date, quantity, wine type and distributor
-        query = """
-        SELECT 
-            e.first_name,
-            e.last_name,
-            SUM(CASE WHEN QUARTER(wh.work_date) = 1 THEN wh.hours_worked ELSE 0 END) AS Q1_total,
-            SUM(CASE WHEN QUARTER(wh.work_date) = 2 THEN wh.hours_worked ELSE 0 END) AS Q2_total,
-            SUM(CASE WHEN QUARTER(wh.work_date) = 3 THEN wh.hours_worked ELSE 0 END) AS Q3_total,
-            SUM(CASE WHEN QUARTER(wh.work_date) = 4 THEN wh.hours_worked ELSE 0 END) AS Q4_total
-        FROM employee e
-        JOIN work_hours wh ON e.employee_id = wh.employee_id
-        WHERE 
-            NOT (YEAR(wh.work_date) = YEAR(CURDATE()) 
-            AND QUARTER(wh.work_date) = QUARTER(CURDATE())) 
-        GROUP BY e.employee_id
-        ORDER BY e.employee_id ASC;
-        """
-
-        # Execute Query
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        # Define column headers
-        headers = ["First Name", "Last Name", "Q1", "Q2", "Q3", "Q4"]
-
-        # Determine column widths dynamically
-        col_widths = [max(len(str(row[i])) for row in results + [headers])
-                      for i in range(len(headers))]
-
-        # Print table header
-        print(" | ".join(header.ljust(col_widths[i])
-              for i, header in enumerate(headers)))
-        # Print a separator line
-        print("-" * (sum(col_widths) + (len(headers) - 1) * 3))
-
-        # Print each row in the table
-        for row in results:
-            print(" | ".join(str(row[i]).ljust(col_widths[i])
-                  for i in range(len(row))))
-
-    # Creating a menu to display the reports
-
-    def select_reports():
-        print("\n Report Menu:")
-        print("\n 1. Supplier Report")
-        print("\n 2. Wine Report")
-        print("\n 3. Employee Report")
-        print("\n 4. Exit\n")
-
-        choice = input("Please make a selection 1-4: ")
-        return choice
-
-    while True:
-        choice = select_reports()
-
-        if choice == "1":
-            print("\nGenerating Supplier Report... \n")
-            get_supplier_delivery_performance()
-            plot_supplier_delivery_trends()
-
-        elif choice == "2":
-            print("\nGenerating Wine Report... \n")
-            get_wine_performance()
-            plot_sales_trends()
-
-        elif choice == "3":
-            print("\nGenerating Employee Report... \n")
-            get_employee_performance()
-
-        elif choice == "4":
-            print("\nExiting... \n")
-            break
 
-        else:
-            print("\nInvalid choice! Please select a valid option... \n")
+# New chart figure; off-screen figures don't touch pyplot's global state,
+# so they are safe to draw from report worker threads
+def new_chart(output=None):
+    if output:
+        from matplotlib.figure import Figure
+        return Figure(figsize=CHART_SIZE)
+    import matplotlib.pyplot as plt  # Import for charting
+    return plt.figure(figsize=CHART_SIZE)
 
 
-# Close the cursor.
-    cursor.close()
+# Supplier Reports
+def get_supplier_delivery_performance(start=None, end=None, supplier_id=None):
+    # Prepared statement showing supplier name, dates and total delay days,
+    # optionally for orders in [start, end) and for one supplier
+    name, params = report_variant("supplier_delivery", start, end,
+                                  supplier_id, "supplier_delivery_for_supplier")
 
+    # Stream rows from the server (or the cache) and print them as they arrive
+    print_table(SUPPLIER_DELIVERY_HEADERS, report_rows(name, params))
 
-except mysql.connector.Error as err:
-    error_message = ""
 
-    if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-        error_message = f"Error: The supplied username or password are invalid. MySQL Error Code: {err.errno}"
+# Draw the supplier delay bars onto a chart
+def draw_supplier_delivery_trends(fig, results):
+    from chart_data import pivot, bar_offsets  # NumPy is only loaded for charts
+    ax = fig.add_subplot()
 
-    elif err.errno == errorcode.ER_BAD_DB_ERROR:
-        error_message = f"Error: The specified database does not exist. MySQL Error Code: {err.errno}"
+    # Organize data for plotting: months x suppliers, zero where a supplier had no order
+    months, suppliers, delays = pivot(results, series_columns=1)
 
-    else:
-        error_message = f"General MySQL Error: {err}"
+    # Bar positions
+    offsets, ticks, bar_width = bar_offsets(len(months), len(suppliers))
+
+    # Plot each supplier's data
+    for i, supplier in enumerate(suppliers):
+        ax.bar(offsets[:, i], delays[:, i], width=bar_width, label=supplier)
+
+    # Formatting the chart
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Total Delay Days")
+    ax.set_title("Monthly Supplier Delivery Delays")
+    ax.set_xticks(ticks, months, rotation=45)
+    ax.legend(title="Suppliers")
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+
+
+# Bar Chart for Supplier Reports
+def plot_supplier_delivery_trends(output=None):
+    # Execute the prepared statement (or reuse the cached result)
+    results = list(report_rows("supplier_trends"))
+
+    # Plot Bar Chart
+    fig = new_chart(output)
+    draw_supplier_delivery_trends(fig, results)
+    finish_chart(fig, output)
+
+
+# Wine Reports
+def get_wine_performance(start=None, end=None, distributor_id=None):
+    # Prepared statement showing sale date, quantity, wine type and distributor,
+    # optionally for sales in [start, end) and for one distributor
+    name, params = report_variant("wine_performance", start, end,
+                                  distributor_id, "wine_performance_for_distributor")
+
+    # Stream rows from the server (or the cache) and print them as they arrive
+    print_table(WINE_PERFORMANCE_HEADERS, report_rows(name, params))
+
+
+# Monthly totals for Wine Reports, read from the pre-aggregated rollup
+def get_wine_monthly_totals(start=None, end=None, distributor_id=None):
+    # Prepared statement showing monthly quantity sold per distributor and wine type,
+    # optionally for months in [start, end) and for one distributor
+    name, params = report_variant("wine_monthly_totals", start, end,
+                                  distributor_id, "wine_monthly_totals_for_distributor")
+
+    # Stream rows from the server (or the cache) and print them as they arrive
+    print_table(WINE_MONTHLY_TOTALS_HEADERS, report_rows(name, params))
+
+
+# Draw the wine sales bars onto a chart
+def draw_sales_trends(fig, results):
+    from chart_data import pivot, bar_offsets  # NumPy is only loaded for charts
+    ax = fig.add_subplot()
+
+    # Organize data for plotting: months x (distributor, wine type), zero-filled
+    months, series, quantities = pivot(results, series_columns=2)
+
+    # Bar positions
+    offsets, ticks, bar_width = bar_offsets(len(months), len(series))
+
+    # Plot the data
+    for i, label in enumerate(series):
+        ax.bar(offsets[:, i], quantities[:, i], width=bar_width, label=label)
+
+    # Formatting the chart
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Total Wines Sold")
+    ax.set_title("Monthly Wine Sales by Distributor and Wine Type")
+    ax.set_xticks(ticks, months, rotation=45)
+    ax.legend(title="Distributors - Wine Type")
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
 
-    print(error_message)  # Prints the error for immediate feedback.
-    logging.error(error_message)  # Logs the error message.
-    # Logs the full traceback for debugging.
-    logging.error(traceback.format_exc())
 
-finally:
-    # Close the connection to MySQL
-    if 'db' in locals() and db.is_connected():
-        db.close()
+# Bar Chart for Wine Reports
+def plot_sales_trends(output=None):
+    # Execute the prepared statement (or reuse the cached result)
+    results = list(report_rows("sales_trends"))
+
+    # Plot Bar Chart
+    fig = new_chart(output)
+    draw_sales_trends(fig, results)
+    finish_chart(fig, output)
+
+
+# Employee Reports
+def get_employee_performance(start=None, end=None):
+    # Prepared statement showing quarterly hours per employee, optionally for
+    # work dates in [start, end) instead of every completed quarter
+    name, params = report_variant("employee_performance", start, end)
+
+    # Stream rows from the server (or the cache) and print them as they arrive
+    print_table(EMPLOYEE_PERFORMANCE_HEADERS, report_rows(name, params))
+
+
+def get_employee_quarterly_hours(year):
+    # Prepared statement listing one year's hours per employee and quarter for payroll
+    print_table(EMPLOYEE_QUARTERLY_HOURS_HEADERS, report_rows("employee_quarterly_hours", (year,)))
+
+
+# Creating a menu to display the reports
+def select_reports():
+    print("\n Report Menu:")
+    print("\n 1. Supplier Report")
+    print("\n 2. Wine Report")
+    print("\n 3. Employee Report")
+    print("\n 4. Exit\n")
+
+    choice = input("Please make a selection 1-4: ")
+    return choice
+
+
+def main():
+    try:
+        # Try/catch block for handling potential MySQL database errors
+
+        # Connect to the report database (a replica when one is healthy) and keep the connection warm in the pool
+        with pooled_connection(REPORT_DATABASE, read_only=True):
+            pass
+
+        # Output the connection status
+        print("\n You are connected to the Winery MySQL Database!\n")
+
+        # Optional Prometheus scrape endpoint for the statement metrics
+        if secrets.get("METRICS_PORT"):
+            from query_metrics import serve_metrics
+            serve_metrics(query_stats, int(secrets["METRICS_PORT"]))
+
+        while True:
+            choice = select_reports()
+
+            if choice == "1":
+                print("\nGenerating Supplier Report... \n")
+                get_supplier_delivery_performance()
+                plot_supplier_delivery_trends()
+
+            elif choice == "2":
+                print("\nGenerating Wine Report... \n")
+                get_wine_performance()
+                print()
+                get_wine_monthly_totals()
+                plot_sales_trends()
+
+            elif choice == "3":
+                print("\nGenerating Employee Report... \n")
+                get_employee_performance()
+
+            elif choice == "4":
+                print("\nExiting... \n")
+                break
+
+            else:
+                print("\nInvalid choice! Please select a valid option... \n")
+
+    except mysql.connector.Error as err:
+        error_message = ""
+
+        if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+            error_message = f"Error: The supplied username or password are invalid. MySQL Error Code: {err.errno}"
+
+        elif err.errno == errorcode.ER_BAD_DB_ERROR:
+            error_message = f"Error: The specified database does not exist. MySQL Error Code: {err.errno}"
+
+        else:
+            error_message = f"General MySQL Error: {err}"
+
+        print(error_message)  # Prints the error for immediate feedback.
+        logger.error(error_message)  # Logs the error message.
+        # Logs the full traceback for debugging.
+        logger.error(traceback.format_exc())
+
+    finally:
+        # Close the pooled connections to MySQL
+        report_cache.close()
+        if REPORT_SOURCE == "replica":
+            from analytics_replica import close_replica
+            close_replica()
+        close_pools()
+        query_stats.log_summary()  # Busiest statements of the session to query_log.txt
         print("\n  Connection closed safely.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#   Title: query_metrics.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Per-statement timing, slow-query logging and percentile metrics for the winery connections.
+#   Source: Prometheus exposition format - https://prometheus.io/docs/instrumenting/exposition_formats/
+
+# db_config wraps every connection so its cursors report here. A statement is
+# timed from execute() until its result is fully read (or the cursor is reused or
+# closed), so streamed reports are measured end to end, not just the first round trip.
+
+
+# Import Statements
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from log_config import query_logger  # Import shared logging configuration
+
+SAMPLE_SIZE = 1024  # Recent durations kept per fingerprint for percentiles
+QUANTILES = (0.5, 0.95, 0.99)
+MAX_FINGERPRINT_LENGTH = 300
+
+# Literal patterns replaced by ? so statements that differ only in values group together
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+
+
+# Normalised statement text: literals and placeholders become ?, lists collapse
+@lru_cache(maxsize=1024)
+def fingerprint(statement):
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode("utf-8", "replace")
+    text = _STRING.sub("?", statement)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = " ".join(text.split())
+    text = _IN_LIST.sub("IN (...)", text)
+    text = _VALUES_LIST.sub(r"VALUES \1, ...", text)
+    return text[:MAX_FINGERPRINT_LENGTH]
+
+
+# Rough size of a row as sent by the server (text and binary values by length,
+# everything else counted as 8 bytes)
+def row_bytes(row):
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(value) if isinstance(value, (str, bytes, bytearray)) else 8
+               for value in values if value is not None)
+
+
+# Counters and recent durations for one fingerprint
+class StatementStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.durations = deque(maxlen=SAMPLE_SIZE)
+
+    def quantiles(self, quantiles=QUANTILES):
+        ordered = sorted(self.durations)
+        if not ordered:
+            return {q: 0.0 for q in quantiles}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles}
+
+
+# Thread-safe registry of statement metrics
+class QueryStats:
+    def __init__(self, slow_threshold=1.0):
+        self.slow_threshold = slow_threshold  # Seconds; statements at or above it are logged
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, seconds, rows=0, size=0, failed=False):
+        key = fingerprint(statement)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.count += 1
+            stats.errors += failed
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+            stats.bytes += size
+            stats.durations.append(seconds)
+
+        if self.slow_threshold is not None and seconds >= self.slow_threshold:
+            query_logger.warning(f"Slow query ({seconds:.3f}s, {rows} rows, {size} bytes): {key}")
+
+    # fingerprint -> copy of its stats plus p50/p95/p99, busiest first
+    def snapshot(self):
+        with self._lock:
+            items = [(key, stats.count, stats.errors, stats.total_seconds, stats.max_seconds,
+                      stats.rows, stats.bytes, stats.quantiles())
+                     for key, stats in self._stats.items()]
+        items.sort(key=lambda item: item[3], reverse=True)
+        return {key: {"count": count, "errors": errors, "total_seconds": total,
+                      "max_seconds": longest, "rows": rows, "bytes": size,
+                      "p50": quantiles[0.5], "p95": quantiles[0.95], "p99": quantiles[0.99]}
+                for key, count, errors, total, longest, rows, size, quantiles in items}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    # Prometheus text exposition of the current metrics
+    def prometheus_text(self, prefix="winery_query"):
+        lines = [f"# HELP {prefix}_duration_seconds Statement time from execute to last row.",
+                 f"# TYPE {prefix}_duration_seconds summary"]
+        counters = []
+        for key, stats in self.snapshot().items():
+            label = f'fingerprint="{_escape_label(key)}"'
+            for q in QUANTILES:
+                lines.append(f'{prefix}_duration_seconds{{{label},quantile="{q}"}} {stats[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f"{prefix}_duration_seconds_sum{{{label}}} {stats['total_seconds']:.6f}")
+            lines.append(f"{prefix}_duration_seconds_count{{{label}}} {stats['count']}")
+            counters.append((label, stats))
+
+        for name, field, description in (("rows_total", "rows", "Rows returned."),
+                                         ("bytes_total", "bytes", "Approximate bytes fetched."),
+                                         ("errors_total", "errors", "Statements that raised.")):
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.extend(f"{prefix}_{name}{{{label}}} {stats[field]}" for label, stats in counters)
+        return "\n".join(lines) + "\n"
+
+    # Write the top statements to the log (for a periodic dump)
+    def log_summary(self, limit=10):
+        for key, stats in list(self.snapshot().items())[:limit]:
+            query_logger.warning(f"{stats['count']} calls, total {stats['total_seconds']:.3f}s, "
+                                 f"p50 {stats['p50']:.4f}s, p95 {stats['p95']:.4f}s, "
+                                 f"p99 {stats['p99']:.4f}s, {stats['rows']} rows: {key}")
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Cursor wrapper that times each statement and counts what it returns
+class InstrumentedCursor:
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._statement = None
+        self._started = 0.0
+        self._rows = 0
+        self._bytes = 0
+
+    # Record the current statement, if any, and stop tracking it
+    def _finish(self, failed=False):
+        if self._statement is None:
+            return
+        self._stats.record(self._statement, time.perf_counter() - self._started,
+                           self._rows, self._bytes, failed)
+        self._statement = None
+
+    def _run(self, method, operation, *args, **kwargs):
+        self._finish()
+        self._statement = operation
+        self._rows = self._bytes = 0
+        self._started = time.perf_counter()
+        try:
+            result = method(operation, *args, **kwargs)
+        except Exception:
+            self._finish(failed=True)
+            raise
+        if not self._cursor.with_rows:
+            self._finish()  # Nothing to read, so the statement is done
+        return result
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._run(self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._run(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def _count(self, rows):
+        self._rows += len(rows)
+        self._bytes += sum(row_bytes(row) for row in rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is None:
+            self._finish()
+        else:
+            self._count((row,))
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        if rows:
+            self._count(rows)
+        else:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(rows)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# Connection wrapper whose cursors are instrumented; everything else passes through
+class InstrumentedConnection:
+    def __init__(self, conn, stats):
+        self._conn = conn
+        self._stats = stats
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._stats)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._conn.close()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# Log the busiest statements every interval seconds until the returned event is set
+def dump_periodically(stats, interval=60.0, limit=10):
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            stats.log_summary(limit)
+
+    threading.Thread(target=run, name="query-metrics-dump", daemon=True).start()
+    return stop
+
+
+# Serve the Prometheus text on http://host:port/metrics from a background thread
+def serve_metrics(stats, port=9105, host="127.0.0.1"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = stats.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # Scrapes would flood the error log
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="query-metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,189 @@
+#   Title: report_cache.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Report result cache invalidated by per-table change counters.
+#   Source: OrderedDict LRU - https://docs.python.org/3/library/collections.html#ordereddict-examples-and-recipes
+
+
+# Import Statements
+import hashlib  # for on-disk cache keys
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import mysql.connector  # to connect
+from mysql.connector import errorcode
+from db_config import get_pool, replicas  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+
+# Tables whose changes invalidate cached reports
+VERSIONED_TABLES = ["supplier", "supply", "distributor", "wine_type", "wines",
+                    "sales", "sales_monthly_rollup", "employee", "work_hours",
+                    "work_hours_quarterly"]
+
+# One change counter per table, bumped by triggers on every write
+TABLE_VERSIONS_TABLE = """
+    CREATE TABLE table_versions (
+        table_name VARCHAR(64) PRIMARY KEY,
+        version BIGINT UNSIGNED NOT NULL
+    )
+"""
+
+# Seconds a table_versions snapshot is trusted before asking the server again. Within
+# this window a hit costs no round trip, at the price of possibly serving a report
+# that is up to this many seconds behind a write; 0 checks the server on every read.
+CHECK_INTERVAL = 2.0
+
+# Finds the tables a query reads
+TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+# Create the version counter triggers for each table on an open cursor
+def create_table_version_triggers(cursor, tables=VERSIONED_TABLES):
+    cursor.executemany(
+        "INSERT IGNORE INTO table_versions (table_name, version) VALUES (%s, 0)",
+        [(table,) for table in tables])
+
+    for table in tables:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            trigger_name = f"trg_{table}_version_{event.lower()}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+            cursor.execute(f"""
+                CREATE TRIGGER {trigger_name} AFTER {event} ON {table}
+                FOR EACH ROW
+                    UPDATE table_versions SET version = version + 1
+                    WHERE table_name = '{table}'
+            """)
+        print(f"Version triggers on '{table}' created.")
+
+
+# Tables referenced by a query, sorted so equal sets give equal keys
+def tables_in(query):
+    return tuple(sorted({name.lower() for name in TABLE_PATTERN.findall(query)}))
+
+
+# LRU of report results in memory, optionally backed by a shelve file on disk
+class ReportCache:
+    def __init__(self, database="winery", max_entries=64, max_rows=100000,
+                 disk_path=None, check_interval=CHECK_INTERVAL):
+        self.database = database
+        self.max_entries = max_entries
+        self.max_rows = max_rows  # Bigger results are streamed but not kept
+        self.check_interval = check_interval  # Seconds a version snapshot is trusted without asking the server
+        self.enabled = True
+
+        self._entries = OrderedDict()  # key -> (versions, rows)
+        self._versions = {}  # (tables, host) -> (checked at, versions)
+        self._lock = threading.Lock()
+        self._disk = None
+        if disk_path:
+            import shelve  # Only loaded when the on-disk store is used
+            self._disk = shelve.open(disk_path)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, query, params):
+        return hashlib.sha256(repr((" ".join(query.split()), params)).encode()).hexdigest()
+
+    # Current change counters for the given tables on one server (one small round trip).
+    # Snapshots are kept per server, since replicas can be at different points.
+    def current_versions(self, tables, host=None):
+        now = time.monotonic()
+        with self._lock:
+            checked = self._versions.get((tables, host))
+        if checked and now - checked[0] < self.check_interval:
+            return checked[1]
+
+        placeholders = ", ".join(["%s"] * len(tables))
+        with get_pool(self.database, host).connection() as conn:  # Borrow a warm connection from the pool
+            cursor = conn.cursor()
+            cursor.execute("SELECT table_name, version FROM table_versions "
+                           f"WHERE table_name IN ({placeholders})", tables)
+            versions = tuple(sorted(cursor.fetchall()))
+            cursor.close()
+
+        with self._lock:
+            self._versions[(tables, host)] = (now, versions)
+        return versions
+
+    # shelve/dbm isn't thread-safe, so the disk store is only touched under the lock
+    def _get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            entry = self._disk.get(key) if self._disk is not None else None
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Drop the least recently used
+
+    def _put(self, key, entry):
+        self._remember(key, entry)
+        if self._disk is not None:
+            with self._lock:
+                self._disk[key] = entry
+                self._disk.sync()
+
+    # Return the report rows, from the cache when no source table has changed.
+    # fetch(query, params, host) is called on a miss and should yield rows read
+    # from host (None for the primary), the server the versions were read from.
+    def rows(self, query, fetch, params=None):
+        # One server for both reads, so cached rows are never older than their versions
+        host = replicas.choose(self.database)
+        if not self.enabled:
+            return fetch(query, params, host)
+
+        tables = tables_in(query)
+        try:
+            # Read versions before the query so a concurrent write leaves the entry stale
+            versions = self.current_versions(tables, host)
+        except mysql.connector.Error as err:
+            if err.errno != errorcode.ER_NO_SUCH_TABLE:
+                raise
+            logger.warning("table_versions is missing; report caching is disabled.")
+            self.enabled = False
+            return fetch(query, params, host)
+
+        key = self._key(query, params)
+        entry = self._get(key)
+        if entry is not None and entry[0] == versions:
+            with self._lock:
+                self.hits += 1
+            return iter(entry[1])
+
+        with self._lock:
+            self.misses += 1
+        return self._fill(key, versions, fetch(query, params, host))
+
+    # Pass rows through to the caller, keeping them if the result is small enough
+    def _fill(self, key, versions, rows):
+        kept = []
+        for row in rows:
+            if kept is not None:
+                kept.append(row)
+                if len(kept) > self.max_rows:
+                    kept = None
+            yield row
+        if kept is not None:
+            self._put(key, (versions, kept))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            if self._disk is not None:
+                self._disk.clear()
+
+    def close(self):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
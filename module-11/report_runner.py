@@ -0,0 +1,249 @@
+#   Title: report_runner.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Headless batch runner that writes the winery reports to files.
+#   Source: ThreadPoolExecutor - https://docs.python.org/3/library/concurrent.futures.html
+#   Source: Matplotlib backends - https://matplotlib.org/stable/users/explain/figure/backends.html
+
+# Usage: python report_runner.py --reports supplier wine --out reports --format csv parquet --chart-format png svg
+
+
+# Import Statements
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")  # No display needed; must be set before pyplot is imported
+
+from mysql.connector.constants import FieldType
+from db_config import pooled_connection, close_pools, query_stats  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+from report_sql import (SUPPLIER_DELIVERY_SQL, SUPPLIER_TRENDS_SQL, WINE_PERFORMANCE_SQL,
+                        WINE_MONTHLY_TOTALS_SQL, SALES_TRENDS_SQL,
+                        EMPLOYEE_PERFORMANCE_SQL)  # Import shared report SQL
+import queries  # REPORT_DATABASE is read at run time, so callers can switch databases
+from queries import (SUPPLIER_DELIVERY_HEADERS, WINE_PERFORMANCE_HEADERS,
+                     WINE_MONTHLY_TOTALS_HEADERS, EMPLOYEE_PERFORMANCE_HEADERS,
+                     STREAM_BATCH_SIZE, new_chart, draw_supplier_delivery_trends,
+                     draw_sales_trends)  # Import shared report layout
+
+TABLE_FORMATS = ("csv", "parquet")
+CHART_FORMATS = ("png", "svg")
+
+# MySQL column type -> (Arrow type name, arguments) for Parquet output (anything else
+# is a string). TIME comes back from the connector as a timedelta and can be negative
+# or over 24 hours, so it is stored as a duration rather than a time of day.
+ARROW_TYPES = {
+    FieldType.TINY: ("int64",),
+    FieldType.SHORT: ("int64",),
+    FieldType.INT24: ("int64",),
+    FieldType.LONG: ("int64",),
+    FieldType.LONGLONG: ("int64",),
+    FieldType.YEAR: ("int64",),
+    FieldType.FLOAT: ("float64",),
+    FieldType.DOUBLE: ("float64",),
+    FieldType.DATE: ("date32",),
+    FieldType.NEWDATE: ("date32",),
+    FieldType.DATETIME: ("timestamp", "us"),
+    FieldType.TIMESTAMP: ("timestamp", "us"),
+    FieldType.TIME: ("duration", "us"),
+}
+DECIMAL_TYPES = (FieldType.DECIMAL, FieldType.NEWDECIMAL)
+DEFAULT_DECIMAL_SCALE = 10  # Used when a decimal column has no values to take the scale from
+
+# Tables and charts that make up each report
+REPORTS = {
+    "supplier": {
+        "tables": [("supplier_delivery", SUPPLIER_DELIVERY_HEADERS, SUPPLIER_DELIVERY_SQL)],
+        "charts": [("supplier_delivery_trends", SUPPLIER_TRENDS_SQL, draw_supplier_delivery_trends)],
+    },
+    "wine": {
+        "tables": [("wine_performance", WINE_PERFORMANCE_HEADERS, WINE_PERFORMANCE_SQL),
+                   ("wine_monthly_totals", WINE_MONTHLY_TOTALS_HEADERS, WINE_MONTHLY_TOTALS_SQL)],
+        "charts": [("sales_trends", SALES_TRENDS_SQL, draw_sales_trends)],
+    },
+    "employee": {
+        "tables": [("employee_performance", EMPLOYEE_PERFORMANCE_HEADERS, EMPLOYEE_PERFORMANCE_SQL)],
+        "charts": [],
+    },
+}
+
+
+# Parquet writer that takes rows in batches (pyarrow is only needed for parquet output).
+# The schema comes from the cursor description, so a batch of NULLs can't fix a
+# column's type; decimals take their scale from the first value in the first batch.
+class ParquetTableWriter:
+    def __init__(self, path, headers, description):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.headers = headers
+        self.description = description
+        self._writer = None
+
+    def _schema(self, rows):
+        fields = []
+        for index, (header, column) in enumerate(zip(self.headers, self.description)):
+            type_code = column[1]
+            if type_code in DECIMAL_TYPES:
+                values = (row[index] for row in rows if row[index] is not None)
+                first = next(values, None)
+                scale = -first.as_tuple().exponent if first is not None else DEFAULT_DECIMAL_SCALE
+                arrow_type = self._pa.decimal128(38, max(scale, 0))
+            else:
+                name, *args = ARROW_TYPES.get(type_code, ("string",))
+                arrow_type = getattr(self._pa, name)(*args)
+            fields.append(self._pa.field(header, arrow_type))
+        return self._pa.schema(fields)
+
+    def write_rows(self, rows):
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self._schema(rows))
+        columns = list(zip(*rows)) if rows else [[] for _ in self.headers]
+        batch = self._pa.Table.from_arrays(
+            [self._pa.array(column, type=field.type)
+             for column, field in zip(columns, self._writer.schema)],
+            schema=self._writer.schema)
+        self._writer.write_table(batch)
+
+    def close(self):
+        if self._writer is None:
+            self.write_rows([])  # Still write the header-only file for an empty result
+        self._writer.close()
+
+
+# Stream one query's rows into every requested table format
+def write_table(conn, query, headers, path_base, formats):
+    paths = [f"{path_base}.{fmt}" for fmt in formats]
+    csv_file = csv_writer = parquet_writer = None
+
+    cursor = conn.cursor(buffered=False)  # Unbuffered: rows stay on the server until fetched
+    try:
+        if "csv" in formats:
+            csv_file = open(f"{path_base}.csv", "w", newline="", encoding="utf-8")
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(headers)
+        cursor.execute(query)
+        if "parquet" in formats:
+            parquet_writer = ParquetTableWriter(f"{path_base}.parquet", headers, cursor.description)
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            if csv_writer:
+                csv_writer.writerows(rows)
+            if parquet_writer:
+                parquet_writer.write_rows(rows)
+    finally:
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+        if csv_file:
+            csv_file.close()
+        if parquet_writer:
+            parquet_writer.close()
+
+    return paths
+
+
+# Run one query and save its chart in every requested image format
+def write_chart(conn, query, draw, path_base, formats):
+    cursor = conn.cursor()
+    cursor.execute(query)
+    results = cursor.fetchall()
+    cursor.close()
+
+    fig = new_chart(output=path_base)  # Off-screen figure, safe to draw from a worker thread
+    draw(fig, results)
+    fig.tight_layout()
+
+    paths = []
+    for fmt in formats:
+        paths.append(f"{path_base}.{fmt}")
+        fig.savefig(paths[-1])
+    return paths
+
+
+# Run every table and chart of one report on a single pooled connection
+def run_report(name, out_dir, table_formats, chart_formats):
+    report = REPORTS[name]
+    paths = []
+    with pooled_connection(queries.REPORT_DATABASE, read_only=True) as conn:  # A replica when one is healthy
+        for table_name, headers, query in report["tables"]:
+            if table_formats:
+                paths += write_table(conn, query, headers,
+                                     os.path.join(out_dir, table_name), table_formats)
+        for chart_name, query, draw in report["charts"]:
+            if chart_formats:
+                paths += write_chart(conn, query, draw,
+                                     os.path.join(out_dir, chart_name), chart_formats)
+    return paths
+
+
+# Run the reports concurrently; the batch takes as long as its slowest report
+def run_reports(reports=None, out_dir="reports", table_formats=("csv",),
+                chart_formats=("png",), max_workers=None):
+    reports = list(reports or REPORTS)
+    os.makedirs(out_dir, exist_ok=True)
+
+    outputs = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(reports)) as executor:
+        futures = {executor.submit(run_report, name, out_dir, table_formats, chart_formats): name
+                   for name in reports}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                outputs[name] = future.result()
+            except Exception as err:  # One failed report (database, pyarrow, matplotlib) mustn't stop the rest
+                failures[name] = err
+                logger.error(f"Report '{name}' failed: {err!r}")
+
+    return outputs, failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write the winery reports to files.")
+    parser.add_argument("--reports", nargs="+", choices=list(REPORTS), default=list(REPORTS),
+                        help="Reports to run (default: all)")
+    parser.add_argument("--out", default="reports", help="Output directory")
+    parser.add_argument("--format", nargs="*", choices=TABLE_FORMATS, default=["csv"],
+                        dest="table_formats", help="Table formats")
+    parser.add_argument("--chart-format", nargs="*", choices=CHART_FORMATS, default=["png"],
+                        dest="chart_formats", help="Chart formats")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Concurrent reports (default: one per report)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    try:
+        outputs, failures = run_reports(args.reports, args.out, args.table_formats,
+                                        args.chart_formats, args.workers)
+    finally:
+        close_pools()
+        query_stats.log_summary()  # Busiest report statements to query_log.txt
+
+    for name, paths in outputs.items():
+        for path in paths:
+            print(f"{name}: {path}")
+    for name, err in failures.items():
+        print(f"[ERROR] {name}: {err}")
+
+    print(f"Finished {len(outputs)} of {len(args.reports)} reports "
+          f"in {time.perf_counter() - start:.2f}s.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
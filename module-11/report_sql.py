@@ -0,0 +1,248 @@
+#   Title: report_sql.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: SQL for the winery reports, shared by the menu and report tooling.
+#   Source: Range optimization - https://dev.mysql.com/doc/refman/8.0/en/range-optimization.html
+
+# Report queries filter and group on bare (or generated) date columns rather than
+# wrapping them in YEAR()/QUARTER()/DATE_FORMAT(), so the indexes created in
+# database_setup.create_tables can be used.
+
+
+# Supplier name, dates and total delay days per order date
+SUPPLIER_DELIVERY_SQL = """
+SELECT
+    DATE_FORMAT(s.order_date, '%m-%d-%Y') AS order_day,
+    sup.supplier_name,
+    ANY_VALUE(DATE_FORMAT(s.expected_date, '%m-%d-%Y')) as expected_date,
+    ANY_VALUE(DATE_FORMAT(s.delivery_date, '%m-%d-%Y')) as delivery_date,
+    SUM(DATEDIFF(s.delivery_date, s.expected_date)) AS total_delay_days
+FROM supply s
+JOIN supplier sup ON s.supplier_id = sup.supplier_id
+GROUP BY s.order_date, sup.supplier_id
+ORDER BY MIN(s.order_month) ASC, total_delay_days DESC;
+"""
+
+# Total delay days per month and supplier, for the supplier chart
+SUPPLIER_TRENDS_SQL = """
+SELECT
+    DATE_FORMAT(s.order_month, '%Y-%m') AS order_month,
+    sup.supplier_name,
+    SUM(DATEDIFF(s.delivery_date, s.expected_date)) AS total_delay_days
+FROM supply s
+JOIN supplier sup ON s.supplier_id = sup.supplier_id
+GROUP BY s.order_month, sup.supplier_id
+ORDER BY s.order_month ASC;
+"""
+
+# Sale date, quantity, wine type and distributor for every sale
+WINE_PERFORMANCE_SQL = """
+SELECT
+    DATE_FORMAT(s.sale_date, '%m-%d-%Y') AS sale_date,
+    s.sale_id,
+    s.quantity,
+    wt.wine_type_name,
+    d.distributor_name
+FROM sales s
+JOIN wines w ON s.wine_id = w.wine_id
+JOIN wine_type wt ON w.wine_type_id = wt.wine_type_id
+JOIN distributor d ON s.distributor_id = d.distributor_id
+ORDER BY s.sale_date ASC, s.sale_id ASC, d.distributor_name ASC;
+"""
+
+# Monthly quantity sold per distributor and wine type, from the rollup
+WINE_MONTHLY_TOTALS_SQL = """
+SELECT
+    DATE_FORMAT(r.sale_month, '%m-%Y') AS sale_month,
+    d.distributor_name,
+    wt.wine_type_name,
+    r.sale_count,
+    r.total_quantity
+FROM sales_monthly_rollup r
+JOIN wine_type wt ON r.wine_type_id = wt.wine_type_id
+JOIN distributor d ON r.distributor_id = d.distributor_id
+WHERE r.sale_count > 0
+ORDER BY r.sale_month ASC, d.distributor_name ASC, wt.wine_type_name ASC;
+"""
+
+# Monthly quantity per distributor and wine type, for the sales chart
+SALES_TRENDS_SQL = """
+SELECT
+    DATE_FORMAT(r.sale_month, '%m-%Y') AS sale_month,
+    d.distributor_name,
+    wt.wine_type_name,
+    r.total_quantity
+FROM sales_monthly_rollup r
+JOIN wine_type wt ON r.wine_type_id = wt.wine_type_id
+JOIN distributor d ON r.distributor_id = d.distributor_id
+WHERE r.sale_count > 0
+ORDER BY r.sale_month ASC, d.distributor_name ASC, wt.wine_type_name ASC;
+"""
+
+# Hours per quarter for each employee, leaving out the quarter still in progress.
+# Reads the trigger-maintained quarterly summary instead of every work_hours row.
+EMPLOYEE_PERFORMANCE_SQL = """
+SELECT
+    e.first_name,
+    e.last_name,
+    SUM(CASE WHEN q.work_quarter = 1 THEN q.total_hours ELSE 0 END) AS Q1_total,
+    SUM(CASE WHEN q.work_quarter = 2 THEN q.total_hours ELSE 0 END) AS Q2_total,
+    SUM(CASE WHEN q.work_quarter = 3 THEN q.total_hours ELSE 0 END) AS Q3_total,
+    SUM(CASE WHEN q.work_quarter = 4 THEN q.total_hours ELSE 0 END) AS Q4_total
+FROM employee e
+JOIN work_hours_quarterly q ON e.employee_id = q.employee_id
+WHERE q.entry_count > 0
+  AND (q.work_year, q.work_quarter) <> (YEAR(CURDATE()), QUARTER(CURDATE()))
+GROUP BY e.employee_id
+ORDER BY e.employee_id ASC;
+"""
+
+# Every report query by name
+REPORT_QUERIES = {
+    "supplier_delivery": SUPPLIER_DELIVERY_SQL,
+    "supplier_trends": SUPPLIER_TRENDS_SQL,
+    "wine_performance": WINE_PERFORMANCE_SQL,
+    "wine_monthly_totals": WINE_MONTHLY_TOTALS_SQL,
+    "sales_trends": SALES_TRENDS_SQL,
+    "employee_performance": EMPLOYEE_PERFORMANCE_SQL,
+}
+
+# Parameterized variants, run as server-side prepared statements (see prepared_statements).
+# Date ranges are half-open: start <= date < end.
+
+# Supplier delivery performance for orders placed in a date range
+SUPPLIER_DELIVERY_BETWEEN_SQL = """
+SELECT
+    DATE_FORMAT(s.order_date, '%m-%d-%Y') AS order_day,
+    sup.supplier_name,
+    ANY_VALUE(DATE_FORMAT(s.expected_date, '%m-%d-%Y')) as expected_date,
+    ANY_VALUE(DATE_FORMAT(s.delivery_date, '%m-%d-%Y')) as delivery_date,
+    SUM(DATEDIFF(s.delivery_date, s.expected_date)) AS total_delay_days
+FROM supply s
+JOIN supplier sup ON s.supplier_id = sup.supplier_id
+WHERE s.order_date >= %s AND s.order_date < %s
+GROUP BY s.order_date, sup.supplier_id
+ORDER BY MIN(s.order_month) ASC, total_delay_days DESC;
+"""
+
+# Supplier delivery performance for one supplier in a date range
+SUPPLIER_DELIVERY_FOR_SUPPLIER_SQL = """
+SELECT
+    DATE_FORMAT(s.order_date, '%m-%d-%Y') AS order_day,
+    sup.supplier_name,
+    ANY_VALUE(DATE_FORMAT(s.expected_date, '%m-%d-%Y')) as expected_date,
+    ANY_VALUE(DATE_FORMAT(s.delivery_date, '%m-%d-%Y')) as delivery_date,
+    SUM(DATEDIFF(s.delivery_date, s.expected_date)) AS total_delay_days
+FROM supply s
+JOIN supplier sup ON s.supplier_id = sup.supplier_id
+WHERE s.supplier_id = %s AND s.order_date >= %s AND s.order_date < %s
+GROUP BY s.order_date, sup.supplier_id
+ORDER BY MIN(s.order_month) ASC, total_delay_days DESC;
+"""
+
+# Sales in a date range
+WINE_PERFORMANCE_BETWEEN_SQL = """
+SELECT
+    DATE_FORMAT(s.sale_date, '%m-%d-%Y') AS sale_date,
+    s.sale_id,
+    s.quantity,
+    wt.wine_type_name,
+    d.distributor_name
+FROM sales s
+JOIN wines w ON s.wine_id = w.wine_id
+JOIN wine_type wt ON w.wine_type_id = wt.wine_type_id
+JOIN distributor d ON s.distributor_id = d.distributor_id
+WHERE s.sale_date >= %s AND s.sale_date < %s
+ORDER BY s.sale_date ASC, s.sale_id ASC, d.distributor_name ASC;
+"""
+
+# Sales for one distributor in a date range
+WINE_PERFORMANCE_FOR_DISTRIBUTOR_SQL = """
+SELECT
+    DATE_FORMAT(s.sale_date, '%m-%d-%Y') AS sale_date,
+    s.sale_id,
+    s.quantity,
+    wt.wine_type_name,
+    d.distributor_name
+FROM sales s
+JOIN wines w ON s.wine_id = w.wine_id
+JOIN wine_type wt ON w.wine_type_id = wt.wine_type_id
+JOIN distributor d ON s.distributor_id = d.distributor_id
+WHERE s.distributor_id = %s AND s.sale_date >= %s AND s.sale_date < %s
+ORDER BY s.sale_date ASC, s.sale_id ASC;
+"""
+
+# Monthly totals for months in a date range, from the rollup
+WINE_MONTHLY_TOTALS_BETWEEN_SQL = """
+SELECT
+    DATE_FORMAT(r.sale_month, '%m-%Y') AS sale_month,
+    d.distributor_name,
+    wt.wine_type_name,
+    r.sale_count,
+    r.total_quantity
+FROM sales_monthly_rollup r
+JOIN wine_type wt ON r.wine_type_id = wt.wine_type_id
+JOIN distributor d ON r.distributor_id = d.distributor_id
+WHERE r.sale_month >= %s AND r.sale_month < %s AND r.sale_count > 0
+ORDER BY r.sale_month ASC, d.distributor_name ASC, wt.wine_type_name ASC;
+"""
+
+# Monthly totals for one distributor in a date range, from the rollup
+WINE_MONTHLY_TOTALS_FOR_DISTRIBUTOR_SQL = """
+SELECT
+    DATE_FORMAT(r.sale_month, '%m-%Y') AS sale_month,
+    d.distributor_name,
+    wt.wine_type_name,
+    r.sale_count,
+    r.total_quantity
+FROM sales_monthly_rollup r
+JOIN wine_type wt ON r.wine_type_id = wt.wine_type_id
+JOIN distributor d ON r.distributor_id = d.distributor_id
+WHERE r.distributor_id = %s AND r.sale_month >= %s AND r.sale_month < %s AND r.sale_count > 0
+ORDER BY r.sale_month ASC, wt.wine_type_name ASC;
+"""
+
+# Hours per quarter for each employee, for work dates in a range. Reads work_hours
+# itself (pruned to the range) so ranges that don't start on a quarter stay exact.
+EMPLOYEE_PERFORMANCE_BETWEEN_SQL = """
+SELECT
+    e.first_name,
+    e.last_name,
+    SUM(CASE WHEN QUARTER(wh.work_date) = 1 THEN wh.hours_worked ELSE 0 END) AS Q1_total,
+    SUM(CASE WHEN QUARTER(wh.work_date) = 2 THEN wh.hours_worked ELSE 0 END) AS Q2_total,
+    SUM(CASE WHEN QUARTER(wh.work_date) = 3 THEN wh.hours_worked ELSE 0 END) AS Q3_total,
+    SUM(CASE WHEN QUARTER(wh.work_date) = 4 THEN wh.hours_worked ELSE 0 END) AS Q4_total
+FROM employee e
+JOIN work_hours wh ON e.employee_id = wh.employee_id
+WHERE wh.work_date >= %s AND wh.work_date < %s
+GROUP BY e.employee_id
+ORDER BY e.employee_id ASC;
+"""
+
+# Quarterly hours per employee for one year, for payroll
+EMPLOYEE_QUARTERLY_HOURS_SQL = """
+SELECT
+    e.employee_id,
+    e.first_name,
+    e.last_name,
+    q.work_quarter,
+    q.total_hours,
+    q.entry_count
+FROM work_hours_quarterly q
+JOIN employee e ON q.employee_id = e.employee_id
+WHERE q.work_year = %s AND q.entry_count > 0
+ORDER BY e.employee_id ASC, q.work_quarter ASC;
+"""
+
+# Every statement the prepared-statement registry knows, by name
+PREPARED_REPORTS = {
+    **REPORT_QUERIES,
+    "supplier_delivery_between": SUPPLIER_DELIVERY_BETWEEN_SQL,
+    "supplier_delivery_for_supplier": SUPPLIER_DELIVERY_FOR_SUPPLIER_SQL,
+    "wine_performance_between": WINE_PERFORMANCE_BETWEEN_SQL,
+    "wine_performance_for_distributor": WINE_PERFORMANCE_FOR_DISTRIBUTOR_SQL,
+    "wine_monthly_totals_between": WINE_MONTHLY_TOTALS_BETWEEN_SQL,
+    "wine_monthly_totals_for_distributor": WINE_MONTHLY_TOTALS_FOR_DISTRIBUTOR_SQL,
+    "employee_performance_between": EMPLOYEE_PERFORMANCE_BETWEEN_SQL,
+    "employee_quarterly_hours": EMPLOYEE_QUARTERLY_HOURS_SQL,
+}
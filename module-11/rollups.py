@@ -0,0 +1,256 @@
+#   Title: rollups.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Pre-aggregated summary tables kept current as sales are written.
+#   Source: Triggers - https://dev.mysql.com/doc/refman/8.0/en/trigger-syntax.html
+
+
+# Import Statements
+from datetime import date
+
+
+# Monthly sales per distributor and wine type (sale_month is the first day of the month)
+SALES_ROLLUP_TABLE = """
+    CREATE TABLE sales_monthly_rollup (
+        sale_month DATE NOT NULL,
+        distributor_id INT NOT NULL,
+        wine_type_id INT NOT NULL,
+        total_quantity INT NOT NULL,
+        sale_count INT NOT NULL,
+        PRIMARY KEY (sale_month, distributor_id, wine_type_id),
+        CONSTRAINT fk_sales_rollup_distributor FOREIGN KEY (distributor_id)
+            REFERENCES distributor(distributor_id),
+        CONSTRAINT fk_sales_rollup_wine_type FOREIGN KEY (wine_type_id)
+            REFERENCES wine_type(wine_type_id)
+    )
+"""
+
+# Triggers that apply each sales change to its rollup row
+SALES_ROLLUP_TRIGGERS = {
+    # Add a new sale to its month
+    "trg_sales_rollup_insert": """
+        CREATE TRIGGER trg_sales_rollup_insert AFTER INSERT ON sales
+        FOR EACH ROW
+            INSERT INTO sales_monthly_rollup
+                (sale_month, distributor_id, wine_type_id, total_quantity, sale_count)
+            SELECT DATE_FORMAT(NEW.sale_date, '%Y-%m-01'), NEW.distributor_id,
+                   w.wine_type_id, NEW.quantity, 1
+            FROM wines w
+            WHERE w.wine_id = NEW.wine_id
+            ON DUPLICATE KEY UPDATE
+                total_quantity = total_quantity + NEW.quantity,
+                sale_count = sale_count + 1
+    """,
+    # Move a corrected sale out of its old month and into its new one
+    "trg_sales_rollup_update": """
+        CREATE TRIGGER trg_sales_rollup_update AFTER UPDATE ON sales
+        FOR EACH ROW
+        BEGIN
+            UPDATE sales_monthly_rollup r
+            JOIN wines w ON w.wine_id = OLD.wine_id
+            SET r.total_quantity = r.total_quantity - OLD.quantity,
+                r.sale_count = r.sale_count - 1
+            WHERE r.sale_month = DATE_FORMAT(OLD.sale_date, '%Y-%m-01')
+              AND r.distributor_id = OLD.distributor_id
+              AND r.wine_type_id = w.wine_type_id;
+
+            INSERT INTO sales_monthly_rollup
+                (sale_month, distributor_id, wine_type_id, total_quantity, sale_count)
+            SELECT DATE_FORMAT(NEW.sale_date, '%Y-%m-01'), NEW.distributor_id,
+                   w.wine_type_id, NEW.quantity, 1
+            FROM wines w
+            WHERE w.wine_id = NEW.wine_id
+            ON DUPLICATE KEY UPDATE
+                total_quantity = total_quantity + NEW.quantity,
+                sale_count = sale_count + 1;
+        END
+    """,
+    # Take a deleted sale back out of its month
+    "trg_sales_rollup_delete": """
+        CREATE TRIGGER trg_sales_rollup_delete AFTER DELETE ON sales
+        FOR EACH ROW
+            UPDATE sales_monthly_rollup r
+            JOIN wines w ON w.wine_id = OLD.wine_id
+            SET r.total_quantity = r.total_quantity - OLD.quantity,
+                r.sale_count = r.sale_count - 1
+            WHERE r.sale_month = DATE_FORMAT(OLD.sale_date, '%Y-%m-01')
+              AND r.distributor_id = OLD.distributor_id
+              AND r.wine_type_id = w.wine_type_id
+    """
+}
+
+
+# Hours per employee and calendar quarter
+WORK_HOURS_QUARTERLY_TABLE = """
+    CREATE TABLE work_hours_quarterly (
+        employee_id INT NOT NULL,
+        work_year SMALLINT NOT NULL,
+        work_quarter TINYINT NOT NULL,
+        total_hours INT NOT NULL,
+        entry_count INT NOT NULL,
+        PRIMARY KEY (employee_id, work_year, work_quarter),
+        CONSTRAINT fk_work_hours_quarterly_employee FOREIGN KEY (employee_id)
+            REFERENCES employee(employee_id)
+    )
+"""
+
+# Triggers that apply each work_hours change to its quarter row
+WORK_HOURS_QUARTERLY_TRIGGERS = {
+    # Add new hours to their quarter
+    "trg_work_hours_quarterly_insert": """
+        CREATE TRIGGER trg_work_hours_quarterly_insert AFTER INSERT ON work_hours
+        FOR EACH ROW
+            INSERT INTO work_hours_quarterly
+                (employee_id, work_year, work_quarter, total_hours, entry_count)
+            VALUES (NEW.employee_id, YEAR(NEW.work_date), QUARTER(NEW.work_date),
+                    NEW.hours_worked, 1)
+            ON DUPLICATE KEY UPDATE
+                total_hours = total_hours + NEW.hours_worked,
+                entry_count = entry_count + 1
+    """,
+    # Move corrected hours out of their old quarter and into the new one
+    "trg_work_hours_quarterly_update": """
+        CREATE TRIGGER trg_work_hours_quarterly_update AFTER UPDATE ON work_hours
+        FOR EACH ROW
+        BEGIN
+            UPDATE work_hours_quarterly
+            SET total_hours = total_hours - OLD.hours_worked,
+                entry_count = entry_count - 1
+            WHERE employee_id = OLD.employee_id
+              AND work_year = YEAR(OLD.work_date)
+              AND work_quarter = QUARTER(OLD.work_date);
+
+            INSERT INTO work_hours_quarterly
+                (employee_id, work_year, work_quarter, total_hours, entry_count)
+            VALUES (NEW.employee_id, YEAR(NEW.work_date), QUARTER(NEW.work_date),
+                    NEW.hours_worked, 1)
+            ON DUPLICATE KEY UPDATE
+                total_hours = total_hours + NEW.hours_worked,
+                entry_count = entry_count + 1;
+        END
+    """,
+    # Take deleted hours back out of their quarter
+    "trg_work_hours_quarterly_delete": """
+        CREATE TRIGGER trg_work_hours_quarterly_delete AFTER DELETE ON work_hours
+        FOR EACH ROW
+            UPDATE work_hours_quarterly
+            SET total_hours = total_hours - OLD.hours_worked,
+                entry_count = entry_count - 1
+            WHERE employee_id = OLD.employee_id
+              AND work_year = YEAR(OLD.work_date)
+              AND work_quarter = QUARTER(OLD.work_date)
+    """
+}
+
+
+# First day of the month after the one holding day
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+# Create the rollup triggers on an open cursor
+def create_sales_rollup_triggers(cursor):
+    for trigger_name, query in SALES_ROLLUP_TRIGGERS.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+        cursor.execute(query)
+        print(f"Trigger '{trigger_name}' created.")
+
+
+# Recompute the rollup for the given months ('YYYY-MM'), or for all of history.
+# Only needed for backfills or repairs, e.g. after bulk loads with triggers disabled
+# or after a wine changes wine type; normal inserts are kept current by the triggers.
+def refresh_sales_rollup(conn, months=None):
+    cursor = conn.cursor()
+
+    if months:
+        firsts = [date.fromisoformat(f"{month}-01") for month in months]
+        ranges = [(first, next_month(first)) for first in firsts]
+    else:
+        cursor.execute("SELECT MIN(sale_date), MAX(sale_date) FROM sales")
+        first, last = cursor.fetchone()
+        ranges = [(first.replace(day=1), next_month(last))] if first else []
+        cursor.execute("DELETE FROM sales_monthly_rollup")
+
+    for start, end in ranges:
+        # Month bounds are computed here so the SQL has no DATE_FORMAT patterns to escape;
+        # the date range lets the refresh read only the affected months of sales
+        params = {"start": start, "end": end}
+        cursor.execute("""
+            DELETE FROM sales_monthly_rollup
+            WHERE sale_month >= %(start)s AND sale_month < %(end)s
+        """, params)
+        cursor.execute("""
+            INSERT INTO sales_monthly_rollup
+                (sale_month, distributor_id, wine_type_id, total_quantity, sale_count)
+            SELECT s.sale_date - INTERVAL (DAYOFMONTH(s.sale_date) - 1) DAY AS sale_month,
+                   s.distributor_id, w.wine_type_id, SUM(s.quantity), COUNT(*)
+            FROM sales s
+            JOIN wines w ON s.wine_id = w.wine_id
+            WHERE s.sale_date >= %(start)s AND s.sale_date < %(end)s
+            GROUP BY sale_month, s.distributor_id, w.wine_type_id
+        """, params)
+
+    conn.commit()  # Commit changes to the database
+    cursor.close()
+
+
+# Create the quarterly hours triggers on an open cursor
+def create_work_hours_quarterly_triggers(cursor):
+    for trigger_name, query in WORK_HOURS_QUARTERLY_TRIGGERS.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+        cursor.execute(query)
+        print(f"Trigger '{trigger_name}' created.")
+
+
+# Recompute the quarterly hours for the given years, or for all of history.
+# Only needed for backfills or repairs; normal writes are kept current by the triggers.
+def refresh_work_hours_quarterly(conn, years=None):
+    cursor = conn.cursor()
+
+    if not years:
+        cursor.execute("SELECT YEAR(MIN(work_date)), YEAR(MAX(work_date)) FROM work_hours")
+        first, last = cursor.fetchone()
+        years = range(first, last + 1) if first else []
+        cursor.execute("DELETE FROM work_hours_quarterly")
+
+    for year in years:
+        # Date-range bounds so the refresh only reads (and prunes to) that year of work_hours
+        params = {"year": int(year), "start": f"{int(year)}-01-01", "end": f"{int(year) + 1}-01-01"}
+        cursor.execute("DELETE FROM work_hours_quarterly WHERE work_year = %(year)s", params)
+        cursor.execute("""
+            INSERT INTO work_hours_quarterly
+                (employee_id, work_year, work_quarter, total_hours, entry_count)
+            SELECT employee_id, YEAR(work_date), QUARTER(work_date) AS work_quarter,
+                   SUM(hours_worked), COUNT(*)
+            FROM work_hours
+            WHERE work_date >= %(start)s AND work_date < %(end)s
+            GROUP BY employee_id, YEAR(work_date), work_quarter
+        """, params)
+
+    conn.commit()  # Commit changes to the database
+    cursor.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import mysql.connector  # to connect
+    from db_config import pooled_connection, close_pools  # Import shared db_config file
+
+    parser = argparse.ArgumentParser(description="Backfill or rebuild the summary tables.")
+    parser.add_argument("table", choices=["sales_monthly_rollup", "work_hours_quarterly"])
+    parser.add_argument("--periods", nargs="+", default=None,
+                        help="Months (YYYY-MM) or years (YYYY) to rebuild; default is everything")
+    args = parser.parse_args()
+
+    try:
+        with pooled_connection("winery") as conn:  # Borrow a warm connection from the pool
+            if args.table == "sales_monthly_rollup":
+                refresh_sales_rollup(conn, args.periods)
+            else:
+                refresh_work_hours_quarterly(conn, args.periods)
+        print(f"Table '{args.table}' rebuilt.")
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+    finally:
+        close_pools()
@@ -0,0 +1,327 @@
+#   Title: sales_ingest.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Sales ingestion with validation, micro-batch group commit and batched inventory updates.
+#   Source: Locking reads - https://dev.mysql.com/doc/refman/8.0/en/innodb-locking-reads.html
+
+# Orders are validated on the caller's thread and queued. One writer thread takes
+# up to BATCH_SIZE orders (waiting at most BATCH_WAIT seconds for a batch to fill)
+# and writes them in a single transaction:
+#   1. lock the batch's wine rows once, in wine_id order (no deadlocks between batches)
+#   2. accept orders while stock lasts; the rest are rejected as out of stock
+#   3. insert the accepted sales with one multi-row INSERT
+#   4. apply the net inventory change per wine_id with one UPDATE
+# With four wines, one UPDATE per order would serialize every order on the same rows.
+
+# Usage: python sales_ingest.py orders.jsonl   (one JSON order per line, "-" for stdin)
+#   {"wine_id": 1, "distributor_id": 2, "quantity": 100, "sale_date": "2025-02-01", "status": "Ordered"}
+
+
+# Import Statements
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, datetime
+
+import mysql.connector  # to connect
+from mysql.connector import errorcode
+from db_config import pooled_connection, close_pools  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+
+BATCH_SIZE = 500  # Orders per transaction
+BATCH_WAIT = 0.005  # Seconds the writer waits for a batch to fill
+QUEUE_SIZE = 10000  # Pending orders before submit() blocks (backpressure)
+MAX_RETRIES = 3  # Attempts per batch on deadlock or lock wait timeout
+
+# Statuses that take bottles out of inventory (canceled orders don't)
+STOCK_STATUSES = ("Ordered", "Delivered")
+
+RETRY_ERRORS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+
+# An order that failed validation or couldn't be filled
+class SaleRejected(ValueError):
+    pass
+
+
+# Wine, distributor and status ids, loaded once and refreshed on a miss
+class ReferenceData:
+    def __init__(self, database="winery", min_refresh_interval=5.0):
+        self.database = database
+        self.min_refresh_interval = min_refresh_interval  # Bad ids can't trigger a reload per order
+        self._lock = threading.Lock()
+        self._loaded_at = 0.0
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        if not force and time.monotonic() - self._loaded_at < self.min_refresh_interval:
+            return
+        with pooled_connection(self.database) as conn:  # Borrow a warm connection from the pool
+            cursor = conn.cursor()
+            cursor.execute("SELECT wine_id FROM wines")
+            wines = {row[0] for row in cursor.fetchall()}
+            cursor.execute("SELECT distributor_id FROM distributor")
+            distributors = {row[0] for row in cursor.fetchall()}
+            cursor.execute("SELECT order_status_id, status_name FROM order_status")
+            statuses = {name: status_id for status_id, name in cursor.fetchall()}
+            cursor.close()
+        with self._lock:
+            self.wines, self.distributors, self.statuses = wines, distributors, statuses
+            self.stock_status_ids = {statuses[name] for name in STOCK_STATUSES if name in statuses}
+            self._loaded_at = time.monotonic()
+
+    def knows(self, wine_id, distributor_id):
+        return wine_id in self.wines and distributor_id in self.distributors
+
+
+def _positive_int(order, field):
+    value = order.get(field)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise SaleRejected(f"'{field}' must be a positive integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise SaleRejected(f"'{field}' must be a positive integer") from None
+    if value <= 0:
+        raise SaleRejected(f"'{field}' must be a positive integer")
+    return value
+
+
+# Check one order dict and return (quantity, sale_date, wine_id, distributor_id, status_id)
+def validate_order(order, reference):
+    if not isinstance(order, dict):
+        raise SaleRejected("order must be an object")
+    wine_id = _positive_int(order, "wine_id")
+    distributor_id = _positive_int(order, "distributor_id")
+    quantity = _positive_int(order, "quantity")
+
+    sale_date = order.get("sale_date") or date.today()
+    if isinstance(sale_date, str):
+        try:
+            sale_date = date.fromisoformat(sale_date)
+        except ValueError:
+            raise SaleRejected(f"'sale_date' is not a YYYY-MM-DD date: {sale_date!r}") from None
+    if isinstance(sale_date, datetime):
+        sale_date = sale_date.date()  # A datetime is a date too, but can't be compared with one
+    if not isinstance(sale_date, date):
+        raise SaleRejected("'sale_date' must be a date")
+    if sale_date > date.today():
+        raise SaleRejected("'sale_date' is in the future")
+
+    status = order.get("status", "Ordered")
+    if status not in reference.statuses:
+        raise SaleRejected(f"unknown order status {status!r}")
+
+    if not reference.knows(wine_id, distributor_id):
+        reference.refresh()  # Maybe added since we loaded; check once more
+        if wine_id not in reference.wines:
+            raise SaleRejected(f"unknown wine_id {wine_id}")
+        if distributor_id not in reference.distributors:
+            raise SaleRejected(f"unknown distributor_id {distributor_id}")
+
+    return quantity, sale_date, wine_id, distributor_id, reference.statuses[status]
+
+
+# Write one batch of validated orders in a single transaction. Returns the
+# accepted and out-of-stock (order, future) pairs.
+def write_batch(conn, batch, stock_status_ids):
+    cursor = conn.cursor()
+    try:
+        wine_ids = sorted({order[2] for order, _ in batch if order[4] in stock_status_ids})
+        stock = {}
+        if wine_ids:
+            placeholders = ", ".join(["%s"] * len(wine_ids))
+            cursor.execute(f"SELECT wine_id, inventory_quantity FROM wines "
+                           f"WHERE wine_id IN ({placeholders}) ORDER BY wine_id FOR UPDATE", wine_ids)
+            stock = dict(cursor.fetchall())
+
+        # Fill orders in arrival order while stock lasts
+        accepted, short = [], []
+        used = {}
+        for order, future in batch:
+            quantity, _, wine_id, _, status_id = order
+            if status_id in stock_status_ids:
+                if used.get(wine_id, 0) + quantity > stock.get(wine_id, 0):
+                    short.append((order, future))
+                    continue
+                used[wine_id] = used.get(wine_id, 0) + quantity
+            accepted.append((order, future))
+
+        if accepted:
+            cursor.executemany(
+                "INSERT INTO sales (quantity, sale_date, wine_id, distributor_id, order_status_id) "
+                "VALUES (%s, %s, %s, %s, %s)", [order for order, _ in accepted])
+
+        # One UPDATE for the net change of every wine in the batch
+        used = {wine_id: quantity for wine_id, quantity in used.items() if quantity}
+        if used:
+            cases = " ".join(["WHEN %s THEN %s"] * len(used))
+            placeholders = ", ".join(["%s"] * len(used))
+            params = [value for item in sorted(used.items()) for value in item] + sorted(used)
+            cursor.execute(f"UPDATE wines SET inventory_quantity = inventory_quantity - "
+                           f"CASE wine_id {cases} END WHERE wine_id IN ({placeholders})", params)
+
+        conn.commit()  # One commit (one log flush) for the whole batch
+        return accepted, short
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+# Accepts orders from any thread and group-commits them from one writer thread
+class SalesIngestor:
+    def __init__(self, database="winery", batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT,
+                 queue_size=QUEUE_SIZE):
+        self.database = database
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.reference = ReferenceData(database)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.batches = 0
+
+        self._writer = threading.Thread(target=self._run, name="sales-ingest-writer", daemon=True)
+        self._writer.start()
+
+    # Queue one order; the Future resolves to the stored row values once committed,
+    # or raises SaleRejected / the database error
+    def submit(self, order):
+        if self._closed:
+            raise RuntimeError("SalesIngestor is closed")
+        future = Future()
+        try:
+            validated = validate_order(order, self.reference)
+        except SaleRejected as err:
+            with self._stats_lock:
+                self.rejected += 1
+            future.set_exception(err)
+            return future
+        self._queue.put((validated, future))  # Blocks while the writer is behind
+        return future
+
+    def submit_many(self, orders):
+        return [self.submit(order) for order in orders]
+
+    # Collect up to batch_size orders, waiting at most batch_wait after the first
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Finish this batch, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                with pooled_connection(self.database) as conn:  # Borrow a warm connection from the pool
+                    accepted, short = write_batch(conn, batch, self.reference.stock_status_ids)
+                break
+            except Exception as err:
+                retry = isinstance(err, mysql.connector.Error) and err.errno in RETRY_ERRORS
+                if retry and attempt < MAX_RETRIES:
+                    time.sleep(0.01 * attempt)
+                    continue
+                logger.error(f"Sales batch of {len(batch)} failed: {err}")
+                for _, future in batch:
+                    future.set_exception(err)  # The writer keeps going with the next batch
+                return
+            except BaseException as err:
+                # The writer is going down; don't leave callers blocked on .result()
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(err)
+                raise
+
+        with self._stats_lock:
+            self.batches += 1
+            self.accepted += len(accepted)
+            self.rejected += len(short)
+        for order, future in accepted:
+            future.set_result(order)
+        for order, future in short:
+            future.set_exception(SaleRejected(f"not enough stock of wine_id {order[2]}"))
+
+    # Write everything queued, then stop the writer
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Ingest a stream of JSON lines and report accepted/rejected counts
+def ingest_lines(lines, database="winery"):
+    start = time.perf_counter()
+    futures = []
+    invalid = 0
+    with SalesIngestor(database) as ingestor:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                order = json.loads(line)
+            except json.JSONDecodeError as err:
+                print(f"[REJECTED] line {line_number}: invalid JSON ({err})")
+                invalid += 1
+                continue
+            futures.append((line_number, ingestor.submit(order)))
+
+    for line_number, future in futures:
+        error = future.exception()
+        if error is not None:
+            print(f"[REJECTED] line {line_number}: {error}")
+
+    elapsed = time.perf_counter() - start
+    rejected = ingestor.rejected + invalid
+    rate = ingestor.accepted / elapsed if elapsed else 0
+    print(f"\n{ingestor.accepted:,} sales recorded, {rejected:,} rejected, "
+          f"{ingestor.batches:,} batches in {elapsed:.2f}s ({rate:,.0f} sales/sec).")
+    return ingestor.accepted, rejected
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "-"
+    try:
+        if path == "-":
+            ingest_lines(sys.stdin)
+        else:
+            with open(path) as orders:
+                ingest_lines(orders)
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+        logger.error(f"Sales ingestion failed: {err}")
+    finally:
+        close_pools()
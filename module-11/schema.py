@@ -0,0 +1,231 @@
+#   Title: schema.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Current table definitions for the Bacchus Winery database.
+
+# This is the schema a fresh database is created with. Databases created from an
+# older version of this file are brought up to date by migrations.py.
+
+
+# Import Statements
+import re
+
+from rollups import SALES_ROLLUP_TABLE, WORK_HOURS_QUARTERLY_TABLE  # Import shared rollup tables
+from report_cache import TABLE_VERSIONS_TABLE  # Import report cache tables
+
+# Table name -> CREATE TABLE statement, in creation order
+TABLES = {
+    # Stores winery information
+    "winery": """
+        CREATE TABLE winery (
+            winery_id INT AUTO_INCREMENT PRIMARY KEY,
+            winery_name VARCHAR(75) NOT NULL,
+            winery_phone VARCHAR(20) NOT NULL,
+            winery_email VARCHAR(100) NOT NULL UNIQUE
+        )
+    """,
+    # Stores supplier details
+    "supplier": """
+        CREATE TABLE supplier (
+            supplier_id INT AUTO_INCREMENT PRIMARY KEY,
+            supplier_name VARCHAR(75) NOT NULL,
+            supplier_phone VARCHAR(20) NOT NULL,
+            supplier_email VARCHAR(100) NOT NULL UNIQUE
+        )
+    """,
+    # Stores distributor details
+    "distributor": """
+        CREATE TABLE distributor (
+            distributor_id INT AUTO_INCREMENT PRIMARY KEY,
+            distributor_name VARCHAR(75) NOT NULL,
+            distributor_phone VARCHAR(20) NOT NULL,
+            distributor_email VARCHAR(100) NOT NULL UNIQUE
+        )
+    """,
+    # Stores job positions
+    "job_position": """
+        CREATE TABLE job_position (
+            position_id INT AUTO_INCREMENT PRIMARY KEY,
+            position_name VARCHAR(75) UNIQUE NOT NULL,
+            salary_min DECIMAL(10,2) NOT NULL,
+            salary_max DECIMAL(10,2) NOT NULL
+        )
+    """,
+    # Stores employees first so department can reference it
+    "employee": """
+        CREATE TABLE employee (
+            employee_id INT AUTO_INCREMENT PRIMARY KEY,
+            first_name VARCHAR(75) NOT NULL,
+            last_name VARCHAR(75) NOT NULL,
+            department_id INT NULL,
+            winery_id INT NOT NULL,
+            position_id INT NOT NULL,
+            CONSTRAINT fk_employee_winery FOREIGN KEY (winery_id) 
+                REFERENCES winery(winery_id),
+            CONSTRAINT fk_employee_job_position FOREIGN KEY (position_id) 
+                REFERENCES job_position(position_id)
+        )
+    """,
+    # Stores department details and allows manager id to be null initially
+    "department": """
+        CREATE TABLE department (
+            department_id INT AUTO_INCREMENT PRIMARY KEY,
+            department_name VARCHAR(75) UNIQUE NOT NULL,
+            manager_id INT NULL,
+            CONSTRAINT fk_department_employee FOREIGN KEY (manager_id) 
+                REFERENCES employee(employee_id) ON DELETE SET NULL
+        )
+    """,
+    # Stores different types of wine
+    "wine_type": """
+        CREATE TABLE wine_type (
+            wine_type_id INT AUTO_INCREMENT PRIMARY KEY,
+            wine_type_name VARCHAR(75) UNIQUE NOT NULL
+        )
+    """,
+    # Stores different grape varieties
+    "grape_variety": """
+        CREATE TABLE grape_variety (
+            grape_variety_id INT AUTO_INCREMENT PRIMARY KEY,
+            grape_variety_name VARCHAR(75) UNIQUE NOT NULL
+        )
+    """,
+    # Links wine types to grape varieties
+    "wine_grape_variety": """
+        CREATE TABLE wine_grape_variety (
+            wine_type_id INT NOT NULL,
+            grape_variety_id INT NOT NULL,
+            PRIMARY KEY (wine_type_id, grape_variety_id),
+            CONSTRAINT fk_wine_grape_variety_wine_type FOREIGN KEY (wine_type_id) 
+                REFERENCES wine_type(wine_type_id),
+            CONSTRAINT fk_wine_grape_variety_grape_variety FOREIGN KEY (grape_variety_id) 
+                REFERENCES grape_variety(grape_variety_id)
+        )
+    """,
+    # Stores information about different wines
+    "wines": """
+        CREATE TABLE wines (
+            wine_id INT AUTO_INCREMENT PRIMARY KEY,
+            inventory_quantity INT NOT NULL,
+            price_per_bottle DECIMAL(10,2) NOT NULL,
+            vintage_year YEAR NOT NULL,
+            winery_id INT NOT NULL,
+            wine_type_id INT NOT NULL,
+            CONSTRAINT fk_wines_winery FOREIGN KEY(winery_id) 
+                REFERENCES winery(winery_id),
+            CONSTRAINT fk_wines_wine_type FOREIGN KEY(wine_type_id) 
+                REFERENCES wine_type(wine_type_id)
+        )
+    """,
+    # Stores supply orders
+    "supply_type": """
+        CREATE TABLE supply_type (
+        supply_type_id INT AUTO_INCREMENT PRIMARY KEY,
+        type_name VARCHAR(75) NOT NULL UNIQUE
+        )
+    """,
+    # Stores supply orders
+    "supply": """
+        CREATE TABLE supply (
+            supply_id INT AUTO_INCREMENT PRIMARY KEY,
+            order_date DATE NOT NULL,
+            expected_date DATE NOT NULL,
+            delivery_date DATE NOT NULL,
+            supplier_id INT NOT NULL,
+            winery_id INT NOT NULL,
+            order_month DATE GENERATED ALWAYS AS
+                (order_date - INTERVAL (DAYOFMONTH(order_date) - 1) DAY) VIRTUAL,
+            INDEX idx_supply_supplier_order (supplier_id, order_date, expected_date, delivery_date),
+            INDEX idx_supply_month_supplier (order_month, supplier_id, expected_date, delivery_date),
+            CONSTRAINT fk_supply_winery FOREIGN KEY(winery_id) 
+                REFERENCES winery(winery_id),
+            CONSTRAINT fk_supply_supplier FOREIGN KEY(supplier_id) 
+                REFERENCES supplier(supplier_id)
+        )
+    """,
+    # Stores details of each supply order
+    "supply_details": """
+        CREATE TABLE supply_details (
+            supply_id INT NOT NULL,
+            supply_type_id INT NOT NULL,
+            quantity INT NOT NULL,
+            PRIMARY KEY (supply_id, supply_type_id),
+            CONSTRAINT fk_supply_details_supply FOREIGN KEY (supply_id) 
+                REFERENCES supply(supply_id),
+            CONSTRAINT fk_supply_details_supply_type FOREIGN KEY (supply_type_id) 
+                REFERENCES supply_type(supply_type_id)
+        )
+    """,
+    # Stores different order statuses (Ordered, Delivered, Canceled)
+    "order_status": """
+        CREATE TABLE order_status (
+        order_status_id INT AUTO_INCREMENT PRIMARY KEY,
+        status_name VARCHAR(50) UNIQUE NOT NULL
+        )
+    """,
+    # Stores sales transactions
+    "sales": """
+        CREATE TABLE sales (
+            sale_id INT AUTO_INCREMENT PRIMARY KEY,
+            quantity INT NOT NULL,
+            sale_date DATE NOT NULL,
+            wine_id INT NOT NULL,
+            distributor_id INT NOT NULL,
+            order_status_id INT NOT NULL,
+            INDEX idx_sales_date (sale_date, wine_id, distributor_id, quantity),
+            CONSTRAINT fk_sales_wines FOREIGN KEY(wine_id) 
+                REFERENCES wines(wine_id),
+            CONSTRAINT fk_sales_distributor FOREIGN KEY(distributor_id) 
+                REFERENCES distributor(distributor_id),
+            CONSTRAINT fk_sales_order_status FOREIGN KEY(order_status_id) 
+                REFERENCES order_status(order_status_id)
+        )
+    """,
+    # Stores employee work hours
+    "work_hours": """
+        CREATE TABLE work_hours (
+            work_id INT AUTO_INCREMENT PRIMARY KEY,
+            work_date DATE NOT NULL,
+            hours_worked INT NOT NULL,
+            employee_id INT NOT NULL,
+            INDEX idx_work_hours_employee_date (employee_id, work_date, hours_worked),
+            CONSTRAINT fk_work_hours_employee FOREIGN KEY(employee_id) 
+                REFERENCES employee(employee_id)
+        )
+    """,
+    # Stores monthly sales totals kept current by triggers on sales
+    "sales_monthly_rollup": SALES_ROLLUP_TABLE,
+    # Stores quarterly hours per employee kept current by triggers on work_hours
+    "work_hours_quarterly": WORK_HOURS_QUARTERLY_TABLE,
+    # Stores a change counter per table for the report cache
+    "table_versions": TABLE_VERSIONS_TABLE
+}
+
+# Finds "FOREIGN KEY (column) REFERENCES parent(column)" clauses
+FOREIGN_KEY_PATTERN = re.compile(
+    r"FOREIGN\s+KEY\s*\(\s*(\w+)\s*\)\s*REFERENCES\s+(\w+)\s*\(\s*(\w+)\s*\)", re.IGNORECASE)
+
+
+# Table -> set of tables it references, read from the CREATE TABLE statements
+def table_dependencies(tables=TABLES):
+    return {name: {parent for _, parent, _ in FOREIGN_KEY_PATTERN.findall(ddl)
+                   if parent != name}
+            for name, ddl in tables.items()}
+
+
+# Group names into levels where everything in a level only depends on earlier
+# levels, so each level can run concurrently (Kahn's algorithm, level by level)
+def dependency_levels(dependencies):
+    remaining = {name: set(parents) & set(dependencies)
+                 for name, parents in dependencies.items()}
+    levels = []
+    while remaining:
+        ready = sorted(name for name, parents in remaining.items() if not parents)
+        if not ready:
+            raise ValueError(f"Circular dependency between: {', '.join(sorted(remaining))}")
+        levels.append(ready)
+        for name in ready:
+            del remaining[name]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+    return levels
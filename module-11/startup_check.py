@@ -0,0 +1,62 @@
+#   Title: startup_check.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Fails if importing the report menu gets slower or pulls in the charting stack.
+#   Source: -X importtime - https://docs.python.org/3/using/cmdline.html#cmdoption-X
+
+# Usage: python startup_check.py [--budget-ms 300] [--module queries]
+
+
+# Import Statements
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 300  # Cumulative import time allowed for the menu module
+RUNS = 3  # Best of several runs, to ignore a cold disk cache
+
+# Heavy packages that should only load once a chart, export or replica report is requested
+LAZY_PACKAGES = ("matplotlib", "numpy", "pyarrow", "duckdb")
+
+
+# Import the module in a fresh interpreter and return {package: cumulative microseconds}
+def measure_imports(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True)
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, package = line.split("|")
+        timings[package.strip()] = int(cumulative)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check report menu startup time.")
+    parser.add_argument("--module", default="queries")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    runs = [measure_imports(args.module) for _ in range(RUNS)]
+    best_ms = min(run[args.module] for run in runs) / 1000
+    eager = sorted({name.split(".")[0] for name in runs[0]} & set(LAZY_PACKAGES))
+
+    print(f"import {args.module}: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if best_ms > args.budget_ms:
+        print(f"[FAIL] import time is over budget by {best_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if eager:
+        print(f"[FAIL] imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
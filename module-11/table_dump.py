@@ -0,0 +1,188 @@
+#   Title: table_dump.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Parallel, snapshot-consistent dump of every winery table to compressed CSV files.
+#   Source: Consistent snapshots - https://dev.mysql.com/doc/refman/8.0/en/commit.html
+
+# All worker connections open their transactions WITH CONSISTENT SNAPSHOT while a
+# global read lock is briefly held (the same trick mysqldump --single-transaction
+# uses with --master-data), so every table is read as of one point in time. Without
+# the RELOAD privilege the lock isn't available and the dump falls back to one
+# snapshot connection, which is still consistent but reads tables one at a time.
+
+# Files are <table>.csv.gz in LOAD DATA format (NULL written as \N, generated
+# columns left out) plus manifest.json with the columns and row counts.
+
+# Usage: python table_dump.py --out winery_dump [--workers 4] [--level 3]
+
+
+# Import Statements
+import argparse
+import csv
+import gzip
+import json
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector  # to connect
+from mysql.connector import errorcode
+from db_config import connect_db, get_pool, close_pools, POOL_SIZE  # Import shared db_config file
+from log_config import logger  # Import shared logging configuration
+from bulk_loader import DEFAULT_CHUNK_SIZE  # Import shared bulk loader
+
+COMPRESS_LEVEL = 3  # gzip level; low levels keep the dump disk-bound rather than CPU-bound
+
+
+# Base tables in the current database with their stored columns, largest first
+def dump_plan(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT t.TABLE_NAME, c.COLUMN_NAME
+        FROM information_schema.TABLES t
+        JOIN information_schema.COLUMNS c
+          ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+        WHERE t.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'
+          AND c.EXTRA NOT LIKE '%GENERATED%'
+        ORDER BY t.DATA_LENGTH DESC, t.TABLE_NAME, c.ORDINAL_POSITION
+    """)
+    plan = {}
+    for table, column in cursor.fetchall():
+        plan.setdefault(table, []).append(column)
+    cursor.close()
+    return plan
+
+
+# Open one snapshot transaction per connection, all at the same point in time if we can lock.
+# Returns the connections holding a snapshot and whether the global read lock was taken.
+def start_snapshots(connections, database):
+    coordinator = connect_db(database=database)
+    cursor = coordinator.cursor()
+    try:
+        try:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")  # Writes wait until UNLOCK below
+            locked = True
+        except mysql.connector.Error as err:
+            if err.errno not in (errorcode.ER_SPECIFIC_ACCESS_DENIED_ERROR,
+                                 errorcode.ER_DBACCESS_DENIED_ERROR):
+                raise
+            locked = False
+
+        snapshot_connections = connections if locked else connections[:1]
+        for conn in snapshot_connections:
+            snapshot_cursor = conn.cursor()
+            snapshot_cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            snapshot_cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+            snapshot_cursor.close()
+
+        if locked:
+            cursor.execute("UNLOCK TABLES")
+        else:
+            logger.warning("No RELOAD privilege for FLUSH TABLES WITH READ LOCK; "
+                           "dumping from a single snapshot connection.")
+        return snapshot_connections, locked
+    finally:
+        cursor.close()
+        coordinator.close()
+
+
+# Stream one table into <out_dir>/<table>.csv.gz and return its row count
+def dump_table(conn, table, columns, out_dir, batch_size=DEFAULT_CHUNK_SIZE,
+               compress_level=COMPRESS_LEVEL):
+    path = os.path.join(out_dir, f"{table}.csv.gz")
+    cursor = conn.cursor(buffered=False)  # Unbuffered: rows stream in batches
+    rows = 0
+    try:
+        cursor.execute(f"SELECT {', '.join(f'`{column}`' for column in columns)} FROM `{table}`")
+        with gzip.open(path, "wt", newline="", compresslevel=compress_level) as dump_file:
+            writer = csv.writer(dump_file, lineterminator="\r\n")  # Same \r\n line ending as bulk_loader's LOAD DATA files
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                writer.writerows(["\\N" if field is None else field for field in row]
+                                 for row in batch)  # \N loads as NULL
+                rows += len(batch)
+    finally:
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+    return rows
+
+
+# Dump every table in the database to out_dir, tables spread over worker connections
+def dump_tables(out_dir, database="winery", workers=POOL_SIZE, compress_level=COMPRESS_LEVEL):
+    os.makedirs(out_dir, exist_ok=True)
+    pool = get_pool(database)
+    workers = max(1, min(workers, pool.max_size))
+    started = time.perf_counter()
+
+    connections = []
+    try:
+        connections = [pool.acquire() for _ in range(workers)]
+        plan = dump_plan(connections[0])
+        snapshot_connections, locked = start_snapshots(connections, database)
+
+        # Largest tables first, so the last few workers aren't left with one big table
+        pending = queue.SimpleQueue()
+        for table in plan:
+            pending.put(table)
+
+        counts = {}
+
+        def work(conn):
+            while True:
+                try:
+                    table = pending.get_nowait()
+                except queue.Empty:
+                    return
+                counts[table] = dump_table(conn, table, plan[table], out_dir,
+                                           compress_level=compress_level)
+                print(f"Table '{table}' dumped: {counts[table]:,} rows.")
+
+        with ThreadPoolExecutor(max_workers=len(snapshot_connections)) as executor:
+            # list() waits for every worker and re-raises the first failure
+            list(executor.map(work, snapshot_connections))
+
+        for conn in snapshot_connections:
+            conn.rollback()  # End the read-only snapshots
+    finally:
+        for conn in connections:
+            pool.release(conn)
+
+    elapsed = time.perf_counter() - started
+    manifest = {
+        "database": database,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        # One point in time only if the lock lined the snapshots up, or there was just one
+        "consistent": locked or len(snapshot_connections) == 1,
+        "global_read_lock": locked,
+        "parallel": len(snapshot_connections),
+        "seconds": round(elapsed, 3),
+        "tables": {table: {"file": f"{table}.csv.gz", "columns": plan[table], "rows": counts[table]}
+                   for table in plan},
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dump the winery tables to compressed CSV files.")
+    parser.add_argument("--out", default="winery_dump", help="Output directory")
+    parser.add_argument("--database", default="winery")
+    parser.add_argument("--workers", type=int, default=POOL_SIZE, help="Parallel connections")
+    parser.add_argument("--level", type=int, default=COMPRESS_LEVEL, help="gzip compression level")
+    args = parser.parse_args()
+
+    try:
+        manifest = dump_tables(args.out, args.database, args.workers, args.level)
+        total = sum(table["rows"] for table in manifest["tables"].values())
+        print(f"\n{len(manifest['tables'])} tables, {total:,} rows dumped to '{args.out}' "
+              f"in {manifest['seconds']}s.")
+    except mysql.connector.Error as err:
+        print(f"General MySQL Error: {err}")
+        logger.error(f"Table dump failed: {err}")
+    finally:
+        close_pools()
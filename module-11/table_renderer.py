@@ -0,0 +1,128 @@
+#   Title: table_renderer.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Streaming table output shared by the text reports and display_data.
+#   Source: csv - https://docs.python.org/3/library/csv.html
+
+# Rows are rendered as they arrive. Each cell is converted to text once, every
+# row becomes one line through a pre-built format string, and lines are written
+# to the output in large blocks instead of one print() per row.
+
+# Formats: text (aligned columns), csv, tsv, jsonl and markdown
+
+
+# Import Statements
+import csv
+import json
+import sys
+from datetime import datetime, date  # Import date for date formatting
+from decimal import Decimal  # Import for decimal formatting
+from itertools import islice
+
+FORMATS = ("text", "csv", "tsv", "jsonl", "markdown")
+WIDTH_SAMPLE_SIZE = 1000  # Rows sampled to size text columns
+WRITE_BLOCK_SIZE = 64 * 1024  # Characters collected before each write to the output
+
+
+# Collects lines and writes them to the output in large blocks
+class BlockWriter:
+    def __init__(self, out=None, block_size=WRITE_BLOCK_SIZE):
+        self.out = out if out is not None else sys.stdout
+        self.block_size = block_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.out.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+        self.out.flush()
+
+
+# Readable cell text for table dumps: NULL, ISO dates and 2-place decimals
+_READABLE = {
+    type(None): lambda value: "NULL",
+    str: lambda value: value,
+    datetime: lambda value: value.isoformat(" ", "seconds"),
+    date: date.isoformat,
+    Decimal: lambda value: f"{value:,.2f}",
+}
+
+
+def readable_cell(value):
+    # One dict lookup on the exact type instead of an isinstance chain per cell
+    convert = _READABLE.get(type(value))
+    return convert(value) if convert else str(value)
+
+
+# Aligned columns sized from a bounded sample of rows (or fixed widths)
+def _render_text(writer, headers, rows, format_cell, col_widths, sample_size, border):
+    sample = []
+    if col_widths is None:
+        sample = [[format_cell(value) for value in row] for row in islice(rows, sample_size)]
+        col_widths = [len(header) for header in headers]
+        for cells in sample:
+            col_widths = [max(width, len(cell)) for width, cell in zip(col_widths, cells)]
+
+    line = " | ".join(f"{{:<{width}}}" for width in col_widths) + "\n"
+    separator = "-" * (sum(col_widths) + (len(headers) - 1) * 3) + "\n"
+
+    if border:
+        writer.write(separator)
+    writer.write(line.format(*headers))
+    writer.write(separator)
+
+    # Sampled rows are already formatted; the rest are formatted as they stream in
+    for cells in sample:
+        writer.write(line.format(*cells))
+    for row in rows:
+        writer.write(line.format(*[format_cell(value) for value in row]))
+
+
+def _render_delimited(writer, headers, rows, delimiter):
+    out = csv.writer(writer, delimiter=delimiter, lineterminator="\n")
+    out.writerow(headers)
+    out.writerows(rows)
+
+
+def _render_jsonl(writer, headers, rows):
+    encode = json.JSONEncoder(default=str).encode
+    for row in rows:
+        writer.write(encode(dict(zip(headers, row))) + "\n")
+
+
+def _render_markdown(writer, headers, rows, format_cell):
+    def line(cells):
+        return "| " + " | ".join(cell.replace("|", "\\|") for cell in cells) + " |\n"
+
+    writer.write(line(headers))
+    writer.write("|" + "|".join("---" for _ in headers) + "|\n")
+    for row in rows:
+        writer.write(line([format_cell(value) for value in row]))
+
+
+# Write a table from any row iterator to out (stdout by default)
+def render_table(headers, rows, fmt="text", out=None, format_cell=str, col_widths=None,
+                 sample_size=WIDTH_SAMPLE_SIZE, border=False):
+    writer = BlockWriter(out)
+    rows = iter(rows)
+    try:
+        if fmt == "text":
+            _render_text(writer, headers, rows, format_cell, col_widths, sample_size, border)
+        elif fmt in ("csv", "tsv"):
+            _render_delimited(writer, headers, rows, "," if fmt == "csv" else "\t")
+        elif fmt == "jsonl":
+            _render_jsonl(writer, headers, rows)
+        elif fmt == "markdown":
+            _render_markdown(writer, headers, rows, format_cell)
+        else:
+            raise ValueError(f"Unknown table format '{fmt}' (expected one of {', '.join(FORMATS)})")
+    finally:
+        writer.flush()
@@ -0,0 +1,66 @@
+#   Title: conftest.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Shared pytest fixtures for the winery tests.
+#   Source: pytest fixtures - https://docs.pytest.org/en/stable/how-to/fixtures.html
+
+# Offline tests need nothing but the Python packages. Tests that take the
+# seeded_db fixture create a throwaway database on the server from the .env file
+# (USER, PASSWORD, HOST) and are skipped when no server is reachable.
+
+
+# Import Statements
+import os
+import sys
+
+import pytest
+
+# The modules import each other by bare name, as when run from module-11
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DATABASE = "winery_pytest"
+
+
+@pytest.fixture
+def seeded_db():
+    import mysql.connector
+    from db_config import connect_db, secrets
+    from migrations import migrate
+
+    if not secrets.get("HOST"):
+        pytest.skip("no MySQL server configured in the .env file")
+    try:
+        server = connect_db()
+    except mysql.connector.Error as err:
+        pytest.skip(f"MySQL server unavailable: {err}")
+
+    cursor = server.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS {TEST_DATABASE}")
+    cursor.execute(f"CREATE DATABASE {TEST_DATABASE}")
+    cursor.close()
+
+    conn = connect_db(database=TEST_DATABASE)
+    try:
+        migrate(conn)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO winery (winery_id, winery_name, winery_phone, winery_email) "
+                       "VALUES (1, 'Test Winery', '555-0100', 'winery@example.com')")
+        cursor.execute("INSERT INTO wine_type (wine_type_id, wine_type_name) "
+                       "VALUES (1, 'Merlot'), (2, 'Chablis')")
+        cursor.execute("INSERT INTO wines (wine_id, inventory_quantity, price_per_bottle, vintage_year, "
+                       "winery_id, wine_type_id) VALUES (1, 1000, 20.00, 2020, 1, 1), "
+                       "(2, 1000, 25.00, 2021, 1, 2)")
+        cursor.execute("INSERT INTO distributor (distributor_id, distributor_name, distributor_phone, "
+                       "distributor_email) VALUES (1, 'North', '555-0101', 'north@example.com'), "
+                       "(2, 'South', '555-0102', 'south@example.com')")
+        cursor.execute("INSERT INTO order_status (order_status_id, status_name) "
+                       "VALUES (1, 'Ordered'), (2, 'Delivered'), (3, 'Canceled')")
+        conn.commit()
+        cursor.close()
+        yield conn
+    finally:
+        conn.close()
+        cursor = server.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS {TEST_DATABASE}")
+        cursor.close()
+        server.close()
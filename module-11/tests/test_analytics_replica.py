@@ -0,0 +1,163 @@
+#   Title: test_analytics_replica.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the incremental DuckDB replica sync.
+
+
+# Import Statements
+import re
+from datetime import date
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")  # Optional dependency, only needed for the replica
+
+import analytics_replica
+from analytics_replica import DIMENSION_TABLES, INCREMENTAL_TABLES, sync_tables
+
+# Source columns: every table gets an id, the rest only what the summary views read
+COLUMNS = {table: [("id", "int")] for table in DIMENSION_TABLES + list(INCREMENTAL_TABLES)}
+COLUMNS.update({
+    "wines": [("wine_id", "int"), ("wine_type_id", "int")],
+    "sales": [("sale_id", "int"), ("quantity", "int"), ("sale_date", "date"),
+              ("wine_id", "int"), ("distributor_id", "int")],
+    "supply": [("supply_id", "int")],
+    "supply_details": [("supply_id", "int"), ("quantity", "int")],
+    "work_hours": [("work_id", "int"), ("employee_id", "int"), ("work_date", "date"),
+                   ("hours_worked", "int")],
+})
+
+SELECT_PATTERN = re.compile(r"SELECT (.+) FROM `(\w+)`(?: WHERE `(\w+)` > %s)?")
+
+
+# MySQL stand-in: tables as lists of tuples plus the table_versions counters
+class FakeServer:
+    def __init__(self):
+        self.rows = {table: [] for table in COLUMNS}
+        self.versions = {table: 0 for table in COLUMNS}
+        self.unread_result = False
+        self.insert("wines", [(1, 1), (2, 2)])
+
+    def insert(self, table, rows):
+        self.rows[table] += rows
+        self.versions[table] += len(rows)  # The triggers bump the counter once per row
+
+    def cursor(self, buffered=True):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, server):
+        self.server = server
+        self.result = []
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        if "information_schema.COLUMNS" in query:
+            self.result = [(table, column, data_type, data_type, None, None)
+                           for table, columns in COLUMNS.items() for column, data_type in columns]
+        elif "information_schema.TABLES" in query:
+            self.result = [(1,)]
+        elif query.startswith("SELECT table_name, version"):
+            self.result = list(self.server.versions.items())
+        elif query.startswith("SELECT COUNT(*)"):
+            table, column = re.search(r"FROM `(\w+)` WHERE `(\w+)`", query).groups()
+            self.result = [(len(self.matching(table, column, params)),)]
+        elif query.startswith("SELECT"):
+            _, table, column = SELECT_PATTERN.match(query).groups()
+            self.result = self.matching(table, column, params)
+        else:
+            self.result = []  # SET SESSION / START TRANSACTION
+
+    # Rows of table whose column is past params[0] (every row when there is no WHERE)
+    def matching(self, table, column, params):
+        if column is None:
+            return list(self.server.rows[table])
+        position = [name for name, _ in COLUMNS[table]].index(column)
+        return [row for row in self.server.rows[table] if row[position] > params[0]]
+
+    def fetchone(self):
+        return self.result.pop(0)
+
+    def fetchmany(self, size):
+        batch, self.result = self.result[:size], self.result[size:]
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.result))
+
+    def close(self):
+        pass
+
+
+def sale(sale_id, quantity=100):
+    return (sale_id, quantity, date(2025, 1, sale_id), 1 + sale_id % 2, 1)
+
+
+def replica_rows(duck, table):
+    return duck.execute(f'SELECT * FROM "{table}" ORDER BY 1').fetchall()
+
+
+def high_water(duck, table):
+    return duck.execute("SELECT high_water FROM replica_sync WHERE table_name = ?", [table]).fetchone()[0]
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(analytics_replica, "SYNC_OVERLAP", 1)  # Re-read one id behind the mark
+    server = FakeServer()
+    server.insert("sales", [sale(1), sale(2), sale(3)])
+    duck = duckdb.connect(":memory:")
+    yield server, duck
+    duck.close()
+
+
+def test_initial_load_copies_everything(replica):
+    server, duck = replica
+
+    copied = sync_tables(server, duck)
+
+    assert copied["sales"] == 3 and copied["wines"] == 2
+    assert replica_rows(duck, "sales") == server.rows["sales"]
+    assert high_water(duck, "sales") == 3
+    assert duck.execute("SELECT SUM(total_quantity) FROM sales_monthly_rollup").fetchone()[0] == 300
+
+
+def test_incremental_load_copies_rows_past_the_high_water_mark(replica):
+    server, duck = replica
+    sync_tables(server, duck)
+    server.insert("sales", [sale(4), sale(5)])
+
+    copied = sync_tables(server, duck)
+
+    assert copied["sales"] == 3  # Id 3 (the overlap) plus the two new sales
+    assert copied["wines"] == 0  # Unchanged dimension
+    assert replica_rows(duck, "sales") == server.rows["sales"]
+    assert high_water(duck, "sales") == 5
+
+
+def test_rerun_without_changes_adds_nothing(replica):
+    server, duck = replica
+    sync_tables(server, duck)
+
+    copied = sync_tables(server, duck)
+
+    assert copied["sales"] == 1  # Only the overlap is read again
+    assert all(copied[table] == 0 for table in DIMENSION_TABLES)
+    assert replica_rows(duck, "sales") == server.rows["sales"]
+    assert high_water(duck, "sales") == 3
+
+
+def test_changes_below_the_mark_copy_the_table_again(replica):
+    server, duck = replica
+    sync_tables(server, duck)
+    server.rows["sales"][0] = sale(1, quantity=50)  # An UPDATE: the counter moves, no rows appended
+    server.versions["sales"] += 1
+
+    copied = sync_tables(server, duck)
+
+    assert copied["sales"] == 3
+    assert replica_rows(duck, "sales") == server.rows["sales"]
@@ -0,0 +1,50 @@
+#   Title: test_async_db.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the asyncio query helpers.
+
+
+# Import Statements
+import asyncio
+from contextlib import asynccontextmanager
+
+import async_db
+import queries
+
+
+# Async connection and cursor that return one canned row
+class FakeAsyncConnection:
+    connection_id = 1
+
+    async def cursor(self):
+        return self
+
+    async def execute(self, query, params=None):
+        pass
+
+    async def fetchall(self):
+        return [("row",)]
+
+    async def close(self):
+        pass
+
+
+def test_queries_read_the_report_database_by_default(monkeypatch):
+    used = []
+
+    @asynccontextmanager
+    async def connection(database=None, host=None):
+        used.append((database, host))
+        yield FakeAsyncConnection()
+
+    async def primary(database=None):
+        return None
+
+    monkeypatch.setattr(async_db, "pooled_connection_async", connection)
+    monkeypatch.setattr(async_db, "choose_replica_async", primary)
+    monkeypatch.setattr(queries, "REPORT_DATABASE", "winery_reports")
+
+    assert asyncio.run(async_db.fetch_all_async("SELECT 1", read_only=True)) == [("row",)]
+    asyncio.run(async_db.fetch_all_async("SELECT 1", database="winery"))
+
+    assert used == [("winery_reports", None), ("winery", None)]
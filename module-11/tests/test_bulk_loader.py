@@ -0,0 +1,79 @@
+#   Title: test_bulk_loader.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the chunked bulk loader.
+
+
+# Import Statements
+from mysql.connector.constants import ClientFlag
+
+import bulk_loader
+
+
+# Records statements, keeps the LOAD DATA temp file's text and answers SHOW VARIABLES
+class LoadConnection:
+    def __init__(self, client_local_infile=True, server_local_infile="ON"):
+        self.client_flags = ClientFlag.LOCAL_FILES if client_local_infile else 0
+        self.server_local_infile = server_local_infile
+        self.statements = []
+        self.files = []
+        self.executemany_rows = []
+
+    def isset_client_flag(self, flag):
+        return self.client_flags & flag > 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=()):
+        self.statements.append(query)
+        if query.startswith("LOAD DATA"):
+            with open(params[0], encoding="utf-8", newline="") as f:
+                self.files.append(f.read())
+
+    def executemany(self, query, rows):
+        self.statements.append(query)
+        self.executemany_rows.extend(rows)
+
+    def fetchone(self):
+        return ("local_infile", self.server_local_infile)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+ROWS = [(1, "C:\\cellar\\merlot", None), (2, 'the "reserve", 2019', "NULL")]
+
+
+def test_load_data_keeps_backslashes_quotes_and_nulls():
+    conn = LoadConnection()
+
+    total, _ = bulk_loader.bulk_insert(conn, "notes", ["note_id", "path", "label"], ROWS,
+                                       use_load_data=True, verbose=False)
+
+    assert total == 2
+    assert "ESCAPED BY ''" in conn.statements[-1]
+    assert conn.files == ['"1","C:\\cellar\\merlot",NULL\r\n'
+                          '"2","the ""reserve"", 2019","NULL"\r\n']
+
+
+def test_falls_back_to_executemany_when_the_connection_disallows_local_infile():
+    conn = LoadConnection(client_local_infile=False)
+
+    bulk_loader.bulk_insert(conn, "notes", ["note_id", "path", "label"], ROWS,
+                            use_load_data=True, verbose=False)
+
+    assert conn.files == [] and conn.executemany_rows == ROWS
+    assert not any("SHOW GLOBAL VARIABLES" in statement for statement in conn.statements)
+
+
+def test_falls_back_to_executemany_when_the_server_disallows_local_infile():
+    conn = LoadConnection(server_local_infile="OFF")
+
+    bulk_loader.bulk_insert(conn, "notes", ["note_id", "path", "label"], ROWS,
+                            use_load_data=True, verbose=False)
+
+    assert conn.files == [] and conn.executemany_rows == ROWS
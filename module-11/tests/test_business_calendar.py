@@ -0,0 +1,47 @@
+#   Title: test_business_calendar.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the business day and work hour calendar.
+
+
+# Import Statements
+import numpy as np
+
+from business_calendar import (BusinessCalendar, to_months, month_range, month_end_dates,
+                               business_hours)
+
+
+def test_month_range_is_inclusive_and_crosses_years():
+    months = month_range("2024-11", "2025-02")
+
+    assert [str(month) for month in months] == ["2024-11", "2024-12", "2025-01", "2025-02"]
+
+
+def test_to_months_accepts_month_and_day_strings():
+    assert to_months(["2025-03", "2025-03-31"]).tolist() == to_months(["2025-03", "2025-03"]).tolist()
+
+
+def test_month_end_dates_handle_leap_years():
+    assert month_end_dates(["2024-02", "2025-02", "2025-12"]).tolist() == \
+        ["2024-02-29", "2025-02-28", "2025-12-31"]
+
+
+def test_standard_workweek_counts_weekdays():
+    # January 2025 has 23 weekdays; leap-year February 2024 has 21
+    assert BusinessCalendar().business_days(["2025-01", "2024-02"]).tolist() == [23, 21]
+    assert business_hours(["2025-01"]).tolist() == [23 * 8]
+
+
+def test_holidays_and_other_workweeks():
+    calendar = BusinessCalendar(holidays=["2025-01-01", "2025-01-04"])  # Saturday is already off
+    assert calendar.business_days(["2025-01"]).tolist() == [22]
+
+    six_day = BusinessCalendar("six_day", hours_per_day=10)
+    assert six_day.business_hours(["2025-01"]).tolist() == [27 * 10]
+
+
+def test_business_days_between_excludes_the_end():
+    # Monday to the next Monday
+    assert BusinessCalendar().business_days_between("2025-01-06", "2025-01-13") == 5
+    assert BusinessCalendar().business_days_between(np.array(["2025-01-06"]),
+                                                    np.array(["2025-01-07"])).tolist() == [1]
@@ -0,0 +1,56 @@
+#   Title: test_chart_data.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the chart data preparation.
+
+
+# Import Statements
+import numpy as np
+
+from chart_data import fetch_columns, pivot, bar_offsets
+
+
+def test_fetch_columns_reads_typed_columns():
+    columns = fetch_columns([("2025-01", 3), ("2025-02", 5)], ["month", "total"], ["U7", "i8"])
+
+    assert columns["month"].tolist() == ["2025-01", "2025-02"]
+    assert columns["total"].dtype == np.int64
+
+
+def test_pivot_keeps_query_order_and_fills_gaps_with_zero():
+    rows = [("2025-02", "South", 4), ("2025-01", "North", 2), ("2025-02", "North", 1)]
+
+    labels, series, matrix = pivot(rows)
+
+    assert labels.tolist() == ["2025-02", "2025-01"]
+    assert series.tolist() == ["South", "North"]
+    assert matrix.tolist() == [[4, 1], [0, 2]]
+
+
+def test_pivot_sums_repeated_pairs():
+    labels, series, matrix = pivot([("Q1", "Merlot", 2.5), ("Q1", "Merlot", 1.5)])
+
+    assert matrix.tolist() == [[4.0]]
+
+
+def test_pivot_joins_multi_column_series():
+    rows = [("2025-01", "North", "Merlot", 10), ("2025-01", "North", "Chablis", 20)]
+
+    labels, series, matrix = pivot(rows, series_columns=2)
+
+    assert series.tolist() == ["North - Merlot", "North - Chablis"]
+    assert matrix.tolist() == [[10, 20]]
+
+
+def test_pivot_of_no_rows_is_empty():
+    labels, series, matrix = pivot([])
+
+    assert matrix.shape == (0, 0)
+
+
+def test_bar_offsets_center_ticks_under_each_group():
+    offsets, ticks, bar_width = bar_offsets(2, 4)
+
+    assert bar_width == 0.2
+    assert np.allclose(offsets, [[0.0, 0.2, 0.4, 0.6], [1.0, 1.2, 1.4, 1.6]])
+    assert np.allclose(ticks, [0.3, 1.3])
@@ -0,0 +1,63 @@
+#   Title: test_data_generator.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the seeded synthetic data generator.
+
+
+# Import Statements
+from data_generator import WineryDataGenerator, DEPARTMENTS
+
+SCALE = 0.1  # 1,000 sales keeps the tests quick
+
+
+def generate(seed=42, order=None):
+    tables = WineryDataGenerator(SCALE, seed).tables()
+    return {name: list(tables[name][1]()) for name in order or tables}
+
+
+def test_same_seed_gives_the_same_rows():
+    assert generate() == generate()
+
+
+def test_rows_do_not_depend_on_the_order_tables_are_generated_in():
+    first = generate()
+    reversed_order = generate(order=list(reversed(list(first))))
+
+    assert reversed_order == first
+
+
+def test_another_seed_gives_other_rows():
+    assert generate(seed=1)["sales"] != generate(seed=2)["sales"]
+
+
+def test_row_counts_follow_the_scale():
+    generator = WineryDataGenerator(SCALE)
+    rows = generate()
+
+    assert len(rows["sales"]) == generator.scale.sales == 1000
+    assert len(rows["employee"]) == generator.scale.employees
+    assert len(rows["work_hours"]) == generator.scale.employees * len(generator.scale.months)
+    assert len(rows["supply_details"]) == 2 * len(rows["supply"])
+
+
+def test_foreign_keys_point_at_generated_rows():
+    rows = generate()
+    wine_ids = {row[0] for row in rows["wines"]}
+    distributor_ids = {row[0] for row in rows["distributor"]}
+
+    assert {row[3] for row in rows["sales"]} <= wine_ids
+    assert {row[4] for row in rows["sales"]} <= distributor_ids
+
+
+def test_each_department_is_managed_by_one_of_its_employees():
+    for scale_factor in (0.01, 1, 3):
+        generator = WineryDataGenerator(scale_factor)
+        department_of = {row[0]: row[3] for row in generator.employee()}
+        managers = list(generator.department())
+
+        assert len(managers) == len(DEPARTMENTS)
+        for department_id, _, manager_id in managers:
+            if department_id in department_of.values():
+                assert department_of[manager_id] == department_id
+            else:
+                assert manager_id == 1  # Tiny scales can leave a department empty; an owner manages it
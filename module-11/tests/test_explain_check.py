@@ -0,0 +1,95 @@
+#   Title: test_explain_check.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the EXPLAIN full scan check.
+
+
+# Import Statements
+from explain_check import find_full_scans, find_unpruned, table_aliases
+
+
+# Returns canned EXPLAIN rows per query
+class ExplainCursor:
+    def __init__(self, plans):
+        self.plans = plans
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.rows = self.plans[query.removeprefix("EXPLAIN ")]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class ExplainConnection:
+    def __init__(self, plans):
+        self.plans = plans
+
+    def cursor(self, dictionary=False):
+        return ExplainCursor(self.plans)
+
+
+def step(table, access_type, key=None, rows=1, partitions=None):
+    return {"table": table, "type": access_type, "key": key, "rows": rows, "partitions": partitions}
+
+
+def test_table_and_full_index_scans_of_fact_tables_fail():
+    queries = {
+        "table_scan": "SELECT * FROM sales s WHERE s.quantity > 100",
+        "index_scan": "SELECT * FROM employee e JOIN work_hours wh ON e.employee_id = wh.employee_id",
+        "range": "SELECT * FROM supply s WHERE s.supplier_id = 1",
+        "dimension": "SELECT * FROM wine_type wt",
+    }
+    plans = {
+        queries["table_scan"]: [step("s", "ALL", rows=500000)],
+        queries["index_scan"]: [step("e", "ALL", rows=40),
+                                step("wh", "index", "idx_work_hours_employee_date", 90000)],
+        queries["range"]: [step("s", "range", "idx_supply_supplier_order", 1200)],
+        queries["dimension"]: [step("wt", "index", "PRIMARY", 4)],
+    }
+
+    assert find_full_scans(ExplainConnection(plans), queries) == [
+        ("table_scan", "sales", "ALL", None, 500000),
+        ("index_scan", "work_hours", "index", "idx_work_hours_employee_date", 90000),
+    ]
+
+
+def test_aliases_map_back_to_base_tables():
+    query = """SELECT * FROM supply s JOIN supplier AS sup ON s.supplier_id = sup.supplier_id
+               LEFT JOIN `wines` ON 1 = 1 WHERE s.order_date >= %s"""
+
+    assert table_aliases(query) == {"supply": "supply", "s": "supply", "supplier": "supplier",
+                                    "sup": "supplier", "wines": "wines"}
+
+
+def test_aliased_fact_tables_are_caught():
+    query = "SELECT * FROM sales s JOIN wines w ON s.wine_id = w.wine_id WHERE s.quantity > 0"
+    plans = {query: [step("s", "ALL", rows=500000), step("w", "eq_ref", "PRIMARY", 1)]}
+
+    assert find_full_scans(ExplainConnection(plans), {"big_orders": query}) == [
+        ("big_orders", "sales", "ALL", None, 500000)]
+
+
+def test_full_history_reports_are_allowed_to_scan():
+    query = "SELECT * FROM supply s JOIN supplier sup ON s.supplier_id = sup.supplier_id"
+    plans = {query: [step("s", "ALL", rows=90000)]}
+    queries = {"supplier_trends": query, "supplier_costs": query}
+
+    assert find_full_scans(ExplainConnection(plans), queries) == [
+        ("supplier_costs", "supply", "ALL", None, 90000)]
+
+
+def test_aliased_unpruned_range_scans_are_caught():
+    between = "SELECT * FROM sales s WHERE s.sale_date >= %s AND s.sale_date < %s"
+    for_employee = ("SELECT * FROM employee e JOIN work_hours wh ON e.employee_id = wh.employee_id "
+                    "WHERE e.employee_id = %s AND wh.work_date >= %s AND wh.work_date < %s")
+    plans = {between: [step("s", "range", partitions="p2024q4,p2025q1")],
+             for_employee: [step("e", "const"),
+                            step("wh", "ALL", partitions="p2023q1,p2023q2,p2023q3,p2023q4,p2024q1")]}
+    statements = {"sales_between": between, "hours_for_employee": for_employee}
+
+    assert find_unpruned(ExplainConnection(plans), statements) == [
+        ("hours_for_employee", "work_hours", ["p2023q1", "p2023q2", "p2023q3", "p2023q4", "p2024q1"])]
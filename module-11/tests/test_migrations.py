@@ -0,0 +1,52 @@
+#   Title: test_migrations.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the schema migrations.
+
+
+# Import Statements
+import migrations
+from db_config import ConnectionPool
+
+
+# Records the DDL run on it
+class DdlConnection:
+    database = "winery"
+
+    def __init__(self):
+        self.created = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        self.created.append(query.split("CREATE TABLE")[1].split("(")[0].strip())
+
+    def close(self):
+        pass
+
+
+def test_table_creation_leaves_the_callers_connection_a_pool_slot(monkeypatch):
+    calls = []
+    monkeypatch.setattr(migrations, "table_exists", lambda cursor, table: False)
+    monkeypatch.setattr(migrations, "get_pool", lambda database: ConnectionPool(database, max_size=3))
+    monkeypatch.setattr(migrations, "run_in_levels",
+                        lambda tasks, dependencies, database, max_workers: calls.append(max_workers))
+
+    migrations.create_missing_tables(DdlConnection(), None)
+
+    assert calls == [2]
+
+
+def test_single_connection_pool_creates_tables_on_the_callers_connection(monkeypatch):
+    monkeypatch.setattr(migrations, "table_exists", lambda cursor, table: table == "winery")
+    monkeypatch.setattr(migrations, "get_pool", lambda database: ConnectionPool(database, max_size=1))
+    conn = DdlConnection()
+
+    migrations.create_missing_tables(conn, None)
+
+    created = conn.created
+    assert sorted(created) == sorted(name for name in migrations.TABLES if name != "winery")
+    # Parents are created before the tables that reference them
+    assert created.index("employee") < created.index("department")
+    assert created.index("wines") < created.index("sales")
@@ -0,0 +1,81 @@
+#   Title: test_partitions.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for converting the fact tables to monthly partitions.
+
+
+# Import Statements
+from datetime import date
+
+import mysql.connector  # for the error type
+import pytest
+from mysql.connector import errorcode
+
+import partitions
+
+FOREIGN_KEYS = [("fk_sales_wine", "wine_id", "wines", "wine_id", "RESTRICT", "CASCADE"),
+                ("fk_sales_distributor", "distributor_id", "distributor", "distributor_id",
+                 "RESTRICT", "CASCADE")]
+
+
+# Answers the information_schema lookups; the partitioning ALTER fails if asked to
+class AlterCursor:
+    def __init__(self, fail_partitioning):
+        self.fail_partitioning = fail_partitioning
+        self.statements = []
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.statements.append(" ".join(query.split()))
+        if "information_schema.PARTITIONS" in query:
+            self.rows = []
+        elif "MIN(sale_date)" in query:
+            self.rows = [(date(2024, 1, 15),)]
+        elif "KEY_COLUMN_USAGE" in query:
+            self.rows = FOREIGN_KEYS
+        elif "PARTITION BY" in query and self.fail_partitioning:
+            raise mysql.connector.Error(errno=errorcode.ER_UNIQUE_KEY_NEED_ALL_FIELDS_IN_PF)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def close(self):
+        pass
+
+
+class AlterConnection:
+    def __init__(self, fail_partitioning=False):
+        self.cursor_ = AlterCursor(fail_partitioning)
+
+    def cursor(self):
+        return self.cursor_
+
+
+def alters(conn):
+    return [statement for statement in conn.cursor_.statements if statement.startswith("ALTER")]
+
+
+def test_foreign_keys_are_dropped_before_partitioning():
+    conn = AlterConnection()
+
+    assert partitions.enable_partitioning(conn, "sales")
+    dropped, partitioned = alters(conn)
+    assert dropped == "ALTER TABLE sales DROP FOREIGN KEY fk_sales_wine, DROP FOREIGN KEY fk_sales_distributor"
+    assert "PARTITION BY RANGE COLUMNS (sale_date)" in partitioned
+
+
+def test_failed_partitioning_restores_the_foreign_keys():
+    conn = AlterConnection(fail_partitioning=True)
+
+    with pytest.raises(mysql.connector.Error):
+        partitions.enable_partitioning(conn, "sales")
+
+    assert alters(conn)[-1] == (
+        "ALTER TABLE sales "
+        "ADD CONSTRAINT fk_sales_wine FOREIGN KEY (wine_id) REFERENCES wines (wine_id) "
+        "ON DELETE RESTRICT ON UPDATE CASCADE, "
+        "ADD CONSTRAINT fk_sales_distributor FOREIGN KEY (distributor_id) "
+        "REFERENCES distributor (distributor_id) ON DELETE RESTRICT ON UPDATE CASCADE")
@@ -0,0 +1,41 @@
+#   Title: test_query_metrics.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for statement fingerprints.
+
+
+# Import Statements
+from query_metrics import fingerprint, MAX_FINGERPRINT_LENGTH
+
+
+def test_literals_and_placeholders_become_question_marks():
+    assert fingerprint("SELECT * FROM sales WHERE wine_id = 7 AND sale_date >= '2025-01-01'") == \
+        "SELECT * FROM sales WHERE wine_id = ? AND sale_date >= ?"
+    assert fingerprint("SELECT * FROM sales WHERE wine_id = %s AND status = %(status)s") == \
+        "SELECT * FROM sales WHERE wine_id = ? AND status = ?"
+
+
+def test_same_shape_gives_the_same_fingerprint():
+    assert fingerprint("SELECT price FROM wines WHERE wine_id = 1") == \
+        fingerprint("SELECT  price\n  FROM wines WHERE wine_id = 22")
+
+
+def test_numbers_inside_names_are_kept():
+    assert fingerprint("SELECT col1, t2.x FROM table_2 t2 LIMIT 10") == \
+        "SELECT col1, t2.x FROM table_2 t2 LIMIT ?"
+
+
+def test_strings_with_escapes_and_quotes():
+    assert fingerprint("SELECT 'it''s', \"a\\\"b\", 'x\\'y'") == "SELECT ?, ?, ?"
+
+
+def test_lists_collapse():
+    assert fingerprint("SELECT * FROM wines WHERE wine_id IN (1, 2, 3)") == \
+        "SELECT * FROM wines WHERE wine_id IN (...)"
+    assert fingerprint("INSERT INTO wine_type VALUES (1, 'Merlot'), (2, 'Chablis'), (3, 'Cabernet')") == \
+        "INSERT INTO wine_type VALUES (?, ?), ..."
+
+
+def test_bytes_are_decoded_and_long_statements_truncated():
+    assert fingerprint(b"SELECT 1") == "SELECT ?"
+    assert len(fingerprint("SELECT " + ", ".join(f"c{i}" for i in range(200)))) == MAX_FINGERPRINT_LENGTH
@@ -0,0 +1,189 @@
+#   Title: test_report_cache.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the report result cache.
+
+
+# Import Statements
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import mysql.connector  # for the error type
+from mysql.connector import errorcode
+
+import report_cache
+from report_cache import ReportCache, tables_in
+
+
+# Cache whose version counters come from a dict per host instead of the server
+def make_cache(monkeypatch, versions_by_host, hosts, **options):
+    cache = ReportCache(**options)
+    choices = itertools.cycle(hosts)
+    monkeypatch.setattr(report_cache.replicas, "choose", lambda database=None: next(choices))
+    cache.current_versions = lambda tables, host=None: versions_by_host[host]
+    return cache
+
+
+def test_versions_and_rows_come_from_the_same_host(monkeypatch):
+    versions = {"replica1": (("sales", 5),), "replica2": (("sales", 3),)}
+    cache = make_cache(monkeypatch, versions, ["replica1", "replica2"])
+    fetched = []
+
+    def fetch(query, params, host):
+        fetched.append(host)
+        yield (host,)
+
+    first = list(cache.rows("SELECT * FROM sales", fetch))
+    second = list(cache.rows("SELECT * FROM sales", fetch))
+
+    # Each miss reads its rows from the host its versions came from
+    assert first == [("replica1",)] and second == [("replica2",)]
+    assert fetched == ["replica1", "replica2"]
+
+
+def test_tables_in_finds_joined_tables_once():
+    query = """SELECT * FROM `sales` s JOIN wines w ON w.wine_id = s.wine_id
+               LEFT JOIN Wines w2 ON 1 = 1 WHERE s.sale_id IN (SELECT sale_id FROM sales)"""
+
+    assert tables_in(query) == ("sales", "wines")
+
+
+# Fetch that counts its calls and yields the given rows
+class CountingFetch:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self, query, params, host):
+        self.calls += 1
+        yield from self.rows
+
+
+def test_repeat_reads_hit_until_a_table_changes(monkeypatch):
+    versions = {None: (("sales", 1),)}
+    cache = make_cache(monkeypatch, versions, [None])
+    fetch = CountingFetch([(1, "Merlot"), (2, "Chablis")])
+
+    assert list(cache.rows("SELECT * FROM sales", fetch)) == fetch.rows
+    assert list(cache.rows("SELECT * FROM sales", fetch)) == fetch.rows
+    assert (fetch.calls, cache.hits, cache.misses) == (1, 1, 1)
+
+    versions[None] = (("sales", 2),)
+    assert list(cache.rows("SELECT * FROM sales", fetch)) == fetch.rows
+    assert (fetch.calls, cache.hits, cache.misses) == (2, 1, 2)
+
+
+def test_params_are_part_of_the_key(monkeypatch):
+    cache = make_cache(monkeypatch, {None: ()}, [None])
+    fetch = CountingFetch([(1,)])
+
+    list(cache.rows("SELECT * FROM sales WHERE wine_id = %s", fetch, (1,)))
+    list(cache.rows("SELECT * FROM sales WHERE wine_id = %s", fetch, (2,)))
+
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_unfinished_and_oversized_results_are_not_kept(monkeypatch):
+    cache = make_cache(monkeypatch, {None: ()}, [None], max_rows=2)
+    fetch = CountingFetch([(1,), (2,), (3,)])
+
+    next(cache.rows("SELECT * FROM sales", fetch))  # Caller stops after one row
+    list(cache.rows("SELECT * FROM sales", fetch))  # Too many rows to keep
+    list(cache.rows("SELECT * FROM sales", fetch))
+
+    assert (fetch.calls, cache.hits) == (3, 0)
+
+
+def test_least_recently_used_entry_is_dropped(monkeypatch):
+    cache = make_cache(monkeypatch, {None: ()}, [None], max_entries=2)
+    fetch = CountingFetch([(1,)])
+
+    for query in ["SELECT 1 FROM a", "SELECT 1 FROM b", "SELECT 1 FROM a", "SELECT 1 FROM c",
+                  "SELECT 1 FROM a", "SELECT 1 FROM b"]:
+        list(cache.rows(query, fetch))
+
+    # a was used more recently than b, so c pushed b out
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_missing_version_table_disables_the_cache(monkeypatch):
+    cache = make_cache(monkeypatch, {}, [None])
+
+    def no_table(tables, host=None):
+        raise mysql.connector.Error(errno=errorcode.ER_NO_SUCH_TABLE)
+
+    cache.current_versions = no_table
+    fetch = CountingFetch([(1,)])
+
+    assert list(cache.rows("SELECT * FROM sales", fetch)) == [(1,)]
+    assert list(cache.rows("SELECT * FROM sales", fetch)) == [(1,)]
+    assert not cache.enabled and fetch.calls == 2
+
+
+def test_disk_store_survives_a_new_cache(monkeypatch, tmp_path):
+    path = str(tmp_path / "reports")
+    fetch = CountingFetch([(1, "Merlot")])
+
+    first = make_cache(monkeypatch, {None: ()}, [None], disk_path=path)
+    list(first.rows("SELECT * FROM wines", fetch))
+    first.close()
+
+    second = make_cache(monkeypatch, {None: ()}, [None], disk_path=path)
+    assert list(second.rows("SELECT * FROM wines", fetch)) == [(1, "Merlot")]
+    assert (fetch.calls, second.hits) == (1, 1)
+    second.close()
+
+
+# Pool whose connections count the table_versions reads
+class VersionPool:
+    def __init__(self):
+        self.reads = 0
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params):
+        self.reads += 1
+
+    def fetchall(self):
+        return [("sales", 1)]
+
+    def close(self):
+        pass
+
+
+def test_versions_are_trusted_for_the_check_interval(monkeypatch):
+    pool = VersionPool()
+    monkeypatch.setattr(report_cache, "get_pool", lambda database, host=None: pool)
+    monkeypatch.setattr(report_cache.replicas, "choose", lambda database=None: None)
+    fetch = CountingFetch([(1,)])
+
+    cache = ReportCache(check_interval=60)
+    for _ in range(3):
+        list(cache.rows("SELECT * FROM sales", fetch))
+    assert (pool.reads, cache.hits) == (1, 2)
+
+    uncached = ReportCache(check_interval=0)
+    for _ in range(3):
+        list(uncached.rows("SELECT * FROM sales", fetch))
+    assert (pool.reads, uncached.hits) == (4, 2)
+
+
+def test_concurrent_readers_share_the_disk_store(monkeypatch, tmp_path):
+    cache = make_cache(monkeypatch, {None: ()}, [None], disk_path=str(tmp_path / "reports"),
+                       max_entries=1)
+    queries = [f"SELECT {i} FROM sales" for i in range(8)]
+
+    def read(query):
+        return list(cache.rows(query, CountingFetch([(query,)])))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(5):
+            assert list(executor.map(read, queries)) == [[(query,)] for query in queries]
+    assert cache.hits + cache.misses == 40
+    cache.close()
@@ -0,0 +1,92 @@
+#   Title: test_report_runner.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the headless report runner.
+
+
+# Import Statements
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+from mysql.connector.constants import FieldType
+
+import report_runner
+from report_runner import ParquetTableWriter, run_reports
+
+
+def column(name, type_code):
+    return (name, type_code, None, None, None, None, 1, 0, 45)
+
+
+def test_parquet_schema_comes_from_the_cursor_description(tmp_path):
+    path = tmp_path / "report.parquet"
+    description = [column("day", FieldType.DATE), column("units", FieldType.LONG),
+                   column("total", FieldType.NEWDECIMAL), column("name", FieldType.VAR_STRING)]
+    writer = ParquetTableWriter(str(path), ["Day", "Units", "Total", "Name"], description)
+
+    writer.write_rows([(None, None, None, None)])  # First batch all NULL
+    writer.write_rows([(date(2024, 1, 1), 5, Decimal("12.50"), "North")])
+    writer.close()
+
+    table = pq.read_table(path)
+    assert [str(field.type) for field in table.schema] == \
+        ["date32[day]", "int64", "decimal128(38, 10)", "string"]
+    assert table.column("Units").to_pylist() == [None, 5]
+    assert table.column("Total").to_pylist()[1] == Decimal("12.50")
+
+
+def test_datetime_and_time_columns_keep_their_types(tmp_path):
+    path = tmp_path / "hours.parquet"
+    description = [column("clocked_in", FieldType.DATETIME), column("updated", FieldType.TIMESTAMP),
+                   column("shift", FieldType.TIME)]
+    writer = ParquetTableWriter(str(path), ["Clocked In", "Updated", "Shift"], description)
+
+    writer.write_rows([(datetime(2025, 2, 23, 8, 30, 15, 250), datetime(2025, 2, 23, 17, 0),
+                        timedelta(hours=30, minutes=15)), (None, None, None)])
+    writer.close()
+
+    table = pq.read_table(path)
+    assert [str(field.type) for field in table.schema] == \
+        ["timestamp[us]", "timestamp[us]", "duration[us]"]
+    assert table.to_pylist()[0] == {"Clocked In": datetime(2025, 2, 23, 8, 30, 15, 250),
+                                    "Updated": datetime(2025, 2, 23, 17, 0),
+                                    "Shift": timedelta(hours=30, minutes=15)}
+
+
+def test_empty_result_still_writes_a_header_only_file(tmp_path):
+    path = tmp_path / "empty.parquet"
+    writer = ParquetTableWriter(str(path), ["Total"], [column("total", FieldType.NEWDECIMAL)])
+    writer.close()
+    assert pq.read_table(path).num_rows == 0
+
+
+def test_one_failing_report_does_not_stop_the_batch(monkeypatch, tmp_path):
+    def run_report(name, out_dir, table_formats, chart_formats):
+        if name == "wine":
+            raise ValueError("bad chart data")
+        return [f"{name}.csv"]
+
+    monkeypatch.setattr(report_runner, "run_report", run_report)
+    outputs, failures = run_reports(["supplier", "wine", "employee"], str(tmp_path))
+
+    assert outputs == {"supplier": ["supplier.csv"], "employee": ["employee.csv"]}
+    assert isinstance(failures["wine"], ValueError)
+
+
+def test_reports_read_the_shared_report_database(monkeypatch):
+    import queries
+    used = []
+    monkeypatch.setattr(queries, "REPORT_DATABASE", "winery_sf10")
+    monkeypatch.setattr(report_runner, "pooled_connection",
+                        lambda database, read_only=False: used.append(database) or _Nothing())
+    report_runner.run_report("employee", ".", [], [])
+    assert used == ["winery_sf10"]
+
+
+class _Nothing:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
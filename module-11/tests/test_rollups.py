@@ -0,0 +1,90 @@
+#   Title: test_rollups.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the sales rollup refresh.
+
+
+# Import Statements
+from datetime import date
+
+from rollups import next_month, refresh_sales_rollup
+
+
+# Records statements instead of running them
+class RecordingCursor:
+    def __init__(self, sale_range):
+        self.sale_range = sale_range
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((" ".join(query.split()), params))
+
+    def fetchone(self):
+        return self.sale_range
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self, sale_range=(None, None)):
+        self.recorder = RecordingCursor(sale_range)
+        self.committed = False
+
+    def cursor(self):
+        return self.recorder
+
+    def commit(self):
+        self.committed = True
+
+
+def test_next_month_rolls_over_the_year():
+    assert next_month(date(2024, 1, 31)) == date(2024, 2, 1)
+    assert next_month(date(2024, 12, 5)) == date(2025, 1, 1)
+
+
+def test_refresh_months_binds_month_bounds():
+    conn = RecordingConnection()
+    refresh_sales_rollup(conn, ["2024-02", "2024-12"])
+
+    params = [params for _, params in conn.recorder.statements]
+    assert params == [{"start": date(2024, 2, 1), "end": date(2024, 3, 1)}] * 2 + \
+                     [{"start": date(2024, 12, 1), "end": date(2025, 1, 1)}] * 2
+    assert conn.committed
+
+
+def test_refresh_sql_has_no_escaped_percent_signs():
+    # Dict parameters leave "%%" in the statement, which MySQL then reads literally
+    conn = RecordingConnection((date(2024, 1, 15), date(2024, 3, 2)))
+    refresh_sales_rollup(conn)
+
+    statements = conn.recorder.statements
+    assert all("%%" not in query for query, _ in statements)
+    assert statements[-1][1] == {"start": date(2024, 1, 1), "end": date(2024, 4, 1)}
+
+
+def test_refresh_rebuilds_rollup_from_seeded_sales(seeded_db):
+    cursor = seeded_db.cursor()
+    cursor.executemany(
+        "INSERT INTO sales (quantity, sale_date, wine_id, distributor_id, order_status_id) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        [(10, date(2024, 1, 5), 1, 1, 1), (5, date(2024, 1, 31), 1, 1, 2),
+         (7, date(2024, 2, 1), 2, 2, 1), (3, date(2024, 2, 29), 1, 1, 1)])
+    cursor.execute("DELETE FROM sales_monthly_rollup")
+    seeded_db.commit()
+
+    refresh_sales_rollup(seeded_db)
+
+    cursor.execute("SELECT sale_month, distributor_id, wine_type_id, total_quantity, sale_count "
+                   "FROM sales_monthly_rollup ORDER BY sale_month, distributor_id")
+    assert cursor.fetchall() == [(date(2024, 1, 1), 1, 1, 15, 2),
+                                 (date(2024, 2, 1), 1, 1, 3, 1),
+                                 (date(2024, 2, 1), 2, 2, 7, 1)]
+
+    # A single month only replaces that month's rows
+    cursor.execute("UPDATE sales_monthly_rollup SET total_quantity = 0")
+    seeded_db.commit()
+    refresh_sales_rollup(seeded_db, ["2024-02"])
+    cursor.execute("SELECT sale_month, total_quantity FROM sales_monthly_rollup ORDER BY sale_month, distributor_id")
+    assert cursor.fetchall() == [(date(2024, 1, 1), 0), (date(2024, 2, 1), 3), (date(2024, 2, 1), 7)]
+    cursor.close()
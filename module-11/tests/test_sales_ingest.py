@@ -0,0 +1,98 @@
+#   Title: test_sales_ingest.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for sales order validation and the batch writer.
+
+
+# Import Statements
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import sales_ingest
+from sales_ingest import ReferenceData, SaleRejected, SalesIngestor, validate_order
+
+
+# Reference ids loaded from a dict instead of the database
+class StaticReference(ReferenceData):
+    def __init__(self, wines=(1, 2), distributors=(1,)):
+        self.server = {"wines": set(wines), "distributors": set(distributors)}
+        self.refreshes = 0
+        super().__init__()
+
+    def refresh(self, force=False):
+        self.refreshes += 1
+        self.wines = set(self.server["wines"])
+        self.distributors = set(self.server["distributors"])
+        self.statuses = {"Ordered": 1, "Delivered": 2, "Canceled": 3}
+
+
+def test_valid_order_is_normalised():
+    order = {"wine_id": "2", "distributor_id": 1, "quantity": 50,
+             "sale_date": "2025-02-23", "status": "Delivered"}
+
+    assert validate_order(order, StaticReference()) == (50, date(2025, 2, 23), 2, 1, 2)
+
+
+def test_date_and_status_default_to_today_and_ordered():
+    assert validate_order({"wine_id": 1, "distributor_id": 1, "quantity": 1}, StaticReference()) == \
+        (1, date.today(), 1, 1, 1)
+
+
+@pytest.mark.parametrize("order, message", [
+    (["wine_id", 1], "order must be an object"),
+    ({"distributor_id": 1, "quantity": 1}, "'wine_id' must be a positive integer"),
+    ({"wine_id": True, "distributor_id": 1, "quantity": 1}, "'wine_id' must be a positive integer"),
+    ({"wine_id": 1, "distributor_id": "one", "quantity": 1}, "'distributor_id' must be a positive integer"),
+    ({"wine_id": 1, "distributor_id": 1, "quantity": 0}, "'quantity' must be a positive integer"),
+    ({"wine_id": 1, "distributor_id": 1, "quantity": 1, "sale_date": "02/23/2025"},
+     "'sale_date' is not a YYYY-MM-DD date"),
+    ({"wine_id": 1, "distributor_id": 1, "quantity": 1, "sale_date": 20250223}, "'sale_date' must be a date"),
+    ({"wine_id": 1, "distributor_id": 1, "quantity": 1, "sale_date": date.today() + timedelta(days=1)},
+     "'sale_date' is in the future"),
+    ({"wine_id": 1, "distributor_id": 1, "quantity": 1, "status": "Shipped"}, "unknown order status 'Shipped'"),
+    ({"wine_id": 9, "distributor_id": 1, "quantity": 1}, "unknown wine_id 9"),
+    ({"wine_id": 1, "distributor_id": 9, "quantity": 1}, "unknown distributor_id 9"),
+])
+def test_bad_orders_are_rejected(order, message):
+    with pytest.raises(SaleRejected, match=message):
+        validate_order(order, StaticReference())
+
+
+def test_unknown_ids_reload_the_reference_once():
+    reference = StaticReference()
+    reference.server["wines"].add(3)  # Added after the reference was loaded
+
+    assert validate_order({"wine_id": 3, "distributor_id": 1, "quantity": 1}, reference)[2] == 3
+    assert reference.refreshes == 2
+
+    validate_order({"wine_id": 3, "distributor_id": 1, "quantity": 1}, reference)
+    assert reference.refreshes == 2  # Known now, so no reload
+
+
+def test_datetime_sale_dates_are_reduced_to_dates():
+    order = {"wine_id": 1, "distributor_id": 1, "quantity": 1, "sale_date": datetime(2025, 2, 23, 14, 30)}
+
+    assert validate_order(order, StaticReference())[1] == date(2025, 2, 23)
+
+    order["sale_date"] = datetime.now() + timedelta(days=1)
+    with pytest.raises(SaleRejected, match="'sale_date' is in the future"):
+        validate_order(order, StaticReference())
+
+
+def test_writer_failure_resolves_the_pending_futures(monkeypatch):
+    def interrupted(database):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(sales_ingest, "pooled_connection", interrupted)
+    ingestor = object.__new__(SalesIngestor)  # Just the writer, no reference data or thread
+    ingestor.database = "winery"
+    batch = [((1, date.today(), 1, 1, 1), Future()), ((2, date.today(), 2, 1, 1), Future())]
+
+    with pytest.raises(KeyboardInterrupt):
+        ingestor._write(batch)
+
+    for _, future in batch:
+        with pytest.raises(KeyboardInterrupt):
+            future.result(timeout=0)
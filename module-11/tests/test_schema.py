@@ -0,0 +1,36 @@
+#   Title: test_schema.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the table dependency ordering.
+
+
+# Import Statements
+import pytest
+
+from schema import TABLES, table_dependencies, dependency_levels
+
+
+def test_levels_group_independent_names_in_sorted_order():
+    dependencies = {"sales": {"wines", "distributor"}, "wines": {"winery"},
+                    "distributor": set(), "winery": set()}
+
+    assert dependency_levels(dependencies) == [["distributor", "winery"], ["wines"], ["sales"]]
+
+
+def test_parents_outside_the_set_are_ignored():
+    assert dependency_levels({"sales": {"wines"}}) == [["sales"]]
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError, match="Circular dependency between: a, b"):
+        dependency_levels({"a": {"b"}, "b": {"a"}, "c": set()})
+
+
+def test_every_table_comes_after_the_tables_it_references():
+    dependencies = table_dependencies()
+    levels = dependency_levels(dependencies)
+    level_of = {name: i for i, level in enumerate(levels) for name in level}
+
+    assert sorted(level_of) == sorted(TABLES)
+    for name, parents in dependencies.items():
+        assert all(level_of[parent] < level_of[name] for parent in parents), name
@@ -0,0 +1,53 @@
+#   Title: test_table_dump.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the snapshot-consistent table dump.
+
+
+# Import Statements
+import mysql.connector  # for the error type
+from mysql.connector import errorcode
+
+import table_dump
+
+
+# Records statements; FLUSH TABLES WITH READ LOCK fails unless the user may lock
+class SnapshotConnection:
+    def __init__(self, can_lock=True):
+        self.can_lock = can_lock
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        if query.startswith("FLUSH TABLES") and not self.can_lock:
+            raise mysql.connector.Error(errno=errorcode.ER_SPECIFIC_ACCESS_DENIED_ERROR)
+        self.statements.append(query)
+
+    def close(self):
+        pass
+
+
+def start(monkeypatch, can_lock):
+    coordinator = SnapshotConnection(can_lock)
+    monkeypatch.setattr(table_dump, "connect_db", lambda database: coordinator)
+    connections = [SnapshotConnection() for _ in range(3)]
+    return connections, table_dump.start_snapshots(connections, "winery")
+
+
+def test_lock_lines_up_every_worker_snapshot(monkeypatch):
+    connections, (snapshot_connections, locked) = start(monkeypatch, can_lock=True)
+
+    assert locked
+    assert snapshot_connections == connections
+    assert all("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY" in conn.statements
+               for conn in connections)
+
+
+def test_without_the_lock_only_one_connection_takes_a_snapshot(monkeypatch):
+    connections, (snapshot_connections, locked) = start(monkeypatch, can_lock=False)
+
+    assert not locked
+    assert snapshot_connections == connections[:1]
+    assert connections[1].statements == []
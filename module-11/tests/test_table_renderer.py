@@ -0,0 +1,89 @@
+#   Title: test_table_renderer.py
+#   Authors: Casey Rose, Darreon Tolen and Jennifer Hoitenga
+#   Date: 02/23/2025
+#   Description: Tests for the streaming table output in every format.
+
+
+# Import Statements
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from table_renderer import BlockWriter, readable_cell, render_table
+
+HEADERS = ["ID", "Name"]
+ROWS = [(1, "Merlot"), (22, "Chablis")]
+
+
+def render(fmt, rows=ROWS, **options):
+    out = io.StringIO()
+    render_table(HEADERS, iter(rows), fmt=fmt, out=out, **options)
+    return out.getvalue()
+
+
+def test_text_columns_fit_the_widest_cell():
+    assert render("text") == ("ID | Name   \n"
+                              "------------\n"
+                              "1  | Merlot \n"
+                              "22 | Chablis\n")
+
+
+def test_text_with_border_and_fixed_widths():
+    assert render("text", col_widths=[3, 8], border=True) == ("--------------\n"
+                                                               "ID  | Name    \n"
+                                                               "--------------\n"
+                                                               "1   | Merlot  \n"
+                                                               "22  | Chablis \n")
+
+
+def test_text_rows_past_the_width_sample_are_still_written():
+    lines = render("text", sample_size=1).splitlines()
+
+    assert lines[2].split(" | ") == ["1 ", "Merlot"]
+    assert lines[3].split(" | ") == ["22", "Chablis"]
+
+
+def test_csv_and_tsv():
+    assert render("csv", rows=[(1, "Merlot, 2019")]) == 'ID,Name\n1,"Merlot, 2019"\n'
+    assert render("tsv") == "ID\tName\n1\tMerlot\n22\tChablis\n"
+
+
+def test_jsonl_writes_one_object_per_row():
+    lines = render("jsonl", rows=[(Decimal("12.50"), date(2025, 1, 31))]).splitlines()
+
+    assert [json.loads(line) for line in lines] == [{"ID": "12.50", "Name": "2025-01-31"}]
+
+
+def test_markdown_escapes_pipes():
+    assert render("markdown", rows=[(1, "Red | White")]) == ("| ID | Name |\n"
+                                                             "|---|---|\n"
+                                                             "| 1 | Red \\| White |\n")
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="Unknown table format 'xml'"):
+        render("xml")
+
+
+def test_readable_cell():
+    assert readable_cell(None) == "NULL"
+    assert readable_cell(Decimal("1234.5")) == "1,234.50"
+    assert readable_cell(datetime(2025, 2, 23, 9, 30, 15, 500)) == "2025-02-23 09:30:15"
+    assert readable_cell(date(2025, 2, 23)) == "2025-02-23"
+    assert readable_cell(7) == "7"
+
+
+def test_block_writer_buffers_until_the_block_fills():
+    out = io.StringIO()
+    writer = BlockWriter(out, block_size=10)
+
+    writer.write("12345")
+    assert out.getvalue() == ""
+    writer.write("67890")
+    assert out.getvalue() == "1234567890"
+    writer.write("x")
+    writer.flush()
+    assert out.getvalue() == "1234567890x"
@@ -25,7 +25,7 @@ secrets = dotenv_values("C:\csd\csd-310\module-6/.env")
 config = {
     "user": secrets["USER"],
     "password": secrets["PASSWORD"],
-    "host": secrets["HOST"],
+    "host": secrets["HOST"],  # The primary server; this script writes, so it never reads from a replica
     "database": secrets["DATABASE"],
     "raise_on_warnings": True  # not in .env file
 }